@@ -0,0 +1,264 @@
+"""
+Пакетная игровая среда: вся популяция играет синхронно на массивах NumPy.
+"""
+
+import time
+import numpy as np
+from typing import Optional
+from brain import Brain
+from snake import TICKS_PER_SECOND
+
+
+class BatchEnvironment:
+    """
+    Пакетная среда с той же механикой и наградами, что и Environment.play_game.
+
+    Состояние всех змеек хранится в массивах:
+    тело - кольцевой буфер клеток, занятость поля - булева маска (P, G, G),
+    еда - до трёх клеток на змейку.
+    """
+
+    # Те же направления, что и Snake.DIRECTIONS: вверх, вниз, влево, вправо
+    DX = np.array([0, 0, -1, 1])
+    DY = np.array([-1, 1, 0, 0])
+    MAX_FOOD = 3
+
+    def __init__(self, grid_size: int = 20, clock: str = 'wall', ticks_per_second: int = TICKS_PER_SECOND):
+        """
+        Args:
+            grid_size: размер игрового поля (grid_size x grid_size)
+            clock: часы для голода и fitness ('wall' - реальное время, 'ticks' - тики симуляции)
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
+        """
+        self.grid_size = grid_size
+        self.clock = clock
+        self.ticks_per_second = ticks_per_second
+        self.generation = 0  # Текущее поколение для расчета количества еды
+        self.np_random = np.random.default_rng()
+        self.steps = None  # Количество ходов каждой змейки в последней оценке
+        self.ticks = None  # Длина партии каждой змейки в тиках (как Snake.ticks)
+
+    def seed(self, seed: Optional[int] = None):
+        """Переинициализация генератора случайных чисел среды."""
+        self.np_random = np.random.default_rng(seed)
+
+    def _num_food(self) -> int:
+        """Количество еды как в Environment.reset_food: 1-3 в зависимости от поколения."""
+        return max(1, min(3, 1 + self.generation // 50))
+
+    def _reset_food(self, idx: np.ndarray):
+        """
+        Новая еда для змеек idx в случайных свободных клетках.
+
+        Args:
+            idx: индексы змеек, которым нужна новая еда
+        """
+        if len(idx) == 0:
+            return
+        g = self.grid_size
+        n_cells = g * g
+        num_food = self._num_food()
+
+        # Случайный приоритет каждой свободной клетке, занятые отбрасываем
+        scores = self.np_random.random((len(idx), n_cells))
+        scores[self.occ[idx].reshape(len(idx), n_cells)] = -1.0
+        chosen = np.argsort(-scores, axis=1)[:, :num_food]
+        valid = np.take_along_axis(scores, chosen, axis=1) >= 0
+
+        self.food[idx, :num_food] = chosen
+        self.n_food[idx] = valid.sum(axis=1)
+
+        # Если свободных клеток нет, еда появляется в случайной клетке
+        empty = self.n_food[idx] == 0
+        if empty.any():
+            self.food[idx[empty], 0] = self.np_random.integers(0, n_cells, size=empty.sum())
+            self.n_food[idx[empty]] = 1
+
+    def _views(self, a: np.ndarray, hx: np.ndarray, hy: np.ndarray) -> np.ndarray:
+        """
+        Входные данные мозга для змеек a (аналог Snake.get_view).
+
+        Returns:
+            массив (len(a), 8): направление до еды (one-hot) и опасности
+        """
+        g = self.grid_size
+        n = len(a)
+        inputs = np.zeros((n, 8))
+        rows = np.arange(n)
+
+        # Направление до первой еды
+        food = self.food[a, 0]
+        dx = food // g - hx
+        dy = food % g - hy
+        horizontal = np.abs(dx) > np.abs(dy)
+        food_dir = np.where(horizontal, np.where(dx > 0, 3, 2), np.where(dy > 0, 1, 0))
+        inputs[rows, food_dir] = 1.0
+
+        # Расстояние до ближайшего препятствия: тело или граница поля
+        cells = np.arange(g)
+        col = self.occ[a, hx, :]   # Столбец головы (движение по y)
+        row = self.occ[a, :, hy]   # Строка головы (движение по x)
+
+        up = col & (cells < hy[:, None])
+        last_up = g - 1 - np.argmax(up[:, ::-1], axis=1)
+        dist_up = np.where(up.any(axis=1), hy - last_up - 1, hy)
+
+        down = col & (cells > hy[:, None])
+        dist_down = np.where(down.any(axis=1), np.argmax(down, axis=1) - hy - 1, g - 1 - hy)
+
+        left = row & (cells < hx[:, None])
+        last_left = g - 1 - np.argmax(left[:, ::-1], axis=1)
+        dist_left = np.where(left.any(axis=1), hx - last_left - 1, hx)
+
+        right = row & (cells > hx[:, None])
+        dist_right = np.where(right.any(axis=1), np.argmax(right, axis=1) - hx - 1, g - 1 - hx)
+
+        dist = np.stack([dist_up, dist_down, dist_left, dist_right], axis=1)
+        inputs[:, 4:] = 1.0 / (1.0 + dist)
+        return inputs
+
+    def _now(self) -> float:
+        """Текущее время: реальное или тики симуляции в секундах."""
+        if self.clock == 'ticks':
+            return self.tick / self.ticks_per_second
+        return time.time()
+
+    def _time_without_food(self, idx: np.ndarray) -> np.ndarray:
+        """Время без еды в секундах (аналог Snake.get_time_without_food)."""
+        return self._now() - self.last_food_time[idx]
+
+    def _finish(self, idx: np.ndarray):
+        """Завершение партий змеек idx и расчёт финального fitness (аналог Snake.get_fitness)."""
+        if len(idx) == 0:
+            return
+        self.alive[idx] = False
+        fitness = self.fitness[idx]
+        time_without = self._time_without_food(idx)
+        fitness = np.where(time_without > 7.0, fitness * 0.5,
+                           np.where(time_without > 6.0, fitness - (time_without - 6.0) * 10.0, fitness))
+        self.result[idx] = np.maximum(0, fitness)
+
+    def play_population(self, weights: np.ndarray, max_steps: int = 500) -> np.ndarray:
+        """
+        Запуск игры для всей популяции сразу.
+
+        Args:
+            weights: стопка матриц весов (P, 8, 4)
+            max_steps: максимальное количество шагов
+
+        Returns:
+            массив финальных fitness (P,)
+        """
+        g = self.grid_size
+        n_cells = g * g
+        p = len(weights)
+
+        # Начальное состояние как в Snake.reset: три клетки в центре, голова справа
+        center = g // 2
+        self.body = np.zeros((p, n_cells), dtype=np.int64)  # Кольцевой буфер клеток x * g + y
+        self.body[:, :3] = [center * g + center, (center - 1) * g + center, (center - 2) * g + center]
+        self.head = np.zeros(p, dtype=np.int64)    # Индекс головы в кольцевом буфере
+        self.length = np.full(p, 3, dtype=np.int64)
+        self.occ = np.zeros((p, g, g), dtype=bool)
+        self.occ[:, center - 2:center + 1, center] = True
+
+        self.food = np.zeros((p, self.MAX_FOOD), dtype=np.int64)
+        self.n_food = np.zeros(p, dtype=np.int64)
+        self.alive = np.ones(p, dtype=bool)
+        self.fitness = np.zeros(p)
+        self.result = np.zeros(p)
+        self.steps = np.zeros(p, dtype=np.int64)
+        self.ticks = np.zeros(p, dtype=np.int64)
+        self.tick = 0  # Тики симуляции: у всех живых змеек часы идут одинаково
+        self.last_food_time = np.full(p, self._now())
+
+        self._reset_food(np.arange(p))
+
+        for step in range(max_steps):
+            a = np.flatnonzero(self.alive)
+            if len(a) == 0:
+                break
+
+            # Проверка победы: змейка заполнила всё поле
+            won = self.length[a] >= n_cells
+            if won.any():
+                self.fitness[a[won]] += 10000.0
+                self._finish(a[won])
+                a = a[~won]
+
+            # Проверка на смерть от голода (8 секунд без еды)
+            starving = self._time_without_food(a) > 8.0
+            if starving.any():
+                self._finish(a[starving])
+                a = a[~starving]
+            if len(a) == 0:
+                continue
+            self.tick += 1
+            self.ticks[a] += 1
+
+            head_cell = self.body[a, self.head[a]]
+            hx = head_cell // g
+            hy = head_cell % g
+
+            # Входы, решения мозгов и движение
+            inputs = self._views(a, hx, hy)
+            actions = Brain.think_stacked(weights[a], inputs, self.np_random)
+            nx = hx + self.DX[actions]
+            ny = hy + self.DY[actions]
+
+            # Столкновение со стеной или телом (хвост ещё на месте)
+            out = (nx < 0) | (nx >= g) | (ny < 0) | (ny >= g)
+            crashed = out.copy()
+            crashed[~out] = self.occ[a[~out], nx[~out], ny[~out]]
+            if crashed.any():
+                self._finish(a[crashed])
+                a, nx, ny = a[~crashed], nx[~crashed], ny[~crashed]
+            if len(a) == 0:
+                continue
+
+            # Добавление новой головы
+            new_cell = nx * g + ny
+            self.head[a] = (self.head[a] - 1) % n_cells
+            self.body[a, self.head[a]] = new_cell
+            self.occ[a, nx, ny] = True
+            self.length[a] += 1
+            self.steps[a] += 1
+
+            # Поедание еды: первая совпавшая еда из списка
+            slots = np.arange(self.MAX_FOOD)
+            hit = (self.food[a] == new_cell[:, None]) & (slots < self.n_food[a][:, None])
+            ate = hit.any(axis=1)
+            if ate.any():
+                e = a[ate]
+                time_without = self._time_without_food(e)
+                speed_bonus = np.maximum(0, 50 - (time_without * 10).astype(np.int64))
+                self.fitness[e] += 150 + speed_bonus
+                self.last_food_time[e] = self._now()
+
+                # Удаление съеденной еды со сдвигом оставшейся
+                eaten_slot = np.argmax(hit[ate], axis=1)
+                for j in range(self.MAX_FOOD - 1):
+                    shift = slots[j] >= eaten_slot
+                    self.food[e[shift], j] = self.food[e[shift], j + 1]
+                self.n_food[e] -= 1
+                self._reset_food(e[self.n_food[e] < 2])
+
+            # Удаление хвоста, если еда не съедена
+            t = a[~ate]
+            tail_idx = (self.head[t] + self.length[t] - 1) % n_cells
+            tail_cell = self.body[t, tail_idx]
+            self.occ[t, tail_cell // g, tail_cell % g] = False
+            self.length[t] -= 1
+
+            # Награда за выживание и штраф за бездействие (>5 секунд без еды)
+            self.fitness[a] += 0.2
+            time_without = self._time_without_food(a)
+            self.fitness[a] -= np.where(time_without > 5.0, time_without - 5.0, 0.0)
+
+            # Награда за приближение к еде
+            food = self.food[a, 0]
+            dist_to_food = np.abs(nx - food // g) + np.abs(ny - food % g)
+            self.fitness[a] += 5.0 / (dist_to_food + 1)
+
+        self._finish(np.flatnonzero(self.alive))
+        return self.result.copy()
@@ -0,0 +1,157 @@
+"""
+Запуск бенчмарков симуляции.
+
+    python -m benchmarks                       # все сценарии, результат в benchmarks/results/
+    python -m benchmarks --quick single_game   # выбранные сценарии, уменьшенный объём
+    python -m benchmarks --compare old.json new.json
+
+Работает без pygame: визуализатор не импортируется.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.scenarios import SCENARIOS
+from profiler import profile_rows
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def git_commit() -> str:
+    """Текущий коммит (если это git-репозиторий)."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def profile_scenario(func, quick: bool, top: int) -> List[Dict]:
+    """Разбивка времени по функциям (cProfile, по собственному времени)."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    func(quick)
+    profiler.disable()
+    return profile_rows(profiler, top)
+
+
+def memory_scenario(func, quick: bool) -> Dict:
+    """Пиковая и оставшаяся после сценария память Python (tracemalloc)."""
+    tracemalloc.start()
+    func(quick)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak_kib': peak / 1024, 'retained_kib': current / 1024}
+
+
+def print_metrics(metrics: Dict, indent: str = '  '):
+    """Вывод метрик сценария."""
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            print(f"{indent}{key}:")
+            print_metrics(value, indent + '  ')
+        elif isinstance(value, float):
+            print(f"{indent}{key:<22} {value:,.2f}")
+        else:
+            print(f"{indent}{key:<22} {value}")
+
+
+def flatten(metrics: Dict, prefix: str = '') -> Dict[str, float]:
+    """Плоский словарь числовых метрик для сравнения."""
+    flat = {}
+    for key, value in metrics.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path: str, new_path: str):
+    """Сравнение двух сохранённых прогонов."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{old.get('commit') or old_path} -> {new.get('commit') or new_path}")
+    print(f"{'Метрика':<55} {'Было':>12} {'Стало':>12} {'x':>7}")
+    print("-" * 90)
+    for name, scenario in new['scenarios'].items():
+        if name not in old['scenarios']:
+            continue
+        old_flat = flatten(old['scenarios'][name]['metrics'])
+        for key, value in flatten(scenario['metrics']).items():
+            if key in old_flat and old_flat[key]:
+                ratio = value / old_flat[key]
+                print(f"{name + '.' + key:<55} {old_flat[key]:>12.2f} {value:>12.2f} {ratio:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки эволюционной змейки')
+    parser.add_argument('scenarios', nargs='*', help=f'Сценарии (по умолчанию все): {", ".join(SCENARIOS)}')
+    parser.add_argument('--quick', action='store_true', help='Уменьшенный объём работы')
+    parser.add_argument('--no-profile', action='store_true', help='Без прогонов cProfile и tracemalloc')
+    parser.add_argument('--top', type=int, default=15, help='Сколько функций показывать в разбивке')
+    parser.add_argument('--output', help='Путь к JSON с результатами')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Сравнить два JSON')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(unknown)}")
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'scenarios': {},
+    }
+
+    for name in names:
+        func = SCENARIOS[name]
+        print(f"▶ {name}")
+        entry = {'metrics': func(args.quick)}
+        print_metrics(entry['metrics'])
+
+        if not args.no_profile:
+            entry['memory'] = memory_scenario(func, args.quick)
+            entry['profile'] = profile_scenario(func, args.quick, args.top)
+            print(f"  память: пик {entry['memory']['peak_kib']:,.0f} КиБ")
+            for row in entry['profile'][:5]:
+                print(f"    {row['tottime']:8.3f}s {row['calls']:>10} {row['function']}")
+        results['scenarios'][name] = entry
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"✓ Результаты сохранены: {output}")
+
+
+if __name__ == '__main__':
+    main()
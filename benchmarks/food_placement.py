@@ -0,0 +1,76 @@
+"""
+Микробенчмарк размещения еды: полный перебор поля против пула свободных клеток.
+
+Запуск: python -m benchmarks.food_placement [--grid 20] [--repeats 2000]
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from environment import Environment, FreeCells
+
+
+def serpentine(grid_size: int, length: int) -> List[Tuple[int, int]]:
+    """Тело змейки заданной длины, уложенное змейкой по строкам поля."""
+    cells = []
+    for y in range(grid_size):
+        xs = range(grid_size) if y % 2 == 0 else range(grid_size - 1, -1, -1)
+        cells.extend((x, y) for x in xs)
+    return cells[:length]
+
+
+def bench_rescan(env: Environment, body: List[Tuple[int, int]], repeats: int) -> float:
+    """Старый способ: список свободных клеток строится заново на каждую еду."""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        free_positions = env.get_free_positions(body)
+        pos = rng.choice(free_positions)
+        free_positions.remove(pos)
+    return (time.perf_counter() - start) / repeats
+
+
+def bench_pool(grid_size: int, body: List[Tuple[int, int]], repeats: int) -> float:
+    """
+    Пул: шаг змейки (занять новую голову, освободить хвост) плюс выбор еды.
+    
+    Змейка ползёт по той же змейке строк, что и body (хвост - body[0]),
+    переходя с последней клетки поля на первую, так что пул меняется на
+    каждом шаге.
+    """
+    rng = random.Random(0)
+    path = serpentine(grid_size, grid_size * grid_size)
+    length = len(body)
+    pool = FreeCells(grid_size)
+    pool.reset(grid_size, body)
+    start = time.perf_counter()
+    for step in range(repeats):
+        pool.release(path[step % len(path)])
+        pool.occupy(path[(step + length) % len(path)])
+        pool.sample(1, rng)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк размещения еды')
+    parser.add_argument('--grid', type=int, default=20, help='Размер поля')
+    parser.add_argument('--repeats', type=int, default=2000, help='Повторов на точку')
+    args = parser.parse_args()
+
+    env = Environment(args.grid)
+    n_cells = args.grid * args.grid
+
+    print(f"{'Длина':<8} {'Заполнено':<10} {'Перебор, мкс':<14} {'Пул, мкс':<10}")
+    print("-" * 44)
+    for fill in (0.01, 0.25, 0.5, 0.75, 0.9, 0.99):
+        length = max(3, int(n_cells * fill))
+        body = serpentine(args.grid, length)
+        rescan = bench_rescan(env, body, args.repeats) * 1e6
+        pool = bench_pool(args.grid, body, args.repeats) * 1e6
+        print(f"{length:<8} {fill:<10.0%} {rescan:<14.2f} {pool:<10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Проверка пакетной мутации против мутации по одному мозгу.
+
+Оба способа мутируют копии одного родителя; сравниваются распределения
+изменений весов (критерий Колмогорова-Смирнова), доля изменённых весов,
+распределение числа изменённых весов на мозг и скорость.
+
+Запуск: python -m benchmarks.mutation [--children 20000] [--rate 0.1] [--strength 0.2]
+"""
+
+import argparse
+import time
+from typing import Tuple
+
+import numpy as np
+
+from brain import mutate_batch, mutate_weights
+
+
+def per_brain(parent: np.ndarray, children: int, rate: float, strength: float) -> Tuple[np.ndarray, float]:
+    """Старый способ: mutate_weights для каждого потомка отдельно."""
+    weights = np.repeat(parent[None], children, axis=0)
+    start = time.perf_counter()
+    for i in range(children):
+        mutate_weights(weights[i], rate, strength)
+    return weights, time.perf_counter() - start
+
+
+def batched(parent: np.ndarray, children: int, rate: float, strength: float) -> Tuple[np.ndarray, float]:
+    """Пакетный способ: mutate_batch для всех потомков сразу."""
+    weights = np.repeat(parent[None], children, axis=0)
+    start = time.perf_counter()
+    mutate_batch(weights, rate, strength)
+    return weights, time.perf_counter() - start
+
+
+def ks_statistic(a: np.ndarray, b: np.ndarray) -> float:
+    """Двухвыборочная статистика Колмогорова-Смирнова."""
+    a = np.sort(a)
+    b = np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side='right') / len(a)
+    cdf_b = np.searchsorted(b, values, side='right') / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def ks_critical(n: int, m: int, alpha: float = 0.001) -> float:
+    """Критическое значение статистики КС для уровня значимости alpha."""
+    c = np.sqrt(-0.5 * np.log(alpha / 2))
+    return float(c * np.sqrt((n + m) / (n * m)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка пакетной мутации')
+    parser.add_argument('--children', type=int, default=20000, help='Количество потомков')
+    parser.add_argument('--rate', type=float, default=0.1, help='Вероятность мутации')
+    parser.add_argument('--strength', type=float, default=0.2, help='Сила мутации')
+    parser.add_argument('--seed', type=int, default=0, help='Сид ГСЧ')
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    parent = np.random.uniform(-1, 1, (8, 4))
+    old, old_time = per_brain(parent, args.children, args.rate, args.strength)
+    new, new_time = batched(parent, args.children, args.rate, args.strength)
+
+    old_delta = (old - parent).ravel()
+    new_delta = (new - parent).ravel()
+    old_changed = (old != parent).reshape(args.children, -1).sum(axis=1)
+    new_changed = (new != parent).reshape(args.children, -1).sum(axis=1)
+
+    print(f"{'Метрика':<34} {'По одному':>12} {'Пакетно':>12}")
+    print("-" * 60)
+    print(f"{'Доля изменённых весов':<34} {np.mean(old_delta != 0):>12.4f} {np.mean(new_delta != 0):>12.4f}")
+    print(f"{'Среднее изменение':<34} {old_delta.mean():>12.4f} {new_delta.mean():>12.4f}")
+    print(f"{'СКО изменения':<34} {old_delta.std():>12.4f} {new_delta.std():>12.4f}")
+    print(f"{'Мозгов с >=6 изменёнными весами':<34} {np.mean(old_changed >= 6):>12.4f} {np.mean(new_changed >= 6):>12.4f}")
+    print(f"{'Время, мс':<34} {old_time * 1e3:>12.1f} {new_time * 1e3:>12.1f}")
+    print()
+
+    ok = True
+    checks = (
+        ('изменения весов', old_delta, new_delta),
+        ('значения весов', old.ravel(), new.ravel()),
+        ('число изменённых весов на мозг', old_changed, new_changed),
+    )
+    for name, a, b in checks:
+        stat = ks_statistic(a, b)
+        critical = ks_critical(len(a), len(b))
+        passed = stat < critical
+        ok = ok and passed
+        print(f"{'✓' if passed else '✗'} КС {name}: {stat:.4f} (порог {critical:.4f})")
+
+    print()
+    print("✓ Распределения совпадают" if ok else "✗ Распределения различаются")
+    print(f"Ускорение: x{old_time / new_time:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Время кадра визуализатора без окна (SDL dummy).
+
+Поле 20x20, змейка из 300 сегментов вдоль гамильтонова цикла, три еды,
+статус-бар и панель статистики. Выводится среднее время кадра с разбивкой
+по функциям отрисовки и сравнение полной перерисовки окна с грязными
+прямоугольниками, когда змейка ползёт по клетке за кадр (часы pygame
+подменяются: 15 кадров в секунду).
+
+Запуск: python -m benchmarks.render [--frames 300] [--length 300]
+"""
+
+import argparse
+import os
+import time
+from typing import List, Tuple
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+
+from benchmarks.scenarios import hamiltonian_cycle
+import pygame
+
+from evolution import Evolution
+from visualizer import Visualizer
+
+FRAME_MS = 1000 // 15  # Шаг подменённых часов pygame
+
+
+def build_visualizer(grid_size: int, length: int) -> Visualizer:
+    """Визуализатор со змейкой заданной длины и историей fitness."""
+    evolution = Evolution(population_size=10, grid_size=grid_size, clock='ticks')
+    evolution.generation = 120
+    evolution.best_fitness_history = list(np.linspace(10.0, 900.0, 60))
+    evolution.avg_fitness_history = list(np.linspace(1.0, 90.0, 60))
+
+    visualizer = Visualizer(evolution)
+    snake = evolution.get_best_snake()
+    snake.set_body(hamiltonian_cycle(grid_size)[:length][::-1])
+    visualizer.demo_snake = snake
+    visualizer.demo_food_positions = [(2, 5), (7, 11), (13, 3)]
+    return visualizer
+
+
+def crawl(visualizer: Visualizer, cycle: List[Tuple[int, int]], frames: int,
+          dirty: bool) -> Tuple[float, float]:
+    """
+    Кадры, как в visualize_generation: змейка сдвигается на клетку за кадр.
+    
+    Returns:
+        (среднее время кадра в секундах, средняя доля окна, переданная на экран)
+    """
+    snake = visualizer.demo_snake
+    length = len(snake.body)
+    clock = [0]
+    real_ticks = pygame.time.get_ticks
+    pygame.time.get_ticks = lambda: clock[0]
+    visualizer.reset_dirty_state()
+    window_area = visualizer.width * visualizer.height
+    updated = 0.0
+    try:
+        start = time.perf_counter()
+        for frame in range(frames):
+            if dirty:
+                rects = visualizer.render_field(snake, visualizer.demo_food_positions)
+            else:
+                rects = None
+                visualizer.screen.fill(visualizer.COLORS['background'])
+                visualizer.draw_grid()
+                visualizer.draw_snake(snake)
+                for food_pos in visualizer.demo_food_positions:
+                    visualizer.draw_food(food_pos)
+            
+            # Шаг змейки вдоль цикла
+            head = (length + frame) % len(cycle)
+            snake.set_body([cycle[(head - i) % len(cycle)] for i in range(length)])
+            visualizer.demo_step += 1
+            
+            visualizer.draw_panels(snake, rects)
+            if dirty:
+                pygame.display.update(rects)
+                updated += sum(rect.width * rect.height for rect in rects) / window_area
+            else:
+                pygame.display.flip()
+                updated += 1.0
+            clock[0] += FRAME_MS
+        return (time.perf_counter() - start) / frames, updated / frames
+    finally:
+        pygame.time.get_ticks = real_ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время кадра визуализатора')
+    parser.add_argument('--frames', type=int, default=300, help='Количество кадров')
+    parser.add_argument('--grid', type=int, default=20, help='Размер поля')
+    parser.add_argument('--length', type=int, default=300, help='Длина змейки')
+    args = parser.parse_args()
+
+    visualizer = build_visualizer(args.grid, args.length)
+    snake = visualizer.demo_snake
+    gen, best_fit, avg_fit = visualizer.evolution.get_stats()
+    parts = {
+        'draw_grid': visualizer.draw_grid,
+        'draw_snake': lambda: visualizer.draw_snake(snake),
+        'draw_food': lambda: [visualizer.draw_food(pos) for pos in visualizer.demo_food_positions],
+        'draw_game_status_bar': lambda: visualizer.draw_game_status_bar(snake),
+        'draw_stats': lambda: visualizer.draw_stats(gen, best_fit, avg_fit),
+    }
+
+    # Прогрев: первые кадры заполняют кэши поверхностей
+    for _ in range(10):
+        for draw in parts.values():
+            draw()
+
+    timings = dict.fromkeys(parts, 0.0)
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        for name, draw in parts.items():
+            part_start = time.perf_counter()
+            draw()
+            timings[name] += time.perf_counter() - part_start
+    elapsed = time.perf_counter() - start
+
+    print(f"Поле {args.grid}x{args.grid}, змейка {len(snake.body)} сегментов, {args.frames} кадров")
+    for name, total in timings.items():
+        print(f"  {name:<22} {total / args.frames * 1e3:8.3f} мс")
+    print(f"  {'кадр':<22} {elapsed / args.frames * 1e3:8.3f} мс ({args.frames / elapsed:,.0f} кадров/с)")
+
+    cycle = hamiltonian_cycle(args.grid)
+    full, _ = crawl(visualizer, cycle, args.frames, dirty=False)
+    dirty, area = crawl(visualizer, cycle, args.frames, dirty=True)
+    visualizer.quit()
+
+    print()
+    print("Змейка движется, кадр целиком:")
+    print(f"  {'полная перерисовка':<22} {full * 1e3:8.3f} мс")
+    print(f"  {'грязные прямоугольники':<22} {dirty * 1e3:8.3f} мс (x{full / dirty:.1f}), "
+          f"на экран передаётся {area:.0%} окна")
+
+
+if __name__ == '__main__':
+    main()
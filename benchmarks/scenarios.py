@@ -0,0 +1,180 @@
+"""
+Сценарии бенчмарков с фиксированными сидами.
+
+Каждый сценарий - функция (quick) -> dict с метриками. Все партии идут
+на часах 'ticks', поэтому объём работы не зависит от скорости машины.
+"""
+
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from brain import Brain
+from environment import Environment, FreeCells
+from evolution import Evolution
+from snake import Snake
+
+SEED = 12345
+
+
+def greedy_weights() -> np.ndarray:
+    """Веса "разумной" змейки: идёт к еде и избегает близких препятствий."""
+    weights = np.zeros((8, 4))
+    for i in range(4):
+        weights[i, i] = 40.0       # Направление до еды -> то же действие
+        weights[4 + i, i] = -60.0  # Опасность в направлении -> избегать
+    return weights
+
+
+def hamiltonian_cycle(grid_size: int) -> List[Tuple[int, int]]:
+    """
+    Гамильтонов цикл по полю чётного размера.
+
+    Верхняя строка слева направо, затем столбцы змейкой справа налево
+    и возврат вверх по первому столбцу.
+    """
+    cells = [(x, 0) for x in range(grid_size)]
+    for i, x in enumerate(range(grid_size - 1, 0, -1)):
+        ys = range(1, grid_size) if i % 2 == 0 else range(grid_size - 1, 0, -1)
+        cells.extend((x, y) for y in ys)
+    cells.extend((0, y) for y in range(grid_size - 1, 0, -1))
+    return cells
+
+
+def _seed_all():
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def single_game(quick: bool = False) -> Dict:
+    """Долгие партии одной "разумной" змейки на поле 20x20."""
+    _seed_all()
+    games = 10 if quick else 50
+    env = Environment(20, clock='ticks')
+    env.generation = 150  # Максимум еды на поле
+    snake = Snake(brain=Brain(weights=greedy_weights()), grid_size=20, clock='ticks')
+
+    steps = 0
+    start = time.perf_counter()
+    for game in range(games):
+        env.seed(SEED + game)
+        env.play_game(snake, 20000)
+        steps += snake.ticks
+    elapsed = time.perf_counter() - start
+
+    return {
+        'games': games,
+        'steps': steps,
+        'seconds': elapsed,
+        'steps_per_sec': steps / elapsed,
+        'games_per_sec': games / elapsed,
+    }
+
+
+def _evolve(population_size: int, quick: bool, engine: str = 'serial') -> Dict:
+    """Поколения Evolution.evolve с фиксированным сидом."""
+    _seed_all()
+    generations = 1 if quick else 3
+    evolution = Evolution(population_size=population_size, max_steps=2000,
+                          clock='ticks', engine=engine)
+
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(generations):
+        evolution.evolve()
+        steps += int(evolution.game_lengths.sum())
+    elapsed = time.perf_counter() - start
+    evolution.close()
+
+    games = generations * population_size
+    return {
+        'population': population_size,
+        'generations': generations,
+        'steps': steps,
+        'seconds': elapsed,
+        'steps_per_sec': steps / elapsed,
+        'games_per_sec': games / elapsed,
+        'generations_per_min': generations / elapsed * 60,
+    }
+
+
+def evolve_pop100(quick: bool = False) -> Dict:
+    """Поколение эволюции, популяция 100."""
+    return _evolve(100, quick)
+
+
+def evolve_pop1000(quick: bool = False) -> Dict:
+    """Поколение эволюции, популяция 1000."""
+    return _evolve(1000, quick)
+
+
+def evolve_pop1000_batch(quick: bool = False) -> Dict:
+    """Поколение эволюции, популяция 1000, пакетный движок."""
+    return _evolve(1000, quick, engine='batch')
+
+
+def late_game(quick: bool = False) -> Dict:
+    """
+    Шаги змейки длиной 300+ на поле 20x20: вид, решение мозга, ход и хвост.
+
+    Змейка идёт по гамильтонову циклу, поэтому не умирает и не растёт.
+    """
+    _seed_all()
+    grid_size = 20
+    cycle = hamiltonian_cycle(grid_size)
+    rounds = 1 if quick else 5
+    rng = np.random.default_rng(SEED)
+    result = {}
+
+    for length in (300, 390):
+        snake = Snake(grid_size=grid_size, clock='ticks')
+        # Голова - последняя клетка первых length клеток цикла
+        snake.set_body(cycle[length - 1::-1])
+        free_cells = FreeCells(grid_size)
+        free_cells.reset(grid_size, snake.body)
+        food = free_cells.sample(1, random)[0]
+
+        steps = rounds * len(cycle)
+        start = time.perf_counter()
+        for step in range(steps):
+            head = snake.body[0]
+            nxt = cycle[(length + step) % len(cycle)]
+            action = {(0, -1): 0, (0, 1): 1, (-1, 0): 2, (1, 0): 3}[(nxt[0] - head[0], nxt[1] - head[1])]
+            inputs = snake.get_view(food)
+            snake.brain.think(inputs, rng)
+            snake.move(action)
+            free_cells.occupy(nxt)
+            free_cells.release(snake.remove_tail())
+        elapsed = time.perf_counter() - start
+
+        result[f'length_{length}'] = {
+            'steps': steps,
+            'seconds': elapsed,
+            'steps_per_sec': steps / elapsed,
+        }
+    return result
+
+
+def food_placement(quick: bool = False) -> Dict:
+    """Размещение еды из пула свободных клеток при разном заполнении поля."""
+    from benchmarks.food_placement import bench_pool, serpentine
+
+    repeats = 2000 if quick else 20000
+    result = {}
+    for fill in (0.01, 0.5, 0.99):
+        length = max(3, int(400 * fill))
+        per_call = bench_pool(20, serpentine(20, length), repeats)
+        result[f'fill_{int(fill * 100)}'] = {'usec_per_step': per_call * 1e6}
+    return result
+
+
+SCENARIOS: Dict[str, Callable[[bool], Dict]] = {
+    'single_game': single_game,
+    'evolve_pop100': evolve_pop100,
+    'evolve_pop1000': evolve_pop1000,
+    'evolve_pop1000_batch': evolve_pop1000_batch,
+    'late_game': late_game,
+    'food_placement': food_placement,
+}
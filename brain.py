@@ -3,8 +3,80 @@
 Преобразует входные данные (расстояния, направления) в действия.
 """
 
+import math
 import numpy as np
 
+# Генератор по умолчанию для мозгов, которым не передали свой: глобальный
+# поток NumPy (модуль np.random с теми же random()/random(n)), поэтому
+# np.random.seed (--seed) делает и такие ходы воспроизводимыми
+_default_rng = np.random
+
+
+def sample_actions(output: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Выбор действий из softmax по строкам обратным преобразованием CDF.
+    
+    Args:
+        output: выходы сети (N, output_size)
+        rng: генератор случайных чисел (одно равномерное число на строку)
+        
+    Returns:
+        индексы действий (N,)
+    """
+    exp_output = np.exp(output - output.max(axis=1, keepdims=True))
+    cdf = np.cumsum(exp_output, axis=1)
+    u = rng.random(len(output))[:, None] * cdf[:, -1:]
+    return np.minimum((cdf <= u).sum(axis=1), output.shape[1] - 1)
+
+
+def mutate_weights(weights: np.ndarray, mutation_rate: float, mutation_strength: float):
+    """
+    Мутация матрицы весов на месте (общая логика Brain.mutate и Population).
+    
+    Args:
+        weights: матрица весов (изменяется)
+        mutation_rate: вероятность мутации каждого веса (0-1)
+        mutation_strength: сила мутации (стандартное отклонение)
+    """
+    # Мутация только части весов
+    mutation_mask = np.random.random(weights.shape) < mutation_rate
+    noise = np.random.normal(0, mutation_strength, weights.shape)
+    weights[mutation_mask] += noise[mutation_mask]
+    
+    # Иногда добавляем сильную случайную мутацию (10% вероятность полной мутации)
+    if np.random.random() < 0.1:
+        # Сильная мутация: меняем ~30% весов радикально
+        strong_mask = np.random.random(weights.shape) < 0.3
+        weights[strong_mask] = np.random.uniform(-1, 1, size=np.sum(strong_mask))
+
+
+def mutate_batch(weights: np.ndarray, mutation_rate: float, mutation_strength: float):
+    """
+    Мутация стопки матриц весов на месте: те же правила, что и mutate_weights,
+    но случайные числа для всех мозгов берутся одним тензором.
+    
+    Args:
+        weights: веса (N, input_size, output_size) (изменяются)
+        mutation_rate: вероятность мутации каждого веса (0-1)
+        mutation_strength: сила мутации (стандартное отклонение)
+    """
+    n = len(weights)
+    if n == 0:
+        return
+    
+    # Гауссовский шум на часть весов: одна маска и один тензор шума
+    mutation_mask = np.random.random(weights.shape) < mutation_rate
+    noise = np.random.normal(0, mutation_strength, weights.shape)
+    weights += noise * mutation_mask
+    
+    # Сильная мутация у ~10% мозгов: ~30% их весов заменяются на uniform(-1, 1)
+    strong_rows = np.flatnonzero(np.random.random(n) < 0.1)
+    if len(strong_rows):
+        block = weights[strong_rows]
+        strong_mask = np.random.random(block.shape) < 0.3
+        block[strong_mask] = np.random.uniform(-1, 1, size=np.sum(strong_mask))
+        weights[strong_rows] = block
+
 
 class Brain:
     """Простой мозг на основе матричного умножения."""
@@ -22,28 +94,67 @@ class Brain:
             # Инициализация весов в диапазоне [-1, 1]
             self.weights = np.random.uniform(-1, 1, (input_size, output_size))
     
-    def think(self, inputs: np.ndarray) -> int:
+    def think(self, inputs: np.ndarray, rng: np.random.Generator = None) -> int:
         """
         Обработка входных данных и генерация действия.
         
+        Быстрый путь для одной змейки: та же выборка, что и в think_batch,
+        но softmax и CDF для 4 выходов считаются без лишних вызовов NumPy.
+        
         Args:
             inputs: массив входных данных (8 значений)
+            rng: генератор случайных чисел (None - глобальный поток np.random)
             
         Returns:
             индекс выбранного действия (0-3: вверх, вниз, влево, вправо)
         """
-        # Нормализация входов для стабильности
-        inputs = np.clip(inputs, -10, 10)
+        # Нормализация входов для стабильности и линейное преобразование
+        output = (np.clip(inputs, -10, 10) @ self.weights).tolist()
         
-        # Линейное преобразование
-        output = np.dot(inputs, self.weights)
+        # Накопленные веса softmax (без нормализации)
+        max_output = max(output)
+        cdf = []
+        total = 0.0
+        for value in output:
+            total += math.exp(value - max_output)
+            cdf.append(total)
         
-        # Softmax для вероятностного выбора
-        exp_output = np.exp(output - np.max(output))
-        probabilities = exp_output / np.sum(exp_output)
+        # Выбор действия одним равномерным числом
+        u = (rng if rng is not None else _default_rng).random() * total
+        for action, bound in enumerate(cdf):
+            if u < bound:
+                return action
+        return len(cdf) - 1
+    
+    def think_batch(self, inputs: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Действия для пачки входов с весами этого мозга.
         
-        # Выбор действия на основе вероятностей
-        return np.random.choice(len(output), p=probabilities)
+        Args:
+            inputs: массив входных данных (N, 8)
+            rng: генератор случайных чисел (None - глобальный поток np.random)
+            
+        Returns:
+            индексы действий (N,)
+        """
+        output = np.clip(inputs, -10, 10) @ self.weights
+        return sample_actions(output, rng if rng is not None else _default_rng)
+    
+    @staticmethod
+    def think_stacked(weights: np.ndarray, inputs: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Действия сразу для многих мозгов: по одному входу на мозг.
+        
+        Args:
+            weights: стопка матриц весов (P, 8, 4)
+            inputs: массив входных данных (P, 8)
+            rng: генератор случайных чисел (None - глобальный поток np.random)
+            
+        Returns:
+            индексы действий (P,)
+        """
+        output = np.matmul(np.clip(inputs, -10, 10)[:, None, :], weights)[:, 0, :]
+        return sample_actions(output, rng if rng is not None else _default_rng)
     
     def mutate(self, mutation_rate: float = 0.1, mutation_strength: float = 0.2) -> 'Brain':
         """
@@ -57,21 +168,21 @@ class Brain:
             новый экземпляр Brain с мутированными весами
         """
         new_weights = self.weights.copy()
-        
-        # Мутация только части весов
-        mutation_mask = np.random.random(self.weights.shape) < mutation_rate
-        noise = np.random.normal(0, mutation_strength, self.weights.shape)
-        new_weights[mutation_mask] += noise[mutation_mask]
-        
-        # Иногда добавляем сильную случайную мутацию (10% вероятность полной мутации)
-        if np.random.random() < 0.1:
-            # Сильная мутация: меняем ~30% весов радикально
-            strong_mask = np.random.random(self.weights.shape) < 0.3
-            new_weights[strong_mask] = np.random.uniform(-1, 1, size=np.sum(strong_mask))
-        
+        mutate_weights(new_weights, mutation_rate, mutation_strength)
         return Brain(weights=new_weights)
     
     def clone(self) -> 'Brain':
         """Создание точной копии мозга."""
         return Brain(weights=self.weights)
+    
+    @classmethod
+    def wrap(cls, weights: np.ndarray) -> 'Brain':
+        """
+        Мозг поверх существующего массива весов без копирования.
+        
+        Изменения весов такого мозга видны в исходном массиве (и наоборот).
+        """
+        brain = cls.__new__(cls)
+        brain.weights = weights
+        return brain
 
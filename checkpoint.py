@@ -0,0 +1,119 @@
+"""
+Чекпоинты всей популяции: продолжение эволюции ровно с того места, где она остановилась.
+
+Формат - несжатый .npz (zip с массивами .npy): веса популяции одним
+массивом (P, 8, 4), истории fitness, состояния ГСЧ и параметры в JSON.
+Pickle не используется, поэтому загрузка безопасна и занимает миллисекунды
+даже для популяций в десятки тысяч особей.
+"""
+
+import json
+import os
+import random
+from typing import Dict, Optional
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path(directory: str, session_id: Optional[int]) -> str:
+    """Путь к чекпоинту сессии (последний чекпоинт перезаписывается)."""
+    name = f'session_{session_id}.npz' if session_id else 'checkpoint.npz'
+    return os.path.join(directory, name)
+
+
+def save_checkpoint(evolution, path: str, session_id: Optional[int] = None):
+    """
+    Сохранение чекпоинта эволюции.
+
+    Файл пишется во временный и атомарно переименовывается, поэтому
+    прерывание во время записи не портит предыдущий чекпоинт.
+
+    Args:
+        evolution: объект Evolution (между поколениями)
+        path: путь к файлу .npz
+        session_id: ID сессии в БД (для продолжения той же сессии)
+    """
+    state = evolution.get_state()
+    meta = dict(state['meta'], version=CHECKPOINT_VERSION, session_id=session_id)
+
+    # Состояния ГСЧ: глобальный NumPy (сиды партий, мутации) и модуль random
+    np_state = np.random.get_state()
+    meta['np_random'] = {'pos': int(np_state[2]), 'has_gauss': int(np_state[3]),
+                         'cached_gaussian': float(np_state[4])}
+    py_version, py_internal, py_gauss = random.getstate()
+    meta['random'] = {'version': py_version, 'gauss_next': py_gauss}
+
+    arrays = {
+        'weights': state['weights'],
+        'best_fitness_history': state['best_fitness_history'],
+        'avg_fitness_history': state['avg_fitness_history'],
+        'np_random_keys': np_state[1],
+        'random_internal': np.array(py_internal, dtype=np.uint32),
+        'meta': np.array(json.dumps(meta)),
+    }
+    if state['best_weights'] is not None:
+        arrays['best_weights'] = state['best_weights']
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Dict:
+    """
+    Загрузка чекпоинта.
+
+    Returns:
+        словарь в формате Evolution.get_state плюс состояния ГСЧ
+    """
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия чекпоинта: {meta.get('version')}")
+        return {
+            'weights': data['weights'],
+            'best_fitness_history': data['best_fitness_history'],
+            'avg_fitness_history': data['avg_fitness_history'],
+            'best_weights': data['best_weights'] if 'best_weights' in data.files else None,
+            'np_random_keys': data['np_random_keys'],
+            'random_internal': data['random_internal'],
+            'meta': meta,
+        }
+
+
+def checkpoint_session(path: str) -> Optional[int]:
+    """ID сессии в БД, записанный в чекпоинте (None - запуск без БД)."""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data['meta'])).get('session_id')
+
+
+def restore_checkpoint(evolution, path: str) -> Dict:
+    """
+    Восстановление эволюции и глобальных ГСЧ из чекпоинта.
+
+    Args:
+        evolution: объект Evolution
+        path: путь к файлу .npz
+
+    Returns:
+        параметры чекпоинта (поколение, session_id, ...)
+    """
+    state = load_checkpoint(path)
+    evolution.set_state(state)
+
+    meta = state['meta']
+    np_meta = meta['np_random']
+    np.random.set_state(('MT19937', state['np_random_keys'], np_meta['pos'],
+                         np_meta['has_gauss'], np_meta['cached_gaussian']))
+    py_meta = meta['random']
+    random.setstate((py_meta['version'], tuple(int(x) for x in state['random_internal']),
+                     py_meta['gauss_next']))
+    return meta
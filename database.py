@@ -2,30 +2,184 @@
 База данных SQLite для сохранения прогресса эволюции.
 """
 
+import pathlib
 import sqlite3
+import struct
+import time
+import zlib
 import numpy as np
 import json
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
+
+
+# Версия схемы в PRAGMA user_version: при совпадении CREATE-запросы не выполняются,
+# более старые базы доводятся миграциями (см. EvolutionDB.MIGRATIONS)
+SCHEMA_VERSION = 2
+
+# Формат весов в best_snakes.weights: заголовок (магия, версия, тип, флаги,
+# число осей), размеры осей uint32 и данные little-endian в C-порядке.
+# Blob без магии - старый формат: float64 (input_size, output_size) без заголовка
+WEIGHTS_MAGIC = b'EVW'
+WEIGHTS_VERSION = 1
+WEIGHTS_HEADER = struct.Struct('<3sBBBH')
+WEIGHTS_DTYPES = {1: np.dtype('<f2'), 2: np.dtype('<f4'), 3: np.dtype('<f8')}
+WEIGHTS_CODES = {dtype: code for code, dtype in WEIGHTS_DTYPES.items()}
+WEIGHTS_ZLIB = 1  # Флаг: данные сжаты zlib
+
+
+def encode_weights(weights: np.ndarray, dtype: str = 'float32', compress: bool = False) -> bytes:
+    """
+    Сериализация весов в blob с типом и формой.
+    
+    Args:
+        weights: веса любой формы
+        dtype: тип хранения (float16, float32; float64 - без потерь)
+        compress: сжать данные zlib
+        
+    Returns:
+        blob весов
+    """
+    stored = np.dtype(dtype).newbyteorder('<')
+    if stored not in WEIGHTS_CODES:
+        raise ValueError(f'Неподдерживаемый тип весов: {dtype}')
+    # tobytes() копирует веса, поэтому blob не зависит от дальнейших мутаций
+    data = np.ascontiguousarray(weights, dtype=stored).tobytes()
+    flags = 0
+    if compress:
+        data = zlib.compress(data)
+        flags |= WEIGHTS_ZLIB
+    header = WEIGHTS_HEADER.pack(WEIGHTS_MAGIC, WEIGHTS_VERSION, WEIGHTS_CODES[stored], flags, weights.ndim)
+    return header + struct.pack(f'<{weights.ndim}I', *weights.shape) + data
+
+
+def weights_format(blob: bytes) -> Optional[Tuple[np.dtype, Tuple[int, ...], bool, int]]:
+    """
+    Разбор заголовка blob весов.
+    
+    Returns:
+        (тип, форма, сжато ли, смещение данных) или None для старого формата
+    """
+    if len(blob) < WEIGHTS_HEADER.size or bytes(blob[:len(WEIGHTS_MAGIC)]) != WEIGHTS_MAGIC:
+        return None
+    _, version, code, flags, ndim = WEIGHTS_HEADER.unpack_from(blob)
+    offset = WEIGHTS_HEADER.size + 4 * ndim
+    if version != WEIGHTS_VERSION or code not in WEIGHTS_DTYPES or len(blob) < offset:
+        return None
+    shape = struct.unpack_from(f'<{ndim}I', blob, WEIGHTS_HEADER.size)
+    dtype = WEIGHTS_DTYPES[code]
+    compressed = bool(flags & WEIGHTS_ZLIB)
+    # Несжатые данные должны занимать ровно остаток blob
+    size = dtype.itemsize
+    for n in shape:
+        size *= n
+    if not compressed and len(blob) - offset != size:
+        return None
+    return dtype, shape, compressed, offset
+
+
+def decode_weights(blob: bytes, legacy_shape: Tuple[int, ...] = (8, 4)) -> np.ndarray:
+    """
+    Загрузка весов из blob (новый формат или старый float64).
+    
+    Несжатые веса не копируются: массив только для чтения смотрит в blob.
+    
+    Args:
+        blob: сериализованные веса
+        legacy_shape: форма весов старого формата без заголовка
+        
+    Returns:
+        массив весов в типе хранения
+    """
+    header = weights_format(blob)
+    if header is None:
+        return np.frombuffer(blob, dtype=np.float64).reshape(legacy_shape)
+    dtype, shape, compressed, offset = header
+    if compressed:
+        return np.frombuffer(zlib.decompress(blob[offset:]), dtype=dtype).reshape(shape)
+    return np.frombuffer(blob, dtype=dtype, offset=offset).reshape(shape)
 
 
 class EvolutionDB:
     """Управление базой данных эволюции."""
     
-    def __init__(self, db_path: str = 'evolution.db'):
+    def __init__(
+        self,
+        db_path: str = 'evolution.db',
+        flush_every: int = 10,
+        flush_interval: float = 5.0,
+        weights_dtype: str = 'float32',
+        weights_compress: bool = False,
+        read_only: bool = False
+    ):
         """
         Args:
             db_path: путь к файлу базы данных
+            flush_every: сбрасывать буфер записей каждые N поколений (1 - сразу)
+            flush_interval: сбрасывать буфер не реже чем раз в T секунд
+            weights_dtype: тип хранения весов змеек (float64 - без потерь)
+            weights_compress: сжимать веса змеек zlib
+            read_only: только чтение - база не создаётся и не мигрирует
+                       (sqlite3.OperationalError, если файла нет)
         """
         self.db_path = db_path
+        self.read_only = read_only
         self.conn = None
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.weights_dtype = weights_dtype
+        self.weights_compress = weights_compress
+        
+        # Буферы записей: пишутся одной транзакцией в flush()
+        self._pending_generations = []
+        self._pending_snakes = []
+        self._pending_profiles = []
+        self._last_flush = time.monotonic()
+        
         self.init_database()
     
     def init_database(self):
         """Инициализация схемы базы данных."""
+        if self.read_only:
+            # mode=ro: SQLite не создаёт файл и не даёт записывать
+            uri = pathlib.Path(self.db_path).absolute().as_uri() + '?mode=ro'
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         cursor = self.conn.cursor()
         
+        # synchronous действует на соединение, поэтому задаётся при каждом открытии
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        
+        # Схема актуальна: режим WAL уже записан в файл, таблицы и индексы есть
+        if self._schema_version(cursor) >= SCHEMA_VERSION:
+            return
+        
+        # WAL: запись не блокирует чтение (view_history), а с synchronous=NORMAL
+        # fsync делается на контрольных точках, а не на каждом коммите
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
+        # Миграции - одной транзакцией под блокировкой записи; версия читается
+        # повторно, если базу успел обновить другой процесс
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._schema_version(cursor)
+            for target, migrate in self.MIGRATIONS:
+                if version < target:
+                    migrate(self, cursor)
+            cursor.execute(f'PRAGMA user_version={max(version, SCHEMA_VERSION)}')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    @staticmethod
+    def _schema_version(cursor: sqlite3.Cursor) -> int:
+        """Версия схемы из PRAGMA user_version (0 - новая база или база до версий)."""
+        return cursor.execute('PRAGMA user_version').fetchone()[0]
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """Схема версии 1: сессии, поколения, лучшие змейки, профили."""
         # Таблица для сессий эволюции
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
@@ -69,12 +223,87 @@ class EvolutionDB:
             )
         ''')
         
+        # Таблица для профилирования поколений (--profile)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS generation_profiles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER,
+                generation INTEGER,
+                evaluate_time REAL,
+                sort_time REAL,
+                clone_time REAL,
+                mutate_time REAL,
+                total_time REAL,
+                steps INTEGER,
+                data TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES sessions(id)
+            )
+        ''')
+        
         # Индексы для ускорения запросов
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_id ON generations(session_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_gen ON generations(session_id, generation)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_best_session ON best_snakes(session_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_profile_session ON generation_profiles(session_id, generation)')
+    
+    def _add_session_stats(self, cursor: sqlite3.Cursor):
+        """
+        Схема версии 2: сводка по сессиям и покрывающие индексы.
         
-        self.conn.commit()
+        В generations добавляются шаги и время поколения, session_stats
+        обновляется при каждой записи поколений (см. flush) и заполняется
+        по уже записанной истории.
+        """
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(generations)')}
+        if 'steps' not in columns:
+            cursor.execute('ALTER TABLE generations ADD COLUMN steps INTEGER')
+        if 'seconds' not in columns:
+            cursor.execute('ALTER TABLE generations ADD COLUMN seconds REAL')
+        
+        # Сводка сессии: видна и у сессий, упавших до update_session
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_stats (
+                session_id INTEGER PRIMARY KEY,
+                best_fitness REAL,
+                last_generation INTEGER,
+                generations INTEGER DEFAULT 0,
+                total_steps INTEGER DEFAULT 0,
+                wall_time REAL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES sessions(id)
+            )
+        ''')
+        
+        # Хвост, диапазоны и интервалы истории читаются только из индекса
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_generations_history
+            ON generations(session_id, generation, best_fitness, avg_fitness)
+        ''')
+        cursor.execute('DROP INDEX IF EXISTS idx_session_id')
+        cursor.execute('DROP INDEX IF EXISTS idx_session_gen')
+        
+        # Список сессий (новые сверху) и топ змеек - первые строки индекса
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions(created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_best_fitness ON best_snakes(fitness)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_best_session_fitness ON best_snakes(session_id, fitness)')
+        cursor.execute('DROP INDEX IF EXISTS idx_best_session')
+        
+        cursor.execute('DELETE FROM session_stats')
+        cursor.execute('''
+            INSERT INTO session_stats
+            (session_id, best_fitness, last_generation, generations, total_steps, wall_time)
+            SELECT session_id, MAX(best_fitness), MAX(generation), COUNT(*),
+                   COALESCE(SUM(steps), 0), COALESCE(SUM(seconds), 0)
+            FROM generations
+            GROUP BY session_id
+        ''')
+    
+    # (версия схемы, миграция до неё) по возрастанию версии
+    MIGRATIONS = (
+        (1, _create_tables),
+        (2, _add_session_stats),
+    )
     
     def create_session(
         self,
@@ -108,15 +337,22 @@ class EvolutionDB:
         session_id: int,
         generation: int,
         best_fitness: float,
-        avg_fitness: float
+        avg_fitness: float,
+        steps: Optional[int] = None,
+        seconds: Optional[float] = None
     ):
-        """Сохранение данных поколения."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO generations (session_id, generation, best_fitness, avg_fitness)
-            VALUES (?, ?, ?, ?)
-        ''', (session_id, generation, best_fitness, avg_fitness))
-        self.conn.commit()
+        """
+        Сохранение данных поколения (через буфер, см. flush).
+        
+        Args:
+            steps: шагов (тиков) во всех партиях поколения
+            seconds: время поколения в секундах
+        """
+        self._pending_generations.append(
+            (session_id, generation, float(best_fitness), float(avg_fitness),
+             None if steps is None else int(steps), None if seconds is None else float(seconds))
+        )
+        self._maybe_flush()
     
     def save_best_snake(
         self,
@@ -125,14 +361,24 @@ class EvolutionDB:
         fitness: float,
         weights: np.ndarray
     ):
-        """Сохранение лучшей змейки."""
-        cursor = self.conn.cursor()
-        weights_bytes = weights.tobytes()
-        cursor.execute('''
-            INSERT INTO best_snakes (session_id, generation, fitness, weights)
-            VALUES (?, ?, ?, ?)
-        ''', (session_id, generation, fitness, weights_bytes))
-        self.conn.commit()
+        """Сохранение лучшей змейки (через буфер, см. flush)."""
+        weights_bytes = encode_weights(weights, self.weights_dtype, self.weights_compress)
+        self._pending_snakes.append((session_id, generation, float(fitness), weights_bytes))
+    
+    def save_profile(self, session_id: int, record: dict):
+        """
+        Сохранение записи профилирования поколения.
+        
+        Args:
+            session_id: ID сессии
+            record: запись GenerationProfiler.end (время фаз, шаги, длины партий, снимки)
+        """
+        phases = record['phases']
+        self._pending_profiles.append(
+            (session_id, record['generation'], phases.get('evaluate'), phases.get('sort'),
+             phases.get('clone'), phases.get('mutate'), record['total'],
+             record.get('steps'), json.dumps(record, ensure_ascii=False))
+        )
     
     def update_session(
         self,
@@ -140,15 +386,123 @@ class EvolutionDB:
         total_generations: int,
         best_fitness: float
     ):
-        """Обновление финальной статистики сессии."""
+        """Обновление финальной статистики сессии (вместе со сбросом буфера)."""
         cursor = self.conn.cursor()
         cursor.execute('''
             UPDATE sessions 
             SET total_generations = ?, best_fitness = ?
             WHERE id = ?
         ''', (total_generations, best_fitness, session_id))
+        self.flush()
+    
+    def truncate_session(self, session_id: int, generation: int):
+        """
+        Удаление записей сессии после поколения generation (продолжение с чекпоинта).
+        
+        Args:
+            session_id: ID сессии
+            generation: последнее сохранённое в чекпоинте поколение
+        """
+        self.flush()
+        cursor = self.conn.cursor()
+        for table in ('generations', 'best_snakes', 'generation_profiles'):
+            cursor.execute(f'DELETE FROM {table} WHERE session_id = ? AND generation > ?',
+                           (session_id, generation))
+        
+        # Сводка пересчитывается по оставшейся истории
+        cursor.execute('DELETE FROM session_stats WHERE session_id = ?', (session_id,))
+        cursor.execute('''
+            INSERT INTO session_stats
+            (session_id, best_fitness, last_generation, generations, total_steps, wall_time)
+            SELECT session_id, MAX(best_fitness), MAX(generation), COUNT(*),
+                   COALESCE(SUM(steps), 0), COALESCE(SUM(seconds), 0)
+            FROM generations
+            WHERE session_id = ?
+            GROUP BY session_id
+        ''', (session_id,))
+        self.conn.commit()
+    
+    def _maybe_flush(self):
+        """Сброс буфера, если накопилось flush_every поколений или прошло flush_interval секунд."""
+        if (len(self._pending_generations) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+    
+    def flush(self):
+        """Запись всех накопленных строк одной транзакцией."""
+        if self.conn is None:
+            return
+        # Буферы забираем до записи: повторный вызов из обработчика сигнала
+        # не запишет те же строки второй раз
+        generations, self._pending_generations = self._pending_generations, []
+        snakes, self._pending_snakes = self._pending_snakes, []
+        profiles, self._pending_profiles = self._pending_profiles, []
+        self._last_flush = time.monotonic()
+        
+        cursor = self.conn.cursor()
+        if generations:
+            cursor.executemany('''
+                INSERT INTO generations
+                (session_id, generation, best_fitness, avg_fitness, steps, seconds)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', generations)
+            self._update_session_stats(cursor, generations)
+        if snakes:
+            cursor.executemany('''
+                INSERT INTO best_snakes (session_id, generation, fitness, weights)
+                VALUES (?, ?, ?, ?)
+            ''', snakes)
+        if profiles:
+            cursor.executemany('''
+                INSERT INTO generation_profiles
+                (session_id, generation, evaluate_time, sort_time, clone_time,
+                 mutate_time, total_time, steps, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', profiles)
         self.conn.commit()
     
+    @staticmethod
+    def _update_session_stats(cursor: sqlite3.Cursor, generations: List[Tuple]):
+        """Добавление записанных строк поколений в сводку session_stats (одна строка на сессию)."""
+        totals = {}
+        for session_id, generation, best_fitness, _, steps, seconds in generations:
+            best, last, count, total_steps, wall_time = totals.get(
+                session_id, (best_fitness, generation, 0, 0, 0.0))
+            totals[session_id] = (max(best, best_fitness), max(last, generation), count + 1,
+                                  total_steps + (steps or 0), wall_time + (seconds or 0.0))
+        rows = [(session_id, *values) for session_id, values in totals.items()]
+        
+        # INSERT OR IGNORE + UPDATE вместо UPSERT: работает и со старыми SQLite
+        cursor.executemany('INSERT OR IGNORE INTO session_stats (session_id) VALUES (?)',
+                           [(row[0],) for row in rows])
+        cursor.executemany('''
+            UPDATE session_stats
+            SET best_fitness = COALESCE(MAX(best_fitness, ?2), ?2),
+                last_generation = COALESCE(MAX(last_generation, ?3), ?3),
+                generations = generations + ?4,
+                total_steps = total_steps + ?5,
+                wall_time = wall_time + ?6,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE session_id = ?1
+        ''', rows)
+    
+    def get_session_stats(self, session_id: int) -> Optional[Tuple]:
+        """
+        Сводка сессии, которая ведётся при записи поколений.
+        
+        Returns:
+            (best_fitness, last_generation, generations, total_steps, wall_time)
+            или None, если поколений ещё нет
+        """
+        self.flush()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT best_fitness, last_generation, generations, total_steps, wall_time
+            FROM session_stats
+            WHERE session_id = ?
+        ''', (session_id,))
+        return cursor.fetchone()
+    
     def get_best_snakes(self, session_id: Optional[int] = None, limit: int = 10) -> List[Tuple]:
         """
         Получить лучшие змейки.
@@ -160,6 +514,7 @@ class EvolutionDB:
         Returns:
             список кортежей (session_id, generation, fitness, weights)
         """
+        self.flush()  # Читаем вместе с ещё не записанными строками
         cursor = self.conn.cursor()
         if session_id:
             cursor.execute('''
@@ -179,35 +534,41 @@ class EvolutionDB:
         
         return cursor.fetchall()
     
-    def load_snake_weights(self, weights_bytes: bytes, input_size: int = 8, output_size: int = 4) -> np.ndarray:
+    @staticmethod
+    def load_snake_weights(weights_bytes: bytes, input_size: int = 8, output_size: int = 4) -> np.ndarray:
         """
-        Загрузка весов из базы данных.
+        Загрузка весов из базы данных (см. decode_weights).
         
         Args:
             weights_bytes: сериализованные веса
-            input_size: размер входа
-            output_size: размер выхода
+            input_size: размер входа (для старого формата без заголовка)
+            output_size: размер выхода (для старого формата без заголовка)
             
         Returns:
-            массив весов
+            массив весов (только для чтения, если веса не сжаты)
         """
-        weights = np.frombuffer(weights_bytes, dtype=np.float64)
-        return weights.reshape(input_size, output_size)
+        return decode_weights(weights_bytes, (input_size, output_size))
     
     def get_sessions(self, limit: int = 20) -> List[Tuple]:
         """
         Получить список сессий.
         
+        Поколения и лучший fitness берутся из сводки session_stats, поэтому
+        видны и у сессий, не дошедших до update_session.
+        
         Returns:
             список кортежей (id, created_at, total_generations, best_fitness, ...)
         """
+        self.flush()
         cursor = self.conn.cursor()
         cursor.execute('''
-            SELECT id, created_at, population_size, grid_size, elite_size,
-                   mutation_rate, mutation_strength, max_steps, 
-                   total_generations, best_fitness
-            FROM sessions
-            ORDER BY created_at DESC
+            SELECT s.id, s.created_at, s.population_size, s.grid_size, s.elite_size,
+                   s.mutation_rate, s.mutation_strength, s.max_steps,
+                   COALESCE(st.last_generation, s.total_generations),
+                   COALESCE(st.best_fitness, s.best_fitness)
+            FROM sessions s
+            LEFT JOIN session_stats st ON st.session_id = s.id
+            ORDER BY s.created_at DESC, s.id DESC
             LIMIT ?
         ''', (limit,))
         return cursor.fetchall()
@@ -216,22 +577,159 @@ class EvolutionDB:
         """
         Получить историю поколений сессии.
         
+        Вся история загружается в память; для длинных сессий -
+        iter_generation_history, get_generation_tail и get_generation_buckets.
+        
         Returns:
             список кортежей (generation, best_fitness, avg_fitness)
         """
+        return list(self.iter_generation_history(session_id))
+    
+    def iter_generation_history(
+        self,
+        session_id: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Tuple]:
+        """
+        Потоковое чтение истории поколений: в памяти не больше batch_size строк.
+        
+        Args:
+            session_id: ID сессии
+            start: первое поколение (None - с начала)
+            end: последнее поколение включительно (None - до конца)
+            batch_size: строк за одно чтение курсора
+            
+        Yields:
+            кортежи (generation, best_fitness, avg_fitness) по возрастанию поколения
+        """
+        self.flush()
+        # Отдельный курсор: запись через self.conn не сбивает чтение
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT generation, best_fitness, avg_fitness
+            FROM generations
+            WHERE session_id = ? AND generation >= ? AND generation <= ?
+            ORDER BY generation
+        ''', (session_id, *self._generation_bounds(start, end)))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def get_generation_tail(self, session_id: int, n: int = 20) -> List[Tuple]:
+        """
+        Последние n поколений сессии (по индексу, без чтения всей истории).
+        
+        Returns:
+            список кортежей (generation, best_fitness, avg_fitness) по возрастанию поколения
+        """
+        self.flush()
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT generation, best_fitness, avg_fitness
             FROM generations
             WHERE session_id = ?
+            ORDER BY generation DESC
+            LIMIT ?
+        ''', (session_id, n))
+        return cursor.fetchall()[::-1]
+    
+    def get_generation_range(
+        self,
+        session_id: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Первое и последнее поколение сессии в диапазоне (MIN/MAX по индексу).
+        
+        Returns:
+            (первое поколение, последнее поколение); (None, None) - записей нет
+        """
+        self.flush()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT MIN(generation), MAX(generation)
+            FROM generations
+            WHERE session_id = ? AND generation >= ? AND generation <= ?
+        ''', (session_id, *self._generation_bounds(start, end)))
+        return cursor.fetchone()
+    
+    def get_generation_buckets(
+        self,
+        session_id: int,
+        buckets: int = 50,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> List[Tuple]:
+        """
+        История поколений, сжатая в buckets интервалов равной длины.
+        
+        Агрегаты считает SQLite: в Python возвращается не больше buckets строк
+        при любой длине сессии.
+        
+        Args:
+            session_id: ID сессии
+            buckets: количество интервалов
+            start: первое поколение (None - с начала)
+            end: последнее поколение включительно (None - до конца)
+            
+        Returns:
+            список кортежей (первое поколение, последнее поколение, строк,
+            min best_fitness, max best_fitness, avg best_fitness, avg avg_fitness)
+        """
+        first, last = self.get_generation_range(session_id, start, end)
+        if first is None:
+            return []
+        span = last - first + 1
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT MIN(generation), MAX(generation), COUNT(*),
+                   MIN(best_fitness), MAX(best_fitness), AVG(best_fitness), AVG(avg_fitness)
+            FROM generations
+            WHERE session_id = ? AND generation >= ? AND generation <= ?
+            GROUP BY (generation - ?) * ? / ?
+            ORDER BY MIN(generation)
+        ''', (session_id, first, last, first, max(1, buckets), span))
+        return cursor.fetchall()
+    
+    @staticmethod
+    def _generation_bounds(start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        """Границы диапазона поколений для WHERE (None - без ограничения)."""
+        return (start if start is not None else -2 ** 63,
+                end if end is not None else 2 ** 63 - 1)
+    
+    def get_profiles(self, session_id: int) -> List[Tuple]:
+        """
+        Получить записи профилирования сессии.
+        
+        Returns:
+            список кортежей (generation, evaluate_time, sort_time, clone_time,
+            mutate_time, total_time, steps, data)
+        """
+        self.flush()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT generation, evaluate_time, sort_time, clone_time,
+                   mutate_time, total_time, steps, data
+            FROM generation_profiles
+            WHERE session_id = ?
             ORDER BY generation
         ''', (session_id,))
         return cursor.fetchall()
     
     def close(self):
-        """Закрытие соединения с базой данных."""
+        """Сброс буфера и закрытие соединения с базой данных."""
         if self.conn:
+            self.flush()
             self.conn.close()
+            self.conn = None
     
     def __del__(self):
         """Деструктор."""
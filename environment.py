@@ -5,19 +5,91 @@
 import random
 import time
 import numpy as np
-from typing import Tuple, List
-from snake import Snake
+from typing import Callable, Tuple, List, Optional
+from snake import Snake, TICKS_PER_SECOND
+
+
+class FreeCells:
+    """
+    Пул свободных клеток поля.
+    
+    Клетки лежат в массиве, а словарь хранит позицию каждой клетки в нём,
+    поэтому занятие, освобождение и выбор случайной клетки стоят O(1)
+    (удаление - перестановкой последнего элемента на место удалённого).
+    """
+    
+    def __init__(self, grid_size: int = 20):
+        """
+        Args:
+            grid_size: размер игрового поля
+        """
+        self.grid_size = grid_size
+        self.cells = []  # Свободные клетки в произвольном порядке
+        self.index = {}  # Клетка -> позиция в self.cells
+        self.reset(grid_size)
+    
+    def reset(self, grid_size: int, occupied: List[Tuple[int, int]] = ()):
+        """
+        Полное построение пула (один раз за партию).
+        
+        Args:
+            grid_size: размер игрового поля
+            occupied: занятые клетки
+        """
+        occupied = set(occupied)
+        self.grid_size = grid_size
+        self.cells = [
+            (x, y) for x in range(grid_size) for y in range(grid_size)
+            if (x, y) not in occupied
+        ]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+    
+    def occupy(self, cell: Tuple[int, int]):
+        """Клетка стала занятой."""
+        i = self.index.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.index[last] = i
+    
+    def release(self, cell: Tuple[int, int]):
+        """Клетка освободилась."""
+        if cell not in self.index:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+    
+    def sample(self, k: int, rng: random.Random) -> List[Tuple[int, int]]:
+        """
+        Выбрать до k разных случайных свободных клеток.
+        
+        Args:
+            k: количество клеток
+            rng: генератор случайных чисел
+        """
+        return rng.sample(self.cells, min(k, len(self.cells)))
+    
+    def __len__(self) -> int:
+        return len(self.cells)
+    
+    def __contains__(self, cell: Tuple[int, int]) -> bool:
+        return cell in self.index
 
 
 class Environment:
     """Игровая среда с едой и управлением."""
     
-    def __init__(self, grid_size: int = 20):
+    def __init__(self, grid_size: int = 20, clock: str = 'wall', ticks_per_second: int = TICKS_PER_SECOND):
         """
         Args:
             grid_size: размер игрового поля (grid_size x grid_size)
+            clock: часы для голода и fitness ('wall' - реальное время, 'ticks' - тики симуляции)
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
         """
         self.grid_size = grid_size
+        self.clock = clock
+        self.ticks_per_second = ticks_per_second
         self.food_positions = [(0, 0)]  # Список позиций еды
         self.generation = 0  # Текущее поколение для расчета сложности
         # Препятствия удалены - пустые списки для совместимости
@@ -25,6 +97,26 @@ class Environment:
         self.moving_walls = []
         self.poisons = []
         self.bonuses = []
+        # Собственные генераторы случайных чисел среды (еда и решения мозга),
+        # чтобы партию можно было воспроизвести по сиду независимо от процесса
+        self.random = random.Random()
+        self.np_random = np.random.default_rng()
+        # Свободные клетки поля, обновляются по ходам змейки
+        self.free_cells = FreeCells(grid_size)
+    
+    def seed(self, seed: Optional[int] = None):
+        """
+        Переинициализация генераторов случайных чисел среды.
+        
+        Args:
+            seed: сид партии (None - случайный)
+        """
+        self.random.seed(seed)
+        self.np_random = np.random.default_rng(seed)
+    
+    def num_food(self) -> int:
+        """Количество еды зависит от поколения: больше поколение = больше еды (1-3)."""
+        return max(1, min(3, 1 + self.generation // 50))
     
     def reset_walls(self):
         """Генерация стен отключена - препятствия убраны."""
@@ -32,28 +124,26 @@ class Environment:
         self.moving_walls = []
     
     def reset_food(self, occupied: List[Tuple[int, int]] = None, num_food: int = 1):
-        """Создание новой еды в случайных позициях."""
-        if occupied is None:
-            occupied = []
+        """
+        Создание новой еды в случайных позициях.
         
-        # Получаем свободные позиции (стены удалены)
-        free_positions = self.get_free_positions(occupied)
+        Args:
+            occupied: занятые клетки - пул свободных клеток строится заново;
+                      None - используется пул, который ведётся по ходам змейки
+        """
+        if occupied is not None or self.free_cells.grid_size != self.grid_size:
+            self.free_cells.reset(self.grid_size, occupied or ())
         
-        self.food_positions = []
-        # Количество еды зависит от поколения: больше поколение = больше еды
-        num_food = max(1, min(3, 1 + self.generation // 50))  # 1-3 еды
+        num_food = self.num_food()
         
-        for _ in range(min(num_food, len(free_positions))):
-            if free_positions:
-                pos = random.choice(free_positions)
-                self.food_positions.append(pos)
-                free_positions.remove(pos)  # Убираем, чтобы не дублировать
+        # Разные случайные свободные клетки (стены удалены)
+        self.food_positions = self.free_cells.sample(num_food, self.random)
         
         # Если нет свободных позиций, выбираем случайные
         if not self.food_positions:
             self.food_positions = [(
-                random.randint(0, self.grid_size - 1),
-                random.randint(0, self.grid_size - 1)
+                self.random.randint(0, self.grid_size - 1),
+                self.random.randint(0, self.grid_size - 1)
             )]
     
     def reset_poisons_and_bonuses(self, occupied: List[Tuple[int, int]] = None):
@@ -66,17 +156,26 @@ class Environment:
         """Возвращает ближайшую еду для совместимости со старым кодом."""
         return self.food_positions[0] if self.food_positions else (0, 0)
     
-    def play_game(self, snake: Snake, max_steps: int = 500) -> float:
+    def play_game(self, snake: Snake, max_steps: int = 500,
+                  on_step: Optional[Callable[[], None]] = None) -> float:
         """
         Запуск игры для змейки.
         
+        В режиме часов 'ticks' голод и штрафы считаются в тиках симуляции:
+        партия без еды длится не дольше 8 * ticks_per_second тиков
+        независимо от скорости машины.
+        
         Args:
             snake: змейка для игры
             max_steps: максимальное количество шагов
+            on_step: вызывается после расстановки еды и после каждого шага
+                     (запись повторов партии)
             
         Returns:
             финальный fitness змейки
         """
+        snake.clock = self.clock
+        snake.ticks_per_second = self.ticks_per_second
         snake.reset()
         # Препятствия удалены - только еда
         self.reset_walls()
@@ -87,6 +186,8 @@ class Environment:
         
         # Максимальный размер поля (для проверки победы)
         max_grid_size = self.grid_size * self.grid_size
+        if on_step is not None:
+            on_step()
         
         for step in range(max_steps):
             if not snake.alive:
@@ -108,12 +209,13 @@ class Environment:
             
             # Для совместимости увеличиваем steps_without_food (но проверка по времени)
             snake.steps_without_food += 1
+            snake.advance_clock()
             
             # Получение входных данных для мозга (без препятствий)
             inputs = snake.get_view(self.food_pos, walls=[])
             
             # Мозг принимает решение
-            action = snake.brain.think(inputs)
+            action = snake.brain.think(inputs, rng=self.np_random)
             
             # Движение (без препятствий)
             # Если движение неудачно, продолжаем цикл (голод уже увеличился)
@@ -123,6 +225,8 @@ class Environment:
             if not snake.alive:
                 break
             
+            self.free_cells.occupy(snake.get_head())
+            
             # Проверка поедания еды (несколько еды одновременно)
             head_pos = snake.get_head()
             food_eaten = False
@@ -132,12 +236,14 @@ class Environment:
                     self.food_positions.pop(i)
                     food_eaten = True
                     if len(self.food_positions) < 2:
-                        self.reset_food(occupied=snake.body)
+                        self.reset_food()
                     break
             
             # Удаление хвоста только если движение было успешным и еда не съедена
             if move_success and not food_eaten:
-                snake.remove_tail()
+                tail = snake.remove_tail()
+                if tail is not None:
+                    self.free_cells.release(tail)
             
             # Обновление fitness (даже если змейка не двигалась)
             snake.update_fitness()
@@ -148,6 +254,9 @@ class Environment:
                 dist_to_food = abs(head[0] - self.food_pos[0]) + abs(head[1] - self.food_pos[1])
                 # Уменьшенная награда за приближение (макс 5)
                 snake.fitness += 5.0 / (dist_to_food + 1)
+            
+            if on_step is not None:
+                on_step()
         
         return snake.get_fitness()
     
@@ -161,6 +270,7 @@ class Environment:
         Returns:
             список свободных позиций
         """
+        occupied = set(occupied)
         free = []
         for x in range(self.grid_size):
             for y in range(self.grid_size):
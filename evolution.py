@@ -2,10 +2,27 @@
 Эволюционный алгоритм для популяции змеек.
 """
 
+import time
 import numpy as np
-from typing import List, Tuple
-from snake import Snake
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
+from brain import Brain
+from snake import Snake, TICKS_PER_SECOND
 from environment import Environment
+from batch_environment import BatchEnvironment
+from population import Population
+
+
+def adaptive_grid_size(grid_size: int, generation: int) -> int:
+    """
+    Размер поля, на котором играет поколение: уменьшается с поколением
+    для усложнения (20 -> 18 -> 16 -> 14 -> 12).
+    
+    Args:
+        grid_size: начальный размер поля сессии
+        generation: номер поколения Evolution.generation во время evolve()
+    """
+    return max(12, grid_size - (generation // 50))
 
 
 class Evolution:
@@ -18,7 +35,17 @@ class Evolution:
         elite_size: int = 10,
         mutation_rate: float = 0.1,
         mutation_strength: float = 0.2,
-        max_steps: int = 500
+        max_steps: int = 500,
+        workers: int = 1,
+        engine: str = 'serial',
+        clock: str = 'wall',
+        ticks_per_second: int = TICKS_PER_SECOND,
+        eval_seed: Optional[int] = None,
+        fitness_cache: int = 0,
+        cache_mode: str = 'reuse',
+        episodes: int = 1,
+        racing: bool = False,
+        racing_keep: float = 0.5
     ):
         """
         Args:
@@ -28,6 +55,16 @@ class Evolution:
             mutation_rate: вероятность мутации
             mutation_strength: сила мутации
             max_steps: максимальное количество шагов в игре
+            workers: количество процессов для оценки (1 - без пула)
+            engine: движок оценки ('serial' - по одной змейке, 'batch' - вся популяция на NumPy)
+            clock: часы для голода и fitness ('wall' - реальное время, 'ticks' - тики симуляции)
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
+            eval_seed: один и тот же сид партий для всех змеек и поколений (None - случайные)
+            fitness_cache: размер кэша fitness (0 - без кэша; только для serial)
+            cache_mode: режим кэша ('reuse' - не переигрывать, 'average' - усреднять)
+            episodes: партий на змейку за поколение (fitness - среднее)
+            racing: отсеивать худших после первых партий (successive halving)
+            racing_keep: доля змеек, остающихся после каждого раунда отсева
         """
         self.population_size = population_size
         self.grid_size = grid_size
@@ -35,9 +72,33 @@ class Evolution:
         self.mutation_rate = mutation_rate
         self.mutation_strength = mutation_strength
         self.max_steps = max_steps
+        self.workers = workers
+        self._evaluator = None  # Пул процессов создаётся при первой оценке
+        self.engine = engine
+        self.clock = clock
+        self.ticks_per_second = ticks_per_second
+        self.eval_seed = eval_seed
+        self.episodes = max(1, episodes)
+        self.racing = racing
+        self.racing_keep = racing_keep
         
-        self.environment = Environment(grid_size)
-        self.population = [Snake(grid_size=grid_size) for _ in range(population_size)]
+        # Кэш fitness: партия - чистая функция весов, сида и параметров среды
+        # только в последовательной оценке (в пакетной змейки делят один ГСЧ)
+        self.fitness_cache = None
+        if fitness_cache > 0 and engine != 'batch':
+            from fitness_cache import FitnessCache
+            self.fitness_cache = FitnessCache(fitness_cache, cache_mode)
+        
+        self.environment = Environment(grid_size, clock, ticks_per_second)
+        self.batch_environment = (
+            BatchEnvironment(grid_size, clock, ticks_per_second) if engine == 'batch' else None
+        )
+        self.population = Population.random(
+            population_size, grid_size=grid_size, clock=clock, ticks_per_second=ticks_per_second
+        )
+        # Змейка для последовательной оценки: мозг переключается на строки весов популяции
+        self._eval_snake = Snake(brain=Brain.wrap(self.population.weights[0]), grid_size=grid_size,
+                                 clock=clock, ticks_per_second=ticks_per_second)
         
         self.generation = 0
         self.best_fitness_history = []
@@ -46,6 +107,40 @@ class Evolution:
         self.best_fitness_in_history = 0
         self.current_best_snake = None
         self.current_best_fitness = 0
+        self.game_lengths = None  # Длины партий (в тиках) последней оценки
+        self.episodes_played = None  # Сыграно партий каждой змейкой в последней оценке
+        self.eval_stats = {}  # Партии, бюджет и скорость последней оценки
+        
+        # Профилирование включается по запросу (enable_profiling / add_hook)
+        self.profiler = None
+        self.hooks: List[Callable[[Dict], None]] = []
+    
+    def enable_profiling(self, snapshot_every: int = 0, top: int = 10):
+        """
+        Включение замеров фаз поколения.
+        
+        Args:
+            snapshot_every: снимок cProfile/tracemalloc каждые N поколений (0 - без снимков)
+            top: сколько строк оставлять в снимках
+        """
+        from profiler import GenerationProfiler
+        self.profiler = GenerationProfiler(snapshot_every, top)
+    
+    def add_hook(self, hook: Callable[[Dict], None]):
+        """
+        Подписка на записи профилирования: hook(record) вызывается после каждого поколения.
+        
+        Если профилирование ещё не включено, оно включается без снимков.
+        """
+        if self.profiler is None:
+            self.enable_profiling()
+        self.hooks.append(hook)
+    
+    def _phase(self, name: str):
+        """Замер фазы поколения (пустой контекст без профилировщика)."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
     
     def evaluate_generation(self) -> List[float]:
         """
@@ -54,16 +149,19 @@ class Evolution:
         Returns:
             список fitness для каждой особи
         """
+        start = time.perf_counter()
+        
         # Адаптивный размер поля: уменьшается с поколением для усложнения
-        # 20 -> 18 -> 16 -> 14 -> 12
-        adaptive_grid = max(12, self.grid_size - (self.generation // 50))
+        adaptive_grid = adaptive_grid_size(self.grid_size, self.generation)
         if adaptive_grid != self.environment.grid_size:
             # Меняем размер поля
             self.environment.grid_size = adaptive_grid
-            for snake in self.population:
-                snake.grid_size = adaptive_grid
-        
-        fitness_scores = []
+        self.population.grid_size = adaptive_grid
+        self._eval_snake.grid_size = adaptive_grid
+        self.environment.generation = self.generation
+        if self.batch_environment is not None:
+            self.batch_environment.grid_size = adaptive_grid
+            self.batch_environment.generation = self.generation
         
         # Используем max_steps без уменьшения (нужно для заполнения всего поля)
         # Расчет: поле 20x20 = 400 клеток, начальная длина = 3
@@ -72,62 +170,247 @@ class Evolution:
         # Для гарантии победы: 100000 шагов более чем достаточно
         dynamic_steps = self.max_steps
         
-        for snake in self.population:
-            fitness = self.environment.play_game(snake, dynamic_steps)
-            fitness_scores.append(fitness)
+        size = len(self.population)
+        rows = np.arange(size)
+        if self.episodes > 1:
+            fitness_scores = self._evaluate_episodes(adaptive_grid, dynamic_steps)
+        elif self.engine == 'batch':
+            # Вся популяция играет синхронно - один сид на поколение
+            if self.eval_seed is not None:
+                seed = self.eval_seed
+            else:
+                seed = np.random.randint(0, 2**31 - 1)
+            fitness_scores, self.game_lengths = self._play_batch(rows, seed, dynamic_steps)
+            self.episodes_played = np.ones(size, dtype=np.int64)
+        else:
+            # Сиды партий берутся из глобального ГСЧ, поэтому последовательный
+            # и параллельный режимы дают одинаковый результат при фиксированном сиде
+            if self.eval_seed is not None:
+                seeds = np.full(size, self.eval_seed, dtype=np.int64)
+            else:
+                seeds = np.random.randint(0, 2**31 - 1, size=size)
+            fitness_scores, self.game_lengths = self._evaluate_rows(rows, seeds, adaptive_grid, dynamic_steps)
+            self.episodes_played = np.ones(size, dtype=np.int64)
         
-        return fitness_scores
+        # Эффективные оценки: особи, оценённые по episodes партиям, в секунду
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        played = int(self.episodes_played.sum())
+        self.eval_stats = {
+            'episodes': played,
+            'budget': size * self.episodes,
+            'seconds': elapsed,
+            'episodes_per_sec': played / elapsed,
+            'effective_evals_per_sec': size / elapsed,
+        }
+        return list(fitness_scores)
     
-    def evolve(self):
-        """Провести один цикл эволюции."""
-        # Обновляем поколение в окружении для генерации стен
-        self.environment.generation = self.generation
+    def _evaluate_episodes(self, grid_size: int, max_steps: int) -> np.ndarray:
+        """
+        Оценка по нескольким партиям с общими сидами.
         
-        # Оценка текущей популяции
-        fitness_scores = self.evaluate_generation()
+        В движке serial партия k каждой змейки играется с одним и тем же сидом
+        (своя среда на партию), поэтому разница fitness отражает разницу мозгов,
+        а не удачу с едой. В движке batch змейки делят один генератор, и порядок
+        выборок зависит от того, кто ещё жив: партия k для разных змеек -
+        разные игры, сравнение не парное (main.py предупреждает об этом). С racing партии
+        идут раундами (1, 1, 2, 4, ...) и после каждого раунда остаётся только
+        доля racing_keep лучших по среднему, но не меньше размера элиты.
+        
+        Returns:
+            средний fitness по сыгранным партиям
+        """
+        size = len(self.population)
+        if self.eval_seed is not None:
+            episode_seeds = self.eval_seed + np.arange(self.episodes)
+        else:
+            episode_seeds = np.random.randint(0, 2**31 - 1, size=self.episodes)
+        
+        totals = np.zeros(size)
+        counts = np.zeros(size, dtype=np.int64)
+        lengths = np.zeros(size, dtype=np.int64)
+        alive = np.arange(size)
+        done = 0
+        block = 1 if self.racing else self.episodes
+        
+        while done < self.episodes:
+            n = min(block, self.episodes - done)
+            for seed in episode_seeds[done:done + n]:
+                if self.engine == 'batch':
+                    fitness, ticks = self._play_batch(alive, seed, max_steps)
+                else:
+                    seeds = np.full(len(alive), seed, dtype=np.int64)
+                    fitness, ticks = self._evaluate_rows(alive, seeds, grid_size, max_steps)
+                totals[alive] += fitness
+                counts[alive] += 1
+                lengths[alive] += ticks
+            done += n
+            
+            # Отсев: дальше играют только лучшие по среднему
+            if self.racing and done < self.episodes:
+                keep = max(self.elite_size, int(np.ceil(len(alive) * self.racing_keep)))
+                if keep < len(alive):
+                    means = totals[alive] / counts[alive]
+                    alive = alive[np.argsort(means)[::-1][:keep]]
+                # Каждый раунд удваивает число сыгранных выжившими партий
+                block = done
+        
+        self.episodes_played = counts
+        self.game_lengths = lengths
+        return totals / counts
+    
+    def _play_batch(self, rows: np.ndarray, seed: int, max_steps: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Партия пакетного движка для особей rows с одним сидом.
+        
+        Returns:
+            (fitness, длины партий в тиках)
+        """
+        self.batch_environment.seed(int(seed))
+        fitness = self.batch_environment.play_population(self.population.weights[rows], max_steps)
+        return fitness, self.batch_environment.ticks.copy()
+    
+    def _evaluate_rows(self, rows: np.ndarray, seeds: np.ndarray, grid_size: int,
+                       max_steps: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Партии особей rows с сидами seeds через кэш fitness (если он включён).
+        
+        Returns:
+            (fitness, длины партий в тиках; у взятых из кэша - 0)
+        """
+        weights = self.population.weights[rows]
+        cache = self.fitness_cache
+        if cache is None:
+            fitness, lengths = self._play(weights, seeds, grid_size, max_steps)
+            return np.asarray(fitness, dtype=np.float64), lengths
         
-        # Статистика
-        best_fitness = max(fitness_scores)
-        avg_fitness = np.mean(fitness_scores)
-        self.best_fitness_history.append(best_fitness)
-        self.avg_fitness_history.append(avg_fitness)
+        # Параметры среды, от которых зависит результат партии
+        context = (grid_size, self.environment.num_food(), max_steps,
+                   self.clock, self.ticks_per_second)
+        keys = [cache.key(w, seed, context) for w, seed in zip(weights, seeds)]
         
-        # Сортировка по fitness
-        sorted_indices = np.argsort(fitness_scores)[::-1]
+        fitness_scores = np.zeros(len(keys))
+        todo = []
+        for i, key in enumerate(keys):
+            cached = cache.get(key) if cache.mode == 'reuse' else None
+            if cached is None:
+                todo.append(i)
+            else:
+                fitness_scores[i] = cached
         
-        # Сохраняем лучшую змейку и её fitness
-        # Клонируем ДО создания нового поколения, т.к. после clone() мозг будет в чистом состоянии
-        if best_fitness > self.best_fitness_in_history:
-            self.best_snake = self.population[sorted_indices[0]].clone()
-            self.best_fitness_in_history = best_fitness
+        # Играются только партии, которых нет в кэше
+        lengths = np.zeros(len(keys), dtype=np.int64)
+        if todo:
+            played, played_lengths = self._play(weights[todo], seeds[todo], grid_size, max_steps)
+            lengths[todo] = played_lengths
+            for i, fitness in zip(todo, played):
+                fitness_scores[i] = cache.put(keys[i], fitness)
+        
+        return fitness_scores, lengths
+    
+    def _play(self, weights: np.ndarray, seeds: np.ndarray, grid_size: int,
+              max_steps: int) -> Tuple[List[float], np.ndarray]:
+        """
+        Партии змеек с весами weights (последовательно или в пуле процессов).
+        
+        Returns:
+            (список fitness, длины партий в тиках)
+        """
+        if self.workers > 1:
+            if self._evaluator is None:
+                from parallel import ParallelEvaluator
+                self._evaluator = ParallelEvaluator(self.workers, self.clock, self.ticks_per_second)
+            fitness_scores = self._evaluator.evaluate(
+                weights, seeds, grid_size, self.generation, max_steps
+            )
+            return fitness_scores, self._evaluator.game_lengths
         
-        # Сохраняем текущего лучшего для последующего сохранения в БД
-        self.current_best_snake = self.population[sorted_indices[0]]
-        self.current_best_fitness = best_fitness
+        fitness_scores = []
+        game_lengths = np.zeros(len(weights), dtype=np.int64)
+        snake = self._eval_snake
+        for i, seed in enumerate(seeds):
+            snake.brain.weights = weights[i]
+            self.environment.seed(int(seed))
+            fitness = self.environment.play_game(snake, max_steps)
+            fitness_scores.append(fitness)
+            game_lengths[i] = snake.ticks
         
-        # Элита (лучшие особи)
-        elite = [self.population[i] for i in sorted_indices[:self.elite_size]]
+        return fitness_scores, game_lengths
+    
+    def evolve(self):
+        """Провести один цикл эволюции."""
+        profiler = self.profiler
+        if profiler is not None:
+            # Номер поколения как в выводе main и в БД (после evolve)
+            profiler.begin(self.generation + 1)
         
-        # Создание нового поколения
-        new_population = []
+        # Обновляем поколение в окружении для генерации стен
+        self.environment.generation = self.generation
         
-        # Сохраняем элиту без мутаций (частично)
-        for snake in elite[:self.elite_size // 2]:
-            new_population.append(snake.clone())
+        # Оценка текущей популяции
+        with self._phase('evaluate'):
+            fitness_scores = self.evaluate_generation()
         
-        # Создаём потомков с мутациями
-        while len(new_population) < self.population_size:
-            # Выбор случайного родителя из элиты
-            parent = np.random.choice(elite)
+        with self._phase('sort'):
+            # Сортировка по fitness (с racing - сначала по числу сыгранных
+            # партий, чтобы отсеянные не попали в элиту за счёт одной удачной партии)
+            if self.racing and self.episodes > 1:
+                sorted_indices = np.lexsort((fitness_scores, self.episodes_played))[::-1]
+            else:
+                sorted_indices = np.argsort(fitness_scores)[::-1]
+            
+            # Статистика: лучший - та же змейка, чьи веса сохраняются
+            # (с racing - лучшая из сыгравших все партии, а не отсеянная)
+            best_fitness = fitness_scores[sorted_indices[0]]
+            avg_fitness = np.mean(fitness_scores)
+            self.best_fitness_history.append(best_fitness)
+            self.avg_fitness_history.append(avg_fitness)
             
-            # Клонирование и мутация
-            child = parent.clone()
-            child.brain = parent.brain.mutate(self.mutation_rate, self.mutation_strength)
-            new_population.append(child)
+            # Сохраняем лучшую змейку и её fitness
+            # Копируем веса ДО создания нового поколения
+            population = self.population
+            population.fitness = np.asarray(fitness_scores, dtype=np.float64)
+            best = sorted_indices[0]
+            if best_fitness > self.best_fitness_in_history:
+                self.best_snake = population.snake(best).clone()
+                self.best_fitness_in_history = best_fitness
+            
+            # Сохраняем текущего лучшего для последующего сохранения в БД
+            # (вид на веса старой популяции, она больше не меняется)
+            self.current_best_snake = population.snake(best)
+            self.current_best_fitness = best_fitness
+            
+            # Элита (индексы лучших особей)
+            elite = sorted_indices[:self.elite_size]
+        
+        # Создание нового поколения: родители выбираются индексами,
+        # веса копируются одним fancy indexing
+        n_passthrough = self.elite_size // 2
+        with self._phase('clone'):
+            # Сохраняем элиту без мутаций (частично), остальным - случайный родитель из элиты
+            n_children = max(0, self.population_size - n_passthrough)
+            choices = np.random.randint(0, len(elite), size=n_children)
+            parents = np.concatenate([elite[:n_passthrough], elite[choices]]).astype(np.int64)
+            new_population = population.select(parents)
+            new_population.born[n_passthrough:] = self.generation + 1
+        
+        # Мутации потомков
+        with self._phase('mutate'):
+            new_population.mutate(slice(n_passthrough, None),
+                                  self.mutation_rate, self.mutation_strength)
         
         self.population = new_population
         self.generation += 1
         
+        if profiler is not None:
+            record = profiler.end(self.game_lengths)
+            record['best_fitness'] = float(best_fitness)
+            record['avg_fitness'] = float(avg_fitness)
+            record['evaluation'] = dict(self.eval_stats)
+            if self.fitness_cache is not None:
+                record['cache'] = self.fitness_cache.stats()
+            for hook in self.hooks:
+                hook(record)
+        
         return best_fitness, avg_fitness
     
     def get_stats(self) -> Tuple[int, float, float]:
@@ -147,5 +430,64 @@ class Evolution:
         """Получить лучшую змейку текущего поколения."""
         if self.best_snake is None:
             # Если ещё не оценено, возвращаем случайную
-            return self.population[0]
+            return self.population.snake(0)
         return self.best_snake
+    
+    def get_state(self) -> Dict:
+        """
+        Состояние эволюции для чекпоинта (без ГСЧ).
+        
+        Returns:
+            словарь: веса популяции одним массивом (P, 8, 4), истории fitness,
+            веса лучшей змейки и параметры
+        """
+        return {
+            'weights': self.population.weights,
+            'best_fitness_history': np.asarray(self.best_fitness_history, dtype=np.float64),
+            'avg_fitness_history': np.asarray(self.avg_fitness_history, dtype=np.float64),
+            'best_weights': self.best_snake.brain.weights if self.best_snake is not None else None,
+            'meta': {
+                'generation': self.generation,
+                'population_size': len(self.population),
+                'grid_size': self.grid_size,
+                'adaptive_grid': self.environment.grid_size,
+                'elite_size': self.elite_size,
+                'mutation_rate': self.mutation_rate,
+                'mutation_strength': self.mutation_strength,
+                'max_steps': self.max_steps,
+                'best_fitness_in_history': float(self.best_fitness_in_history),
+            },
+        }
+    
+    def set_state(self, state: Dict):
+        """
+        Восстановление состояния из get_state: популяция, поколение и истории.
+        
+        Параметры мутации и max_steps остаются текущими (их можно менять при продолжении).
+        """
+        meta = state['meta']
+        adaptive_grid = meta['adaptive_grid']
+        
+        self.grid_size = meta['grid_size']
+        self.generation = meta['generation']
+        self.environment.grid_size = adaptive_grid
+        self.population = Population(np.array(state['weights'], dtype=np.float64), adaptive_grid,
+                                     self.clock, self.ticks_per_second)
+        self.population_size = len(self.population)
+        self._eval_snake.grid_size = adaptive_grid
+        
+        self.best_fitness_history = [float(x) for x in state['best_fitness_history']]
+        self.avg_fitness_history = [float(x) for x in state['avg_fitness_history']]
+        self.best_fitness_in_history = meta['best_fitness_in_history']
+        self.best_snake = None
+        if state.get('best_weights') is not None:
+            self.best_snake = Snake(brain=Brain(weights=state['best_weights']), grid_size=adaptive_grid,
+                                    clock=self.clock, ticks_per_second=self.ticks_per_second)
+        self.current_best_snake = None
+        self.current_best_fitness = 0
+    
+    def close(self):
+        """Освобождение ресурсов (пул процессов)."""
+        if self._evaluator is not None:
+            self._evaluator.close()
+            self._evaluator = None
@@ -0,0 +1,111 @@
+"""
+Кэш fitness для геномов, которые переходят в следующее поколение без изменений.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+CACHE_MODES = ('reuse', 'average')
+
+
+class FitnessCache:
+    """
+    LRU-кэш fitness по хешу весов и параметрам партии.
+
+    Режимы:
+        reuse   - партия с тем же сидом не переигрывается (fitness детерминирован
+                  при фиксированном сиде и часах 'ticks');
+        average - каждая партия играется, а fitness генома усредняется по всем
+                  его партиям (сид в ключ не входит) - для шумного fitness.
+    """
+
+    def __init__(self, max_size: int = 10000, mode: str = 'reuse'):
+        """
+        Args:
+            max_size: максимальное количество записей (старые вытесняются)
+            mode: 'reuse' или 'average'
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Неизвестный режим кэша: {mode}")
+        self.max_size = max_size
+        self.mode = mode
+        self.entries = OrderedDict()  # ключ -> (сумма fitness, количество партий)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def weights_digest(weights: np.ndarray) -> bytes:
+        """Хеш весов одного мозга."""
+        return hashlib.blake2b(np.ascontiguousarray(weights).tobytes(), digest_size=16).digest()
+
+    def key(self, weights: np.ndarray, seed: int, context: Tuple) -> Tuple:
+        """
+        Ключ записи.
+
+        Args:
+            weights: веса мозга
+            seed: сид партии (в режиме 'average' не учитывается)
+            context: параметры среды (размер поля, количество еды, max_steps, часы)
+        """
+        digest = self.weights_digest(weights)
+        if self.mode == 'average':
+            return (digest,) + tuple(context)
+        return (digest, int(seed)) + tuple(context)
+
+    def get(self, key: Tuple) -> Optional[float]:
+        """
+        Fitness из кэша (режим 'reuse').
+
+        Returns:
+            сохранённый fitness или None, если партию нужно сыграть
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0] / entry[1]
+
+    def put(self, key: Tuple, fitness: float) -> float:
+        """
+        Запись результата партии.
+
+        Returns:
+            fitness для отбора: сам результат ('reuse') или среднее
+            по всем партиям генома ('average')
+        """
+        entry = self.entries.pop(key, None)
+        if self.mode == 'average':
+            if entry is None:
+                self.misses += 1
+                entry = (0.0, 0)
+            else:
+                self.hits += 1
+            entry = (entry[0] + fitness, entry[1] + 1)
+        else:
+            entry = (fitness, 1)
+
+        self.entries[key] = entry
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return entry[0] / entry[1]
+
+    def stats(self) -> Dict:
+        """Счётчики попаданий и размер кэша."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def clear(self):
+        """Очистка кэша и счётчиков."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -3,17 +3,29 @@
 """
 
 import argparse
+import os
+import random
 import signal
 import sys
-from evolution import Evolution
-from database import EvolutionDB
-import numpy as np
+import threading
+import time
+from startup import StartupProfile
 
 # Глобальные переменные для обработчика сигналов
 db = None
 session_id = None
 evolution = None
 finalized = False
+checkpoint_file = None     # Путь к чекпоинту текущей сессии (None - без чекпоинтов)
+generation_lock = threading.Lock()  # Занят на время evolve() и записи его результатов
+stop_training = threading.Event()   # Запрос остановки цикла эволюции
+
+
+def resume_hint() -> str:
+    """Аргумент, которым продолжается текущий запуск с чекпоинта."""
+    if session_id:
+        return f'--continue {session_id}'
+    return f'--resume {checkpoint_file}'
 
 
 def signal_handler(sig, frame):
@@ -23,6 +35,20 @@ def signal_handler(sig, frame):
         sys.exit(0)
     finalized = True
     
+    # Новое поколение не начнётся; если поколение уже идёт (в этом или
+    # в фоновом потоке), замок занят и чекпоинт остаётся предыдущим
+    stop_training.set()
+    between_generations = generation_lock.acquire(blocking=False)
+    
+    # Чекпоинт пишется только между поколениями, иначе остаётся предыдущий
+    if checkpoint_file and evolution:
+        if not between_generations:
+            print(f"\n⚠️  Прерывание посреди поколения: продолжение с последнего чекпоинта ({checkpoint_file})")
+        else:
+            from checkpoint import save_checkpoint
+            save_checkpoint(evolution, checkpoint_file, session_id)
+            print(f"\n✓ Чекпоинт сохранён: {checkpoint_file} (продолжить: {resume_hint()})")
+    
     if db and session_id and evolution:
         print("\n⚠️  Получен сигнал прерывания. Сохранение прогресса...")
         db.update_session(
@@ -32,17 +58,107 @@ def signal_handler(sig, frame):
         )
         print(f"✓ Сессия #{session_id} сохранена: поколение {evolution.generation}, fitness {evolution.best_fitness_in_history:.1f}")
     
+    # Очередь и буфер записей БД дописываются при любом прерывании
+    if db:
+        db.close()
+    
+    if evolution:
+        evolution.close()
+    
     sys.exit(0)
 
 
-def main():
-    """Основная функция."""
-    global db, session_id, evolution
+def train(args, profile_records: list, slot=None) -> bool:
+    """
+    Цикл эволюции до победы или запроса остановки.
     
-    # Регистрируем обработчик сигнала для корректного завершения
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    Args:
+        args: аргументы командной строки
+        profile_records: записи профилирования для вывода после строки статистики
+        slot: SnapshotSlot для визуализатора (None - без публикации снимков)
+    
+    Returns:
+        True, если лучшая змейка заполнила поле
+    """
+    if args.profile:
+        from profiler import print_profile
+    
+    victory_achieved = False
+    gen = 0
+    
+    while not victory_achieved:
+        with generation_lock:
+            if stop_training.is_set():
+                break
+            started = time.perf_counter()
+            best_fit, avg_fit = evolution.evolve()
+            generation_time = time.perf_counter() - started
+            gen += 1
+            
+            if checkpoint_file and evolution.generation % args.checkpoint_every == 0:
+                from checkpoint import save_checkpoint
+                save_checkpoint(evolution, checkpoint_file, session_id)
+            
+            # Сохранение в БД
+            if db and session_id:
+                steps = None
+                if evolution.game_lengths is not None:
+                    steps = int(evolution.game_lengths.sum())
+                db.save_generation(session_id, evolution.generation, best_fit, avg_fit,
+                                   steps=steps, seconds=generation_time)
+                # Сохраняем лучшую змейку раз в --save-best-every поколений
+                if (args.save_best_every > 0 and hasattr(evolution, 'current_best_snake')
+                        and evolution.generation % args.save_best_every == 0):
+                    db.save_best_snake(
+                        session_id, 
+                        evolution.generation, 
+                        best_fit,
+                        evolution.current_best_snake.brain.weights
+                    )
+            
+            # Снимок для визуализатора: UI подхватит его, когда будет готов
+            if slot is not None:
+                slot.publish(evolution)
+        
+        # Вывод статистики
+        line = (f"Поколение {evolution.generation:4d} | "
+                f"Лучший: {best_fit:6.1f} | "
+                f"Средний: {avg_fit:6.1f}")
+        if evolution.episodes > 1:
+            eval_stats = evolution.eval_stats
+            line += (f" | Партии: {eval_stats['episodes']}/{eval_stats['budget']}"
+                     f" ({eval_stats['effective_evals_per_sec']:,.0f} оценок/с)")
+        if evolution.fitness_cache:
+            cache_stats = evolution.fitness_cache.stats()
+            line += f" | Кэш: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']})"
+        print(line)
+        while profile_records:
+            print_profile(profile_records.pop(0))
+        
+        # Проверка победы: если лучшая змейка заполнила поле
+        if best_fit >= 10000.0:
+            victory_achieved = True
+            print("\n" + "=" * 60)
+            print("🎉 ПОБЕДА! ЗМЕЙКА ЗАПОЛНИЛА ВСЁ ПОЛЕ! 🎉")
+            print("=" * 60)
+            print(f"Поколение победы: {evolution.generation}")
+            print(f"Fitness победителя: {best_fit:.1f}")
+        
+        # Сохранение лучшей змейки периодически
+        if gen % 50 == 0:
+            print(f"✓ Поколение {gen} завершено (эволюция продолжается...)")
+        
+        # Ограничение по поколениям (если указано, но только как предупреждение)
+        if args.gens > 0 and gen >= args.gens and not victory_achieved:
+            print(f"\n⚠️  Достигнут лимит поколений ({args.gens}), но победа ещё не достигнута.")
+            print("Эволюция продолжается до победы...")
+            print("(Нажмите Ctrl+C для остановки)")
     
+    return victory_achieved
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбор аргументов командной строки."""
     parser = argparse.ArgumentParser(description='Эволюционная змейка')
     parser.add_argument('--pop', type=int, default=100, help='Размер популяции')
     parser.add_argument('--gens', type=int, default=500, help='Количество поколений')
@@ -53,31 +169,130 @@ def main():
     parser.add_argument('--max-steps', type=int, default=100000, help='Макс. шагов в игре (для победы нужно ~400-5000)')
     parser.add_argument('--visualize', action='store_true', help='Включить визуализацию')
     parser.add_argument('--auto', action='store_true', help='Автоматический режим')
+    parser.add_argument('--ff', type=int, default=None, metavar='N',
+                       help='Перемотка демо: рисовать каждый N-й шаг (клавиша F включает/выключает)')
     parser.add_argument('--db', default='evolution.db', help='Путь к базе данных')
     parser.add_argument('--no-db', action='store_true', help='Отключить сохранение в БД')
-    parser.add_argument('--continue', type=int, metavar='SESSION_ID', dest='continue_session',
-                       help='Продолжить с лучшей змейкой из сессии SESSION_ID')
+    parser.add_argument('--db-flush-every', type=int, default=10, metavar='N',
+                       help='Записывать поколения в БД пачкой раз в N поколений')
+    parser.add_argument('--db-flush-interval', type=float, default=5.0, metavar='SEC',
+                       help='Записывать буфер БД не реже чем раз в SEC секунд')
+    parser.add_argument('--db-queue', type=int, default=256, metavar='N',
+                       help='Размер очереди фоновой записи в БД (при переполнении эволюция ждёт)')
+    parser.add_argument('--save-best-every', type=int, default=10, metavar='N',
+                       help='Сохранять лучшую змейку поколения в БД каждые N поколений (0 - не сохранять)')
+    parser.add_argument('--weights-dtype', choices=['float16', 'float32', 'float64'], default='float32',
+                       help='Тип хранения весов змеек в БД (float64 - без потерь)')
+    parser.add_argument('--weights-zlib', action='store_true',
+                       help='Сжимать веса змеек в БД zlib')
+    resume = parser.add_mutually_exclusive_group()
+    resume.add_argument('--continue', type=int, metavar='SESSION_ID', dest='continue_session',
+                        help='Продолжить сессию SESSION_ID (с чекпоинта, иначе с её лучшей змейкой)')
+    resume.add_argument('--resume', metavar='FILE',
+                        help='Продолжить с файла чекпоинта (в том числе запуск с --no-db)')
+    parser.add_argument('--checkpoint-every', type=int, default=0, metavar='N',
+                       help='Чекпоинт всей популяции каждые N поколений (0 - отключить)')
+    parser.add_argument('--checkpoint-dir', default='checkpoints',
+                       help='Папка для чекпоинтов')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Количество процессов для оценки популяции')
+    parser.add_argument('--engine', choices=['serial', 'batch'], default='serial',
+                       help='Движок оценки: serial - по одной змейке, batch - вся популяция на NumPy')
+    parser.add_argument('--clock', choices=['wall', 'ticks'], default='wall',
+                       help='Часы голода: wall - реальное время, ticks - тики симуляции (воспроизводимо)')
+    parser.add_argument('--ticks-per-second', type=int, default=25,
+                       help='Тиков симуляции в одной секунде голода (для --clock ticks)')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Сид генераторов случайных чисел (для воспроизводимости)')
+    parser.add_argument('--eval-seed', type=int, default=None,
+                       help='Один сид партий для всех змеек и поколений (детерминированный fitness)')
+    parser.add_argument('--fitness-cache', type=int, default=0, metavar='N',
+                       help='Кэш fitness на N геномов: элита без мутаций не переигрывается (0 - выкл.)')
+    parser.add_argument('--cache-mode', choices=['reuse', 'average'], default='reuse',
+                       help='reuse - брать fitness из кэша, average - усреднять по всем партиям генома')
+    parser.add_argument('--episodes', type=int, default=1, metavar='K',
+                       help='Партий на змейку за поколение с общими сидами (fitness - среднее)')
+    parser.add_argument('--racing', action='store_true',
+                       help='Отсеивать худших после первых партий (successive halving, с --episodes)')
+    parser.add_argument('--racing-keep', type=float, default=0.5,
+                       help='Доля змеек, остающихся после каждого раунда отсева')
+    parser.add_argument('--profile', action='store_true',
+                       help='Замеры фаз поколения, шагов и длин партий (вывод в консоль и в БД)')
+    parser.add_argument('--profile-every', type=int, default=0, metavar='N',
+                       help='Снимок cProfile/tracemalloc каждые N поколений (с --profile)')
+    parser.add_argument('--startup-profile', action='store_true',
+                       help='Время фаз запуска и загружаемые в них пакеты (перед обучением)')
+    parser.add_argument('--startup-target', type=float, default=None, metavar='MS',
+                       help='Целевое время старта для --startup-profile, мс')
     
-    args = parser.parse_args()
+    return parser.parse_args()
+
+
+def main():
+    """Основная функция."""
+    global db, session_id, evolution, checkpoint_file
+    
+    # Регистрируем обработчик сигнала для корректного завершения
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    # Тяжёлые модули (NumPy, SQLite, pygame) импортируются после разбора
+    # аргументов и только для включённых режимов
+    profile = StartupProfile()
+    with profile.phase('аргументы'):
+        args = parse_args()
+    
+    with profile.phase('импорт evolution'):
+        import numpy as np
+        from evolution import Evolution
+        from checkpoint import checkpoint_path, checkpoint_session, restore_checkpoint, save_checkpoint
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+    
+    # Чекпоинт продолжаемой сессии: полная популяция вместо одной змейки
+    resume_file = None
+    resume_session = args.continue_session
+    if args.resume:
+        if not os.path.exists(args.resume):
+            print(f"❌ Чекпоинт не найден: {args.resume}")
+            sys.exit(1)
+        resume_file = args.resume
+        resume_session = checkpoint_session(resume_file)
+    elif args.continue_session:
+        path = checkpoint_path(args.checkpoint_dir, args.continue_session)
+        if os.path.exists(path):
+            resume_file = path
     
     # Инициализация базы данных (создается автоматически если не существует)
     if not args.no_db:
         try:
             # Создаем БД если её нет
-            import os
             if not os.path.exists(args.db):
                 print(f"💾 Создание базы данных: {args.db}")
             
-            db = EvolutionDB(args.db)
-            session_id = db.create_session(
-                population_size=args.pop,
-                grid_size=args.grid,
-                elite_size=args.elite,
-                mutation_rate=args.mutation_rate,
-                mutation_strength=args.mutation_strength,
-                max_steps=args.max_steps,
-                notes=''
-            )
+            # Запись в БД идёт в фоновом потоке, пока оценивается следующее поколение
+            with profile.phase('база данных'):
+                from persistence import PersistenceWorker
+                db = PersistenceWorker(args.db, max_queue=args.db_queue,
+                                       flush_every=args.db_flush_every,
+                                       flush_interval=args.db_flush_interval,
+                                       weights_dtype=args.weights_dtype,
+                                       weights_compress=args.weights_zlib)
+            if resume_file and resume_session:
+                # Продолжаем ту же сессию: история поколений остаётся непрерывной
+                session_id = resume_session
+            else:
+                session_id = db.create_session(
+                    population_size=args.pop,
+                    grid_size=args.grid,
+                    elite_size=args.elite,
+                    mutation_rate=args.mutation_rate,
+                    mutation_strength=args.mutation_strength,
+                    max_steps=args.max_steps,
+                    notes=''
+                )
             print(f"✓ База данных: {args.db} (Session #{session_id})")
         except Exception as e:
             print(f"⚠️  Ошибка БД: {e}. Продолжаем без сохранения.")
@@ -85,7 +300,7 @@ def main():
     
     # Загрузка лучшей змейки из прошлой сессии (если нужно)
     initial_brain = None
-    if args.continue_session and db:
+    if args.continue_session and db and not resume_file:
         try:
             best_snakes = db.get_best_snakes(session_id=args.continue_session, limit=1)
             if best_snakes:
@@ -98,103 +313,138 @@ def main():
             print(f"⚠️  Ошибка загрузки прошлой сессии: {e}")
     
     # Создание эволюционной системы
-    evolution = Evolution(
-        population_size=args.pop,
-        grid_size=args.grid,
-        elite_size=args.elite,
-        mutation_rate=args.mutation_rate,
-        mutation_strength=args.mutation_strength,
-        max_steps=args.max_steps
-    )
+    with profile.phase('популяция'):
+        evolution = Evolution(
+            population_size=args.pop,
+            grid_size=args.grid,
+            elite_size=args.elite,
+            mutation_rate=args.mutation_rate,
+            mutation_strength=args.mutation_strength,
+            max_steps=args.max_steps,
+            workers=args.workers,
+            engine=args.engine,
+            clock=args.clock,
+            ticks_per_second=args.ticks_per_second,
+            eval_seed=args.eval_seed,
+            fitness_cache=args.fitness_cache,
+            cache_mode=args.cache_mode,
+            episodes=args.episodes,
+            racing=args.racing,
+            racing_keep=args.racing_keep
+        )
+    
+    # Кэш полезен только для детерминированных партий
+    if args.fitness_cache > 0:
+        if args.engine == 'batch':
+            print("⚠️  Кэш fitness не работает с --engine batch (змейки делят один ГСЧ)")
+        elif args.cache_mode == 'reuse' and (args.eval_seed is None or args.clock != 'ticks'):
+            print("⚠️  Кэш fitness в режиме reuse точен только с --eval-seed и --clock ticks")
+    
+    # Партии batch-движка не парные: змейки делят один ГСЧ
+    if args.engine == 'batch' and args.episodes > 1:
+        print("⚠️  С --engine batch партии с общим сидом - разные игры для разных змеек "
+              "(один ГСЧ на популяцию); сравнение" + (" при отсеве" if args.racing else "") +
+              " не парное, для парных партий используйте --engine serial")
+    
+    # Восстановление популяции, поколения, историй и ГСЧ из чекпоинта
+    if resume_file:
+        meta = restore_checkpoint(evolution, resume_file)
+        print(f"✓ Чекпоинт {resume_file}: популяция {evolution.population_size}, "
+              f"поколение {meta['generation']}, поле {meta['adaptive_grid']}x{meta['adaptive_grid']}")
+        # Поколения, записанные после чекпоинта, будут пересчитаны заново
+        if db and session_id:
+            db.truncate_session(session_id, meta['generation'])
+    
+    if args.checkpoint_every > 0:
+        checkpoint_file = checkpoint_path(args.checkpoint_dir, session_id)
     
     # Если есть загруженный мозг, добавляем его в популяцию
     if initial_brain:
         from snake import Snake
-        loaded_snake = Snake(brain=initial_brain, grid_size=args.grid)
+        loaded_snake = Snake(brain=initial_brain, grid_size=args.grid,
+                             clock=args.clock, ticks_per_second=args.ticks_per_second)
         # Заменяем случайную змейку на загруженную
         evolution.population[0] = loaded_snake
         print(f"✓ Восстановленная змейка добавлена в популяцию")
     
+    # Профилирование поколений: записи выводятся после строки статистики
+    profile_records = []
+    if args.profile:
+        from profiler import print_profile
+        evolution.enable_profiling(snapshot_every=args.profile_every)
+        evolution.add_hook(profile_records.append)
+        if db and session_id:
+            evolution.add_hook(lambda record: db.save_profile(session_id, record))
+    
     # Визуализатор (если нужен)
     visualizer = None
+    slot = None
     if args.visualize:
-        from visualizer import Visualizer
-        visualizer = Visualizer(evolution)
+        with profile.phase('импорт visualizer'):
+            from visualizer import Visualizer
+            from snapshot import SnapshotSlot, SnapshotView
+        # Окно видит не саму эволюцию, а последний опубликованный снимок
+        slot = SnapshotSlot()
+        if evolution.generation > 0:
+            slot.publish(evolution)
+        view = SnapshotView(slot, grid_size=args.grid, clock=args.clock,
+                            ticks_per_second=args.ticks_per_second)
+        with profile.phase('окно'):
+            visualizer = Visualizer(view, fast_forward=args.ff or 10)
+        visualizer.fast_forward = args.ff is not None
+    
+    if args.startup_profile:
+        profile.report(args.startup_target)
     
     print("=" * 60)
     print("ЭВОЛЮЦИОННАЯ ЗМЕЙКА")
     print("=" * 60)
-    print(f"Популяция: {args.pop}")
+    print(f"Популяция: {evolution.population_size}")
     print(f"Поколений: {args.gens}")
     print(f"Размер поля: {args.grid}x{args.grid}")
+    if args.episodes > 1:
+        print(f"Партий на змейку: {args.episodes}" + (" (с отсевом)" if args.racing else ""))
     if args.continue_session:
         print(f"Продолжение с сессии #{args.continue_session}")
     print("=" * 60)
     print()
     
-    # Основной цикл эволюции (бесконечный до победы)
-    victory_achieved = False
-    gen = 0
-    
-    while not victory_achieved:
-        best_fit, avg_fit = evolution.evolve()
-        gen += 1
-        
-        # Сохранение в БД
-        if db and session_id:
-            db.save_generation(session_id, evolution.generation, best_fit, avg_fit)
-            # Сохраняем лучшую змейку раз в 10 поколений (не каждое)
-            if hasattr(evolution, 'current_best_snake') and evolution.generation % 10 == 0:
-                db.save_best_snake(
-                    session_id, 
-                    evolution.generation, 
-                    best_fit,
-                    evolution.current_best_snake.brain.weights
-                )
-        
-        # Вывод статистики
-        print(f"Поколение {evolution.generation:4d} | "
-              f"Лучший: {best_fit:6.1f} | "
-              f"Средний: {avg_fit:6.1f}")
-        
-        # Проверка победы: если лучшая змейка заполнила поле
-        if best_fit >= 10000.0:
-            victory_achieved = True
-            print("\n" + "=" * 60)
-            print("🎉 ПОБЕДА! ЗМЕЙКА ЗАПОЛНИЛА ВСЁ ПОЛЕ! 🎉")
-            print("=" * 60)
-            print(f"Поколение победы: {evolution.generation}")
-            print(f"Fitness победителя: {best_fit:.1f}")
+    if visualizer is None:
+        train(args, profile_records)
+    else:
+        # Эволюция идёт в фоновом потоке и публикует снимки в слот,
+        # окно рисует последний снимок в своём темпе и не тормозит обучение
+        trainer = threading.Thread(target=train, args=(args, profile_records, slot),
+                                   name='evolution', daemon=True)
+        trainer.start()
         
-        # Визуализация (если нужна)
-        if args.visualize:
+        while trainer.is_alive():
             result = visualizer.visualize_generation(auto_mode=args.auto)
             if result == "VICTORY":
-                victory_achieved = True
+                stop_training.set()
                 print("\n" + "=" * 60)
                 print("🎉 ПОБЕДА! ЗМЕЙКА ЗАПОЛНИЛА ВСЁ ПОЛЕ! 🎉")
                 print("=" * 60)
-                print(f"Поколение победы: {evolution.generation}")
-                print(f"Fitness победителя: {best_fit:.1f}")
+                print(f"Поколение победы: {visualizer.evolution.generation}")
+                break
             elif not result:
+                stop_training.set()
                 print("\nВизуализация остановлена пользователем.")
                 break
         
-        # Сохранение лучшей змейки периодически
-        if gen % 50 == 0:
-            print(f"✓ Поколение {gen} завершено (эволюция продолжается...)")
-        
-        # Ограничение по поколениям (если указано, но только как предупреждение)
-        if args.gens > 0 and gen >= args.gens and not victory_achieved:
-            print(f"\n⚠️  Достигнут лимит поколений ({args.gens}), но победа ещё не достигнута.")
-            print("Эволюция продолжается до победы...")
-            print("(Нажмите Ctrl+C для остановки)")
+        # Текущее поколение дозавершается, новое не начинается
+        trainer.join()
     
     # Финальная статистика
     print("\n" + "=" * 60)
     print("РЕЗУЛЬТАТЫ ЭВОЛЮЦИИ")
     print("=" * 60)
     
+    # Финальный чекпоинт
+    if checkpoint_file:
+        save_checkpoint(evolution, checkpoint_file, session_id)
+        print(f"✓ Чекпоинт сохранён: {checkpoint_file} (продолжить: {resume_hint()})")
+    
     # Обновление финальной статистики в БД
     if db and session_id:
         db.update_session(
@@ -203,6 +453,9 @@ def main():
             evolution.best_fitness_in_history
         )
     
+    # Пул процессов больше не нужен
+    evolution.close()
+    
     # Получаем лучшую змейку
     best_snake = evolution.get_best_snake()
     
@@ -223,8 +476,9 @@ def main():
         print("\nДемонстрация лучшей змейки. Закройте окно для выхода.")
         
         # Показать демо лучшей змейки
-        demo_evolution = Evolution(population_size=1, grid_size=args.grid)
-        demo_evolution.population = [best_snake.clone()]
+        demo_evolution = Evolution(population_size=1, grid_size=args.grid,
+                                   clock=args.clock, ticks_per_second=args.ticks_per_second)
+        demo_evolution.population[0] = best_snake
         
         demo_visualizer = Visualizer(demo_evolution)
         demo_visualizer.visualize_generation()
@@ -0,0 +1,112 @@
+"""
+Параллельная оценка популяции в пуле процессов.
+"""
+
+import signal
+import multiprocessing
+import numpy as np
+from typing import List, Sequence, Tuple
+from snake import TICKS_PER_SECOND
+
+# Состояние процесса-воркера: среда и змейка переиспользуются между задачами
+_worker_env = None
+_worker_snake = None
+
+
+def _init_worker(clock: str, ticks_per_second: int):
+    """Инициализация воркера: сигналы обрабатывает только главный процесс."""
+    global _worker_env, _worker_snake
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    from environment import Environment
+    from snake import Snake
+    _worker_env = Environment(clock=clock, ticks_per_second=ticks_per_second)
+    _worker_snake = Snake()
+
+
+def _play_shard(task: Tuple) -> Tuple[List[float], List[int]]:
+    """
+    Сыграть партии для части популяции.
+
+    Args:
+        task: (grid_size, generation, max_steps, weights (n, 8, 4), seeds (n,))
+
+    Returns:
+        (список fitness, список длин партий в тиках) в порядке весов
+    """
+    grid_size, generation, max_steps, weights, seeds = task
+    env = _worker_env
+    snake = _worker_snake
+    env.grid_size = grid_size
+    env.generation = generation
+    snake.grid_size = grid_size
+
+    scores = []
+    lengths = []
+    for w, seed in zip(weights, seeds):
+        snake.brain.weights = w
+        env.seed(int(seed))
+        scores.append(env.play_game(snake, max_steps))
+        lengths.append(snake.ticks)
+    return scores, lengths
+
+
+class ParallelEvaluator:
+    """Пул процессов для оценки популяции, живущий между поколениями."""
+
+    def __init__(self, workers: int, clock: str = 'wall', ticks_per_second: int = TICKS_PER_SECOND):
+        """
+        Args:
+            workers: количество процессов
+            clock: часы для голода и fitness ('wall' или 'ticks')
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
+        """
+        self.workers = workers
+        self.game_lengths = None  # Длины партий (в тиках) последней оценки
+        self.pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                         initargs=(clock, ticks_per_second))
+
+    def evaluate(
+        self,
+        weights: Sequence[np.ndarray],
+        seeds: np.ndarray,
+        grid_size: int,
+        generation: int,
+        max_steps: int
+    ) -> List[float]:
+        """
+        Оценка популяции: в воркеры уходят только веса и сиды, обратно - fitness.
+
+        Args:
+            weights: матрицы весов всех змеек (массив (P, 8, 4) или список)
+            seeds: сиды партий (по одному на змейку)
+            grid_size: размер поля
+            generation: номер поколения (влияет на количество еды)
+            max_steps: максимальное количество шагов в игре
+
+        Returns:
+            список fitness в порядке популяции
+        """
+        stacked = np.asarray(weights)
+        # Партии сильно различаются по длине - режем мельче числа воркеров
+        n_shards = min(len(stacked), self.workers * 4)
+        tasks = [
+            (grid_size, generation, max_steps, w, s)
+            for w, s in zip(np.array_split(stacked, n_shards), np.array_split(seeds, n_shards))
+        ]
+
+        fitness_scores = []
+        game_lengths = []
+        for shard_scores, shard_lengths in self.pool.map(_play_shard, tasks):
+            fitness_scores.extend(shard_scores)
+            game_lengths.extend(shard_lengths)
+        self.game_lengths = np.array(game_lengths, dtype=np.int64)
+        return fitness_scores
+
+    def close(self):
+        """Остановка пула процессов."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,229 @@
+"""
+Фоновая запись в базу данных: evolve() не ждёт диска.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from database import EvolutionDB
+
+
+class PersistenceWorker:
+    """
+    Поток-владелец соединения SQLite с очередью сообщений.
+
+    Записи (поколения, лучшие змейки, профили) ставятся в очередь и пишутся,
+    пока главный поток оценивает следующее поколение. Запросы с результатом
+    (create_session, get_best_snakes) ждут ответа через Future. Очередь
+    ограничена: если диск не успевает, главный поток ждёт на put.
+    """
+
+    _STOP = object()  # Сообщение остановки потока
+
+    def __init__(
+        self,
+        db_path: str = 'evolution.db',
+        max_queue: int = 256,
+        flush_every: int = 10,
+        flush_interval: float = 5.0,
+        weights_dtype: str = 'float32',
+        weights_compress: bool = False
+    ):
+        """
+        Args:
+            db_path: путь к файлу базы данных
+            max_queue: максимальное количество сообщений в очереди
+            flush_every: сбрасывать буфер записей БД каждые N поколений
+            flush_interval: сбрасывать буфер БД не реже чем раз в T секунд
+            weights_dtype: тип хранения весов змеек (float64 - без потерь)
+            weights_compress: сжимать веса змеек zlib
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.weights_dtype = weights_dtype
+        self.weights_compress = weights_compress
+        self.queue = queue.Queue(maxsize=max(1, max_queue))
+        self.closed = False
+        self.error = None  # Исключение, остановившее поток записи
+
+        # Соединение создаётся в самом потоке; ошибки открытия БД
+        # пробрасываются в вызывающий код
+        ready = Future()
+        self.thread = threading.Thread(
+            target=self._run, args=(ready, flush_every, flush_interval),
+            name='evolution-db', daemon=True
+        )
+        self.thread.start()
+        ready.result()
+
+    _POLL = 0.5  # Как часто ожидающий поток проверяет, жив ли поток записи
+
+    def _run(self, ready: Future, flush_every: int, flush_interval: float):
+        """Цикл потока: выполнение сообщений очереди по порядку."""
+        try:
+            db = EvolutionDB(self.db_path, flush_every=flush_every, flush_interval=flush_interval,
+                             weights_dtype=self.weights_dtype, weights_compress=self.weights_compress)
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(True)
+
+        try:
+            while True:
+                try:
+                    item = self.queue.get(timeout=flush_interval)
+                except queue.Empty:
+                    # Простой: дописываем буфер, не дожидаясь следующих поколений
+                    try:
+                        db.flush()
+                    except Exception as e:
+                        print(f"⚠️  Ошибка записи в БД (flush): {e}")
+                    continue
+
+                if item is self._STOP:
+                    break
+
+                method, args, future = item
+                try:
+                    result = getattr(db, method)(*args)
+                except Exception as e:
+                    if future is not None:
+                        future.set_exception(e)
+                    else:
+                        print(f"⚠️  Ошибка записи в БД ({method}): {e}")
+                else:
+                    if future is not None:
+                        future.set_result(result)
+        except BaseException as e:
+            self.error = e
+            print(f"❌ Поток записи в БД остановлен: {e}")
+            raise
+        finally:
+            self._fail_pending()
+            try:
+                db.close()
+            except Exception as e:
+                print(f"⚠️  Ошибка закрытия БД: {e}")
+
+    def _fail_pending(self):
+        """Ответить ошибкой на запросы, оставшиеся в очереди после остановки потока."""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not self._STOP and item[2] is not None:
+                item[2].set_exception(RuntimeError('Поток записи в БД остановлен'))
+
+    def _check_alive(self):
+        """Исключение, если поток записи завершился (закрыт или упал)."""
+        if self.closed:
+            raise RuntimeError('PersistenceWorker закрыт')
+        if not self.thread.is_alive():
+            raise RuntimeError(f'Поток записи в БД остановлен: {self.error}')
+
+    def _put(self, item):
+        """Постановка в очередь; при полной очереди ждём, пока поток жив."""
+        while True:
+            self._check_alive()
+            try:
+                self.queue.put(item, timeout=self._POLL)
+                return
+            except queue.Full:
+                continue
+
+    def _submit(self, method: str, *args):
+        """Асинхронная запись: сообщение в очередь без ожидания результата."""
+        self._put((method, args, None))
+
+    def _call(self, method: str, *args):
+        """Синхронный запрос: ожидание результата из потока БД."""
+        future = Future()
+        self._put((method, args, future))
+        while True:
+            try:
+                return future.result(timeout=self._POLL)
+            except FutureTimeout:
+                # Поток мог упасть после постановки запроса
+                if not self.thread.is_alive() and not future.done():
+                    raise RuntimeError(f'Поток записи в БД остановлен: {self.error}')
+
+    def create_session(
+        self,
+        population_size: int,
+        grid_size: int,
+        elite_size: int,
+        mutation_rate: float,
+        mutation_strength: float,
+        max_steps: int,
+        notes: str = ''
+    ) -> int:
+        """
+        Создание новой сессии эволюции (синхронно).
+
+        Returns:
+            ID созданной сессии
+        """
+        return self._call('create_session', population_size, grid_size, elite_size,
+                          mutation_rate, mutation_strength, max_steps, notes)
+
+    def save_generation(self, session_id: int, generation: int, best_fitness: float, avg_fitness: float,
+                        steps: Optional[int] = None, seconds: Optional[float] = None):
+        """Сохранение данных поколения (асинхронно)."""
+        self._submit('save_generation', session_id, generation, float(best_fitness), float(avg_fitness),
+                     steps, seconds)
+
+    def save_best_snake(self, session_id: int, generation: int, fitness: float, weights: np.ndarray):
+        """Сохранение лучшей змейки (асинхронно, веса копируются сразу)."""
+        self._submit('save_best_snake', session_id, generation, float(fitness), np.array(weights, copy=True))
+
+    def save_profile(self, session_id: int, record: dict):
+        """Сохранение записи профилирования поколения (асинхронно)."""
+        self._submit('save_profile', session_id, record)
+
+    def update_session(self, session_id: int, total_generations: int, best_fitness: float):
+        """Обновление финальной статистики сессии (синхронно, со сбросом буфера)."""
+        self._call('update_session', session_id, total_generations, float(best_fitness))
+
+    def truncate_session(self, session_id: int, generation: int):
+        """Удаление записей сессии после поколения generation (синхронно)."""
+        self._call('truncate_session', session_id, generation)
+
+    def get_best_snakes(self, session_id: Optional[int] = None, limit: int = 10) -> List[Tuple]:
+        """
+        Получить лучшие змейки (синхронно).
+
+        Returns:
+            список кортежей (session_id, generation, fitness, weights)
+        """
+        return self._call('get_best_snakes', session_id, limit)
+
+    def load_snake_weights(self, weights_bytes: bytes, input_size: int = 8, output_size: int = 4) -> np.ndarray:
+        """Загрузка весов из байтов БД (без обращения к потоку)."""
+        return EvolutionDB.load_snake_weights(weights_bytes, input_size, output_size)
+
+    def flush(self):
+        """Дождаться записи всех сообщений, поставленных в очередь до вызова."""
+        self._call('flush')
+
+    def pending(self) -> int:
+        """Количество сообщений в очереди."""
+        return self.queue.qsize()
+
+    def close(self):
+        """Дописать очередь, сбросить буфер и закрыть соединение."""
+        if self.closed:
+            return
+        # Упавший поток очередь не разбирает - ждать его нечего
+        while self.thread.is_alive():
+            try:
+                self.queue.put(self._STOP, timeout=self._POLL)
+                break
+            except queue.Full:
+                continue
+        self.closed = True
+        self.thread.join()
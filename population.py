@@ -0,0 +1,121 @@
+"""
+Популяция змеек в виде массивов: веса всех мозгов и метаданные особей.
+"""
+
+import numpy as np
+from typing import Iterator, Optional, Sequence
+from brain import Brain, mutate_batch
+from snake import Snake, TICKS_PER_SECOND
+
+
+class Population:
+    """
+    Популяция как набор столбцов одинаковой длины P.
+
+    weights - веса всех мозгов одним массивом (P, input_size, output_size),
+    fitness - fitness последней оценки, parent - индекс родителя в прошлом
+    поколении (-1 для случайных особей), born - поколение рождения.
+
+    Объекты Snake/Brain не хранятся: snake(i) создаёт змейку, мозг которой
+    смотрит прямо в строку weights[i].
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        grid_size: int = 20,
+        clock: str = 'wall',
+        ticks_per_second: int = TICKS_PER_SECOND
+    ):
+        """
+        Args:
+            weights: веса всех особей (P, input_size, output_size), без копирования
+            grid_size: размер поля для создаваемых змеек
+            clock: часы создаваемых змеек ('wall' или 'ticks')
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
+        """
+        self.weights = weights
+        self.grid_size = grid_size
+        self.clock = clock
+        self.ticks_per_second = ticks_per_second
+
+        size = len(weights)
+        self.fitness = np.zeros(size)
+        self.parent = np.full(size, -1, dtype=np.int64)
+        self.born = np.zeros(size, dtype=np.int64)
+
+    @classmethod
+    def random(
+        cls,
+        size: int,
+        input_size: int = 8,
+        output_size: int = 4,
+        **kwargs
+    ) -> 'Population':
+        """Случайная популяция: веса в диапазоне [-1, 1], как у нового Brain."""
+        weights = np.random.uniform(-1, 1, (size, input_size, output_size))
+        return cls(weights, **kwargs)
+
+    @classmethod
+    def from_snakes(cls, snakes: Sequence[Snake], **kwargs) -> 'Population':
+        """Популяция из готовых змеек (веса копируются)."""
+        return cls(np.stack([snake.brain.weights for snake in snakes]), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __getitem__(self, i: int) -> Snake:
+        return self.snake(i)
+
+    def __setitem__(self, i: int, snake: Snake):
+        """Замена особи i весами змейки (например, загруженной из БД)."""
+        self.weights[i] = snake.brain.weights
+        self.fitness[i] = 0.0
+        self.parent[i] = -1
+
+    def __iter__(self) -> Iterator[Snake]:
+        for i in range(len(self)):
+            yield self.snake(i)
+
+    def snake(self, i: int, grid_size: Optional[int] = None) -> Snake:
+        """
+        Змейка особи i. Мозг - вид на weights[i] без копирования.
+
+        Args:
+            i: индекс особи
+            grid_size: размер поля (по умолчанию - текущий размер популяции)
+        """
+        return Snake(brain=Brain.wrap(self.weights[i]),
+                     grid_size=grid_size or self.grid_size,
+                     clock=self.clock, ticks_per_second=self.ticks_per_second)
+
+    def select(self, indices: np.ndarray) -> 'Population':
+        """
+        Новая популяция из особей indices (fancy indexing, веса копируются).
+
+        Метаданные копируются вместе с весами, parent указывает на исходный индекс.
+        """
+        indices = np.asarray(indices)
+        selected = Population(self.weights[indices], self.grid_size,
+                              self.clock, self.ticks_per_second)
+        selected.fitness = self.fitness[indices]
+        selected.parent = indices.astype(np.int64)
+        selected.born = self.born[indices]
+        return selected
+
+    def mutate(self, rows, mutation_rate: float, mutation_strength: float):
+        """
+        Мутация особей rows на месте (та же логика, что и Brain.mutate, одним тензором).
+
+        Args:
+            rows: срез или индексы мутируемых особей
+            mutation_rate: вероятность мутации каждого веса
+            mutation_strength: сила мутации
+        """
+        if isinstance(rows, slice):
+            # Срез - вид на weights, мутируем без копии
+            mutate_batch(self.weights[rows], mutation_rate, mutation_strength)
+        else:
+            block = self.weights[rows]
+            mutate_batch(block, mutation_rate, mutation_strength)
+            self.weights[rows] = block
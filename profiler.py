@@ -0,0 +1,161 @@
+"""
+Профилирование поколений эволюции: время фаз, шаги симуляции, длины партий
+и периодические снимки cProfile/tracemalloc.
+"""
+
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Фазы Evolution.evolve в порядке выполнения
+PHASES = ('evaluate', 'sort', 'clone', 'mutate')
+
+# Процентили длин партий в записи поколения
+LENGTH_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def profile_rows(profile: cProfile.Profile, top: int) -> List[Dict]:
+    """
+    Самые затратные функции снимка cProfile (по собственному времени).
+
+    Args:
+        profile: остановленный профилировщик
+        top: сколько строк оставить
+
+    Returns:
+        строки: функция, вызовы, собственное и полное время
+    """
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, name), (cc, nc, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({name})',
+            'calls': nc,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+    rows.sort(key=lambda row: row['tottime'], reverse=True)
+    return rows[:top]
+
+
+class GenerationProfiler:
+    """
+    Сбор метрик одного поколения за другим.
+
+    Время фаз меряется всегда, когда профилировщик включён; cProfile и
+    tracemalloc запускаются только раз в snapshot_every поколений, так как
+    заметно замедляют симуляцию.
+    """
+
+    def __init__(self, snapshot_every: int = 0, top: int = 10):
+        """
+        Args:
+            snapshot_every: снимок cProfile/tracemalloc каждые N поколений (0 - без снимков)
+            top: сколько строк оставлять в снимках
+        """
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.record = None
+        self._start = 0.0
+        self._cprofile = None
+
+    def begin(self, generation: int):
+        """Начало поколения."""
+        self.record = {
+            'generation': generation,
+            'phases': {},
+        }
+        if self.snapshot_every > 0 and generation % self.snapshot_every == 0:
+            tracemalloc.start()
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замер времени фазы поколения."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self.record['phases']
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def end(self, game_lengths: Optional[np.ndarray] = None) -> Dict:
+        """
+        Конец поколения.
+
+        Args:
+            game_lengths: длины партий каждой змейки в тиках
+
+        Returns:
+            запись поколения: время фаз, шаги, сводка длин партий (минимум,
+            среднее, максимум, процентили) и снимки
+        """
+        record = self.record
+        record['total'] = time.perf_counter() - self._start
+
+        if game_lengths is not None and len(game_lengths) > 0:
+            lengths = np.asarray(game_lengths)
+            steps = int(lengths.sum())
+            record['steps'] = steps
+            record['steps_per_sec'] = steps / max(record['phases'].get('evaluate', 0.0), 1e-9)
+            # Сводка вместо самих длин: запись уходит в БД каждое поколение
+            percentiles = np.percentile(lengths, LENGTH_PERCENTILES)
+            record['game_length'] = {
+                'min': int(lengths.min()),
+                'mean': float(lengths.mean()),
+                'max': int(lengths.max()),
+                **{f'p{q}': float(value) for q, value in zip(LENGTH_PERCENTILES, percentiles)},
+            }
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            record['cprofile'] = profile_rows(self._cprofile, self.top)
+            record['memory'] = self._memory_snapshot()
+            self._cprofile = None
+
+        self.record = None
+        return record
+
+    def _memory_snapshot(self) -> Dict:
+        """Пик памяти Python за поколение и крупнейшие места выделения."""
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        top = [
+            {
+                'location': f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+                'kib': stat.size / 1024,
+                'count': stat.count,
+            }
+            for stat in snapshot.statistics('lineno')[:self.top]
+        ]
+        return {'peak_kib': peak / 1024, 'current_kib': current / 1024, 'top': top}
+
+
+def print_profile(record: Dict):
+    """Вывод записи профилирования поколения в консоль."""
+    phases = ' | '.join(
+        f"{name} {record['phases'][name]:.2f}s" for name in PHASES if name in record['phases']
+    )
+    line = f"  ⏱ {phases} | всего {record['total']:.2f}s"
+    if 'steps' in record:
+        lengths = record['game_length']
+        line += (f" | {record['steps']:,} шагов ({record['steps_per_sec']:,.0f}/с)"
+                 f" | партии: мин {lengths['min']}, мед {lengths['p50']:.0f}, макс {lengths['max']}")
+    print(line)
+
+    if 'cprofile' in record:
+        print(f"  🔬 Снимок поколения {record['generation']}: "
+              f"пик памяти {record['memory']['peak_kib']:,.0f} КиБ")
+        for row in record['cprofile'][:5]:
+            print(f"     {row['tottime']:8.3f}s {row['calls']:>10} {row['function']}")
+        for row in record['memory']['top'][:3]:
+            print(f"     {row['kib']:8.0f} КиБ {row['count']:>8} {row['location']}")
@@ -0,0 +1,372 @@
+"""
+Повторы партий лучших змеек без окна (SDL dummy).
+
+Веса берутся из таблицы best_snakes, партия переигрывается в Environment
+с заданным сидом на часах 'ticks', поэтому повтор одинаков на любой машине.
+Кадры рисуются в поверхность pygame и копируются в NumPy-буфер
+(pygame.surfarray), а буфер пачками уходит в последовательность изображений
+(PNG/BMP/TGA) или GIF (нужен Pillow). Несколько повторов рисуются
+параллельно в пуле процессов.
+
+Запуск: python replay_render.py --session 3 --top 4 --seed 42 --format gif
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import time
+from typing import List, Optional, Tuple
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from brain import Brain
+from database import EvolutionDB
+from environment import Environment
+from evolution import adaptive_grid_size
+from snake import Snake, TICKS_PER_SECOND
+from visualizer import Visualizer
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # GIF недоступен, последовательность изображений работает
+
+CHUNK_FRAMES = 256  # Кадров в буфере между записями на диск
+IMAGE_FORMATS = ('png', 'bmp', 'tga')
+
+
+class ReplayRenderer:
+    """
+    Отрисовка поля повтора: сетка, тело с градиентом яркости, голова и еда
+    в цветах визуализатора, но без анимаций - кадр зависит только от
+    состояния партии.
+    """
+
+    def __init__(self, grid_size: int, cell_size: int = 20, generation: int = 0):
+        """
+        Args:
+            grid_size: размер поля
+            cell_size: размер клетки в пикселях
+            generation: поколение змейки (цвет как в визуализаторе)
+        """
+        self.grid_size = grid_size
+        self.cell_size = cell_size
+        size = grid_size * cell_size
+        self.surface = pygame.Surface((size, size))
+        self.background = self._render_background()
+
+        snake_color, self.head_color = Visualizer.snake_colors(generation)
+        # Градиент тела теми же уровнями, что в визуализаторе
+        levels = Visualizer.BODY_LEVELS
+        self.body_colors = [
+            tuple(int(c * (0.7 + 0.3 * level / (levels - 1))) for c in snake_color)
+            for level in range(levels)
+        ]
+
+    def _render_background(self) -> pygame.Surface:
+        """Фон с линиями сетки и акцентами каждые 5 клеток."""
+        colors = Visualizer.COLORS
+        size = self.grid_size * self.cell_size
+        background = pygame.Surface((size, size))
+        background.fill(colors['background'])
+        line_color = tuple(int(c * 0.3) for c in colors['grid'])
+        accent_color = tuple(int(c * 0.6) for c in colors['grid_highlight'])
+        for i in range(self.grid_size + 1):
+            color = accent_color if i % 5 == 0 and 0 < i < self.grid_size else line_color
+            pos = i * self.cell_size
+            pygame.draw.line(background, color, (pos, 0), (pos, size), 1)
+            pygame.draw.line(background, color, (0, pos), (size, pos), 1)
+        return background
+
+    def render(self, snake: Snake, food_positions: List[Tuple[int, int]], out: np.ndarray):
+        """
+        Кадр в готовый буфер.
+
+        Args:
+            snake: змейка
+            food_positions: позиции еды
+            out: буфер кадра (высота, ширина) uint32 в формате пикселей поверхности
+        """
+        surface = self.surface
+        size = self.cell_size
+        surface.blit(self.background, (0, 0))
+
+        half = size // 2
+        for x, y in food_positions:
+            pygame.draw.circle(surface, Visualizer.COLORS['food'],
+                               (x * size + half, y * size + half), max(2, half - 2))
+
+        body = snake.body
+        n = len(body)
+        if n > 1:
+            last = n - 1
+            steps = len(self.body_colors) - 1
+            for i in range(n - 1, 0, -1):
+                x, y = body[i]
+                surface.fill(self.body_colors[round(i / last * steps)],
+                             (x * size + 1, y * size + 1, size - 2, size - 2))
+        if n:
+            x, y = body[0]
+            surface.fill(self.head_color, (x * size, y * size, size, size))
+
+        # Пиксели поверхности копируются построчно целыми словами; разбор на
+        # каналы (to_rgb) делается пачкой перед записью
+        pixels = pygame.surfarray.pixels2d(surface)
+        np.copyto(out, pixels.T)
+        del pixels  # Снимает блокировку поверхности
+
+    def to_rgb(self, frames: np.ndarray) -> np.ndarray:
+        """Кадры из render (n, высота, ширина) в RGB (n, высота, ширина, 3) uint8."""
+        # Канал - целый байт слова: берём байты по сдвигам масок поверхности
+        channels = [shift // 8 for shift in self.surface.get_shifts()[:3]]
+        if sys.byteorder == 'big':
+            channels = [3 - channel for channel in channels]
+        return frames.view(np.uint8).reshape(frames.shape + (4,))[..., channels]
+
+
+class ImageSequenceWriter:
+    """Кадры в отдельные файлы frame_00000.png, frame_00001.png, ..."""
+
+    def __init__(self, directory: str, fmt: str = 'png'):
+        """
+        Args:
+            directory: папка кадров (создаётся)
+            fmt: формат файлов (png, bmp, tga)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fmt = fmt
+        self.count = 0
+
+    def write(self, frames: np.ndarray):
+        """Пачка кадров RGB (n, высота, ширина, 3)."""
+        for frame in frames:
+            path = os.path.join(self.directory, f'frame_{self.count:05d}.{self.fmt}')
+            image = pygame.image.frombuffer(frame.tobytes(), frame.shape[1::-1], 'RGB')
+            pygame.image.save(image, path)
+            self.count += 1
+
+    def close(self):
+        pass
+
+
+class GifWriter:
+    """
+    Кадры в анимированный GIF (Pillow).
+
+    Pillow записывает GIF целиком при закрытии, поэтому кадры хранятся
+    сжатыми до палитры (байт на пиксель); для длинных партий используйте
+    --every.
+    """
+
+    def __init__(self, path: str, fps: int = 15):
+        """
+        Args:
+            path: файл GIF
+            fps: кадров в секунду при просмотре
+        """
+        if Image is None:
+            raise RuntimeError("Для GIF нужен Pillow: pip install pillow")
+        self.path = path
+        self.duration = max(1, round(1000 / fps))
+        self.frames = []
+
+    def write(self, frames: np.ndarray):
+        """Пачка кадров RGB (n, высота, ширина, 3)."""
+        for frame in frames:
+            self.frames.append(Image.fromarray(frame).quantize(colors=64))
+
+    def close(self):
+        if self.frames:
+            self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:],
+                                duration=self.duration, loop=0)
+        self.frames = []
+
+
+def replay(
+    weights: np.ndarray,
+    seed: int,
+    writer,
+    grid_size: int = 20,
+    generation: int = 0,
+    max_steps: int = 100000,
+    ticks_per_second: int = TICKS_PER_SECOND,
+    cell_size: int = 20,
+    every: int = 1,
+    env_generation: Optional[int] = None
+) -> Tuple[float, int, float]:
+    """
+    Переиграть партию и записать её кадры.
+
+    Args:
+        weights: веса мозга (8, 4)
+        seed: сид партии (еда и решения мозга)
+        writer: ImageSequenceWriter или GifWriter
+        grid_size: размер поля
+        generation: поколение змейки (цвет, как в визуализаторе)
+        max_steps: максимальное количество шагов
+        ticks_per_second: тиков в одной секунде голода
+        cell_size: размер клетки в пикселях
+        every: записывать каждый N-й шаг
+        env_generation: поколение среды, в которой змейка играла (количество
+                        еды; None - то же, что generation)
+
+    Returns:
+        (fitness, количество кадров, время отрисовки кадров в секундах)
+    """
+    env = Environment(grid_size, clock='ticks', ticks_per_second=ticks_per_second)
+    env.generation = generation if env_generation is None else env_generation
+    env.seed(seed)
+    snake = Snake(brain=Brain(weights=weights), grid_size=grid_size,
+                  clock='ticks', ticks_per_second=ticks_per_second)
+    renderer = ReplayRenderer(grid_size, cell_size, generation)
+
+    size = grid_size * cell_size
+    buffer = np.empty((CHUNK_FRAMES, size, size), dtype=np.uint32)
+    state = {'step': 0, 'filled': 0, 'frames': 0, 'render_time': 0.0}
+
+    def on_step():
+        step = state['step']
+        state['step'] += 1
+        if step % every:
+            return
+        start = time.perf_counter()
+        renderer.render(snake, env.food_positions, buffer[state['filled']])
+        state['render_time'] += time.perf_counter() - start
+        state['filled'] += 1
+        state['frames'] += 1
+        if state['filled'] == CHUNK_FRAMES:
+            writer.write(renderer.to_rgb(buffer))
+            state['filled'] = 0
+
+    try:
+        fitness = env.play_game(snake, max_steps, on_step=on_step)
+        writer.write(renderer.to_rgb(buffer[:state['filled']]))
+    finally:
+        writer.close()
+    return fitness, state['frames'], state['render_time']
+
+
+def _init_worker():
+    """Инициализация воркера: Ctrl+C обрабатывает только главный процесс."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _render_task(task: Tuple) -> Tuple[str, float, int, float, float]:
+    """
+    Один повтор в процессе пула.
+
+    Args:
+        task: (путь, формат, fps, веса, сид, параметры replay)
+
+    Returns:
+        (путь, fitness, кадров, время отрисовки, полное время)
+    """
+    path, fmt, fps, weights, seed, params = task
+    writer = GifWriter(path, fps) if fmt == 'gif' else ImageSequenceWriter(path, fmt)
+    start = time.perf_counter()
+    fitness, frames, render_time = replay(weights, seed, writer, **params)
+    return path, fitness, frames, render_time, time.perf_counter() - start
+
+
+def session_grid_size(db: EvolutionDB, session_id: int) -> Optional[int]:
+    """Размер поля сессии (None - сессия не найдена)."""
+    row = db.conn.execute('SELECT grid_size FROM sessions WHERE id = ?', (session_id,)).fetchone()
+    return row[0] if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Повторы партий лучших змеек в кадры или GIF')
+    parser.add_argument('--db', default='evolution.db', help='Путь к базе данных')
+    parser.add_argument('--session', type=int, default=None, help='ID сессии (по умолчанию - все)')
+    parser.add_argument('--top', type=int, default=1, help='Сколько лучших змеек переиграть')
+    parser.add_argument('--seed', type=int, default=0, help='Сид первой партии')
+    parser.add_argument('--games', type=int, default=1, help='Партий на змейку (сиды seed, seed+1, ...)')
+    parser.add_argument('--grid', type=int, default=None,
+                        help='Размер поля (по умолчанию - поле поколения змейки в её сессии)')
+    parser.add_argument('--max-steps', type=int, default=100000, help='Макс. шагов в партии')
+    parser.add_argument('--ticks-per-second', type=int, default=TICKS_PER_SECOND,
+                        help='Тиков симуляции в одной секунде голода')
+    parser.add_argument('--cell', type=int, default=20, help='Размер клетки в пикселях')
+    parser.add_argument('--every', type=int, default=1, metavar='N', help='Записывать каждый N-й шаг')
+    parser.add_argument('--format', choices=IMAGE_FORMATS + ('gif',), default='png',
+                        help='Последовательность изображений или GIF (нужен Pillow)')
+    parser.add_argument('--fps', type=int, default=15, help='Кадров в секунду GIF')
+    parser.add_argument('--out', default='replays', help='Папка результатов')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Процессов отрисовки (по умолчанию - по числу повторов, не больше ядер)')
+    args = parser.parse_args()
+
+    if args.format == 'gif' and Image is None:
+        print("❌ Для GIF нужен Pillow: pip install pillow (или --format png)")
+        return
+
+    # Только чтение: утилита не создаёт базу и не мигрирует её схему
+    try:
+        db = EvolutionDB(args.db, read_only=True)
+    except sqlite3.Error as e:
+        print(f"❌ Не удалось открыть базу {args.db}: {e}")
+        return
+    try:
+        snakes = db.get_best_snakes(session_id=args.session, limit=args.top)
+        tasks = []
+        for session_id, generation, fitness, weights_bytes in snakes:
+            # Змейка поколения G отобрана в evolve() при generation = G - 1:
+            # на уменьшенном к тому времени поле и с той же едой
+            played = max(0, generation - 1)
+            grid_size = args.grid
+            if grid_size is None:
+                grid_size = adaptive_grid_size(session_grid_size(db, session_id) or 20, played)
+            weights = EvolutionDB.load_snake_weights(weights_bytes)
+            params = {
+                'grid_size': grid_size,
+                'generation': generation,
+                'env_generation': played,
+                'max_steps': args.max_steps,
+                'ticks_per_second': args.ticks_per_second,
+                'cell_size': args.cell,
+                'every': args.every,
+            }
+            for seed in range(args.seed, args.seed + args.games):
+                name = f'session{session_id}_gen{generation}_seed{seed}'
+                if args.format == 'gif':
+                    name += '.gif'
+                tasks.append((os.path.join(args.out, name), args.format, args.fps, weights, seed, params))
+    finally:
+        db.close()
+
+    if not tasks:
+        print("Нет сохранённых змеек.")
+        return
+
+    os.makedirs(args.out, exist_ok=True)
+    workers = args.workers or min(len(tasks), os.cpu_count() or 1)
+    print(f"🎬 Повторов: {len(tasks)}, процессов: {workers}")
+
+    start = time.perf_counter()
+    total_frames = 0
+    pool = multiprocessing.Pool(workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        results = pool.imap(_render_task, tasks) if pool else map(_render_task, tasks)
+        for path, fitness, frames, render_time, elapsed in results:
+            total_frames += frames
+            print(f"  {path}: {frames} кадров, fitness {fitness:.1f}, "
+                  f"отрисовка {frames / max(render_time, 1e-9):,.0f} к/с, всего {elapsed:.1f}s")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    print(f"✓ {total_frames} кадров за {elapsed:.1f}s ({total_frames / max(elapsed, 1e-9):,.0f} к/с)")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,20 @@
 
 import sys
 import os
+import hashlib
 import subprocess
 import platform
 
+# Отметка успешной проверки зависимостей рядом со скриптом: пока не сменились
+# интерпретатор и requirements.txt, пакеты заново не импортируются и pip не вызывается
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEPENDENCY_STAMP = os.path.join(ROOT, '.deps_checked')
+
+REQUIRED_PACKAGES = {
+    'numpy': 'numpy>=1.21.0',
+    'pygame': 'pygame>=2.0.0'
+}
+
 def check_python_version():
     """Проверка версии Python."""
     if sys.version_info < (3, 7):
@@ -17,18 +28,53 @@ def check_python_version():
         sys.exit(1)
     print(f"✓ Python {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}")
 
+def dependency_key() -> str:
+    """Ключ отметки: интерпретатор, его версия, список пакетов и requirements.txt."""
+    key = hashlib.sha256()
+    key.update(sys.executable.encode())
+    key.update(sys.version.encode())
+    key.update(repr(sorted(REQUIRED_PACKAGES.items())).encode())
+    try:
+        with open(os.path.join(ROOT, 'requirements.txt'), 'rb') as f:
+            key.update(f.read())
+    except OSError:
+        pass
+    return key.hexdigest()
+
+def dependencies_cached() -> bool:
+    """Зависимости уже проверялись с тем же интерпретатором и requirements.txt."""
+    try:
+        with open(DEPENDENCY_STAMP) as f:
+            return f.read().strip() == dependency_key()
+    except OSError:
+        return False
+
+def save_dependency_stamp():
+    """Запомнить успешную проверку зависимостей."""
+    try:
+        with open(DEPENDENCY_STAMP, 'w') as f:
+            f.write(dependency_key() + '\n')
+    except OSError:
+        pass
+
+def forget_dependency_stamp():
+    """Сбросить отметку: при следующем запуске зависимости проверятся заново."""
+    try:
+        os.remove(DEPENDENCY_STAMP)
+    except OSError:
+        pass
+
 def check_and_install_dependencies():
     """Проверка и установка зависимостей."""
-    print("\n📦 Проверка зависимостей...")
+    if dependencies_cached():
+        print("✓ Зависимости проверены ранее (удалите .deps_checked для повторной проверки)")
+        return
     
-    required_packages = {
-        'numpy': 'numpy>=1.21.0',
-        'pygame': 'pygame>=2.0.0'
-    }
+    print("\n📦 Проверка зависимостей...")
     
     missing_packages = []
     
-    for package_name, package_spec in required_packages.items():
+    for package_name, package_spec in REQUIRED_PACKAGES.items():
         try:
             __import__(package_name)
             print(f"  ✓ {package_name} установлен")
@@ -53,6 +99,8 @@ def check_and_install_dependencies():
             sys.exit(1)
     else:
         print("✓ Все зависимости на месте!")
+    
+    save_dependency_stamp()
 
 def ensure_database():
     """Создание базы данных если её нет."""
@@ -100,6 +148,9 @@ def main():
         print("\n\n⚠️  Программа остановлена пользователем")
         sys.exit(0)
     except Exception as e:
+        # Пакет могли удалить после проверки - в следующий раз проверяем заново
+        if isinstance(e, ImportError):
+            forget_dependency_stamp()
         print(f"\n❌ Ошибка при запуске: {e}")
         import traceback
         traceback.print_exc()
@@ -4,9 +4,34 @@
 
 import numpy as np
 import time
+from bisect import bisect_left, insort
+from collections import deque
+from functools import lru_cache
 from typing import List, Tuple, Optional
 from brain import Brain
 
+# Тиков симуляции в одной "секунде" для режима часов 'ticks'
+TICKS_PER_SECOND = 25
+
+
+@lru_cache(maxsize=None)
+def border_distances(grid_size: int) -> Tuple[Tuple[int, int, int, int], ...]:
+    """
+    Таблица расстояний до границ поля для каждой клетки.
+    
+    Args:
+        grid_size: размер игрового поля
+        
+    Returns:
+        кортеж по индексу x * grid_size + y: свободных клеток до границы
+        (вверх, вниз, влево, вправо)
+    """
+    last = grid_size - 1
+    return tuple(
+        (y, last - y, x, last - x)
+        for x in range(grid_size) for y in range(grid_size)
+    )
+
 
 class Snake:
     """Змейка с эволюционным мозгом."""
@@ -19,14 +44,24 @@ class Snake:
         3: (1, 0)    # Вправо
     }
     
-    def __init__(self, brain: Optional[Brain] = None, grid_size: int = 20):
+    def __init__(
+        self,
+        brain: Optional[Brain] = None,
+        grid_size: int = 20,
+        clock: str = 'wall',
+        ticks_per_second: int = TICKS_PER_SECOND
+    ):
         """
         Args:
             brain: экземпляр Brain или None для случайного мозга
             grid_size: размер игрового поля
+            clock: часы для голода и fitness ('wall' - реальное время, 'ticks' - тики симуляции)
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
         """
         self.grid_size = grid_size
         self.brain = brain if brain else Brain()
+        self.clock = clock
+        self.ticks_per_second = ticks_per_second
         
         # Начальное состояние
         self.reset()
@@ -35,13 +70,38 @@ class Snake:
         """Сброс состояния змейки для нового раунда."""
         # Начальная позиция в центре
         center = self.grid_size // 2
-        self.body = [(center, center), (center - 1, center), (center - 2, center)]
+        self.set_body([(center, center), (center - 1, center), (center - 2, center)])
         self.direction = 3  # Движение вправо
         self.fitness = 0
         self.steps = 0
         self.steps_without_food = 0  # Оставляем для совместимости
         self.last_food_time = time.time()  # Время последнего поедания еды (в секундах)
+        self.ticks = 0  # Тики симуляции (для режима часов 'ticks')
+        self.last_food_tick = 0  # Тик последнего поедания еды
         self.alive = True
+    
+    def set_body(self, cells: List[Tuple[int, int]]):
+        """
+        Установить тело змейки и перестроить индексы занятости.
+        
+        Args:
+            cells: сегменты тела по порядку, голова - первый
+        """
+        # Сегменты тела по порядку (голова - первый) и множество занятых клеток
+        # для проверки пересечений за O(1)
+        self.body = deque(cells)
+        self.body_cells = set(self.body)
+        # Отсортированные координаты тела по строкам и столбцам:
+        # rows[y] - занятые x в строке y, cols[x] - занятые y в столбце x
+        self.rows = [[] for _ in range(self.grid_size)]
+        self.cols = [[] for _ in range(self.grid_size)]
+        for x, y in self.body:
+            insort(self.rows[y], x)
+            insort(self.cols[x], y)
+    
+    def advance_clock(self):
+        """Один тик симуляции (используется в режиме часов 'ticks')."""
+        self.ticks += 1
         
     def get_head(self) -> Tuple[int, int]:
         """Получить позицию головы."""
@@ -51,6 +111,10 @@ class Snake:
         """
         Получить входные данные для мозга (визуальное поле).
         
+        Расстояние до границы берётся из таблицы border_distances, а до
+        ближайшего сегмента тела - бинарным поиском в строке и столбце головы,
+        так что вид считается за O(log L) вместо обхода клеток по лучам.
+        
         Args:
             food_pos: позиция еды (x, y)
             walls: список позиций стен [(x, y), ...]
@@ -60,51 +124,55 @@ class Snake:
             [направление до еды (4 значения),
              опасности по направлениям (4 значения)]
         """
-        head_x, head_y = self.get_head()
+        head_x, head_y = self.body[0]
         food_x, food_y = food_pos
         
         # Направление до еды (one-hot вектор)
         dx = food_x - head_x
         dy = food_y - head_y
-        direction_to_food = np.zeros(4)
+        view = [0.0] * 8
         if abs(dx) > abs(dy):
-            direction_to_food[3 if dx > 0 else 2] = 1
+            view[3 if dx > 0 else 2] = 1.0
         else:
-            direction_to_food[1 if dy > 0 else 0] = 1
+            view[1 if dy > 0 else 0] = 1.0
         
         # Опасности в каждом направлении (расстояние до стены/препятствия)
-        dangers = np.zeros(4)
+        up, down, left, right = border_distances(self.grid_size)[head_x * self.grid_size + head_y]
         
-        if walls is None:
-            walls = []
+        # Ближайшие сегменты тела в столбце и строке головы (голова в них тоже есть)
+        col = self.cols[head_x]
+        i = bisect_left(col, head_y)
+        if i > 0:
+            up = min(up, head_y - col[i - 1] - 1)
+        if i + 1 < len(col):
+            down = min(down, col[i + 1] - head_y - 1)
         
-        for i, (dir_x, dir_y) in enumerate(self.DIRECTIONS.values()):
-            dist = 0
-            check_x, check_y = head_x, head_y
-            
-            while True:
-                check_x += dir_x
-                check_y += dir_y
-                
-                # Проверка границ
-                if (check_x < 0 or check_x >= self.grid_size or 
-                    check_y < 0 or check_y >= self.grid_size):
-                    break
-                
-                # Проверка собственного тела
-                if (check_x, check_y) in self.body:
-                    break
-                
-                # Проверка стен
-                if (check_x, check_y) in walls:
-                    break
-                
-                dist += 1
-            
-            # Нормализация расстояния опасности
-            dangers[i] = 1.0 / (1.0 + dist)
+        row = self.rows[head_y]
+        i = bisect_left(row, head_x)
+        if i > 0:
+            left = min(left, head_x - row[i - 1] - 1)
+        if i + 1 < len(row):
+            right = min(right, row[i + 1] - head_x - 1)
+        
+        dists = [up, down, left, right]
+        
+        # Стены (сейчас отключены) проверяются обходом по лучам
+        if walls:
+            walls = set(walls)
+            for k, (dir_x, dir_y) in enumerate(self.DIRECTIONS.values()):
+                check_x, check_y = head_x, head_y
+                for dist in range(dists[k]):
+                    check_x += dir_x
+                    check_y += dir_y
+                    if (check_x, check_y) in walls:
+                        dists[k] = dist
+                        break
+        
+        # Нормализация расстояния опасности
+        for k in range(4):
+            view[4 + k] = 1.0 / (1.0 + dists[k])
         
-        return np.concatenate([direction_to_food, dangers])
+        return np.array(view)
     
     def move(self, action: int, walls: List[Tuple[int, int]] = None) -> bool:
         """
@@ -129,21 +197,21 @@ class Snake:
         # Новая позиция головы
         new_head = (head_x + dir_x, head_y + dir_y)
         
-        if walls is None:
-            walls = []
-        
         # Проверка столкновений
         if (new_head[0] < 0 or new_head[0] >= self.grid_size or
             new_head[1] < 0 or new_head[1] >= self.grid_size or
-            new_head in self.body or
-            new_head in walls):  # Проверка на стены
+            new_head in self.body_cells or
+            (walls and new_head in walls)):  # Проверка на стены
             # Столкновение - змейка мертва
             self.alive = False
             # ПРИМЕЧАНИЕ: steps_without_food теперь увеличивается в environment.py на каждом шаге
             return False
         
         # Добавление новой головы
-        self.body.insert(0, new_head)
+        self.body.appendleft(new_head)
+        self.body_cells.add(new_head)
+        insort(self.rows[new_head[1]], new_head[0])
+        insort(self.cols[new_head[0]], new_head[1])
         
         self.steps += 1
         # ПРИМЕЧАНИЕ: steps_without_food теперь увеличивается в environment.py на каждом шаге
@@ -160,10 +228,13 @@ class Snake:
         self.fitness += base_reward + speed_bonus
         self.steps_without_food = 0
         self.last_food_time = time.time()  # Обновляем время последнего поедания
+        self.last_food_tick = self.ticks
         # Хвост не удаляется - змейка растёт
     
     def get_time_without_food(self) -> float:
-        """Получить время без еды в секундах."""
+        """Получить время без еды в секундах (в режиме 'ticks' - в секундах симуляции)."""
+        if self.clock == 'ticks':
+            return (self.ticks - self.last_food_tick) / self.ticks_per_second
         return time.time() - self.last_food_time
     
     def get_hunger_percent(self, max_hunger_seconds: float = 8.0) -> float:
@@ -176,10 +247,22 @@ class Snake:
         time_without = self.get_time_without_food()
         return min(1.0, time_without / max_hunger_seconds)
     
-    def remove_tail(self):
-        """Удаление хвоста (когда не съела еду)."""
+    def remove_tail(self) -> Optional[Tuple[int, int]]:
+        """
+        Удаление хвоста (когда не съела еду).
+        
+        Returns:
+            освободившаяся клетка или None, если хвост не удалён
+        """
         if len(self.body) > 3:  # Минимальный размер змейки
-            self.body.pop()
+            tail = self.body.pop()
+            self.body_cells.discard(tail)
+            row = self.rows[tail[1]]
+            del row[bisect_left(row, tail[0])]
+            col = self.cols[tail[0]]
+            del col[bisect_left(col, tail[1])]
+            return tail
+        return None
     
     def update_fitness(self):
         """Обновление fitness с учётом времени выживания."""
@@ -206,5 +289,6 @@ class Snake:
     
     def clone(self) -> 'Snake':
         """Создание копии змейки."""
-        return Snake(brain=self.brain.clone(), grid_size=self.grid_size)
+        return Snake(brain=self.brain.clone(), grid_size=self.grid_size,
+                     clock=self.clock, ticks_per_second=self.ticks_per_second)
 
@@ -0,0 +1,125 @@
+"""
+Обмен состоянием между потоком эволюции и визуализатором без блокировок.
+
+Поток эволюции после каждого поколения публикует неизменяемый снимок
+(копия весов лучшей змейки, статистика, хвост истории). Визуализатор читает
+последний опубликованный снимок в своём темпе и играет демо в собственной
+среде, поэтому отрисовка не задерживает обучение.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from brain import Brain
+from environment import Environment
+from snake import Snake, TICKS_PER_SECOND
+
+# Сколько последних поколений истории попадает в снимок: столько рисует
+# мини-график визуализатора; копия всей истории стоила бы O(G) на поколение
+HISTORY_TAIL = 50
+
+
+class EvolutionSnapshot(NamedTuple):
+    """Состояние эволюции после одного поколения (только для чтения)."""
+    generation: int
+    best_weights: np.ndarray
+    best_fitness: float
+    avg_fitness: float
+    best_fitness_history: Tuple[float, ...]  # Последние HISTORY_TAIL значений
+
+
+class SnapshotSlot:
+    """
+    Слот последнего снимка.
+
+    Запись - одно присваивание ссылки на новый кортеж, чтение - одно чтение
+    ссылки; в CPython обе операции атомарны, поэтому замки не нужны и
+    писатель никогда не ждёт читателя. Читатель может пропустить
+    промежуточные поколения - он всегда видит самый свежий снимок.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+
+    def publish(self, evolution):
+        """
+        Публикация снимка эволюции (вызывается между поколениями).
+
+        Args:
+            evolution: объект Evolution
+        """
+        generation, best_fitness, avg_fitness = evolution.get_stats()
+        weights = evolution.get_best_snake().brain.weights.copy()
+        weights.flags.writeable = False
+        self._snapshot = EvolutionSnapshot(
+            generation=generation,
+            best_weights=weights,
+            best_fitness=float(best_fitness),
+            avg_fitness=float(avg_fitness),
+            best_fitness_history=tuple(float(x) for x in evolution.best_fitness_history[-HISTORY_TAIL:]),
+        )
+
+    def latest(self) -> Optional[EvolutionSnapshot]:
+        """Последний опубликованный снимок (None - ещё ни одного поколения)."""
+        return self._snapshot
+
+
+class SnapshotView:
+    """
+    Представление слота с интерфейсом Evolution, который использует Visualizer
+    (generation, grid_size, best_fitness_history, environment, get_stats,
+    get_best_snake).
+
+    Среда своя: демо-партии не трогают среду и ГСЧ потока эволюции.
+    """
+
+    def __init__(
+        self,
+        slot: SnapshotSlot,
+        grid_size: int = 20,
+        clock: str = 'wall',
+        ticks_per_second: int = TICKS_PER_SECOND
+    ):
+        """
+        Args:
+            slot: слот, в который публикует поток эволюции
+            grid_size: размер поля демо
+            clock: часы демо-змейки ('wall' или 'ticks')
+            ticks_per_second: тиков в одной секунде для режима 'ticks'
+        """
+        self.slot = slot
+        self.grid_size = grid_size
+        self.clock = clock
+        self.ticks_per_second = ticks_per_second
+        self.environment = Environment(grid_size, clock, ticks_per_second)
+
+    @property
+    def generation(self) -> int:
+        snapshot = self.slot.latest()
+        return snapshot.generation if snapshot else 0
+
+    @property
+    def best_fitness_history(self) -> Tuple[float, ...]:
+        """Последние HISTORY_TAIL значений лучшего fitness."""
+        snapshot = self.slot.latest()
+        return snapshot.best_fitness_history if snapshot else ()
+
+    def get_stats(self) -> Tuple[int, float, float]:
+        """(номер поколения, лучший fitness, средний fitness) последнего снимка."""
+        snapshot = self.slot.latest()
+        if snapshot is None:
+            return 0, 0, 0
+        return snapshot.generation, snapshot.best_fitness, snapshot.avg_fitness
+
+    def get_best_snake(self) -> Snake:
+        """Змейка с весами последнего снимка (до первого поколения - случайная)."""
+        snapshot = self.slot.latest()
+        self.environment.generation = self.generation
+        if snapshot is None:
+            # Собственный ГСЧ среды: глобальный ГСЧ принадлежит потоку эволюции
+            weights = self.environment.np_random.uniform(-1, 1, (8, 4))
+        else:
+            weights = snapshot.best_weights
+        return Snake(brain=Brain(weights=weights), grid_size=self.grid_size,
+                     clock=self.clock, ticks_per_second=self.ticks_per_second)
@@ -0,0 +1,98 @@
+"""
+Замеры холодного старта main.py (--startup-profile).
+
+Фазы запуска (разбор аргументов, импорт тяжёлых модулей, открытие БД,
+создание популяции, окно) замеряются по time.perf_counter. Для каждой фазы
+запоминаются пакеты, впервые загруженные в ней, - так видно, что именно
+тянет импорт. Модуль использует только стандартную библиотеку, чтобы сам
+не влиять на время старта.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _shown(module: str) -> bool:
+    """Показывать ли модуль: служебные (_io, cython_runtime и т.п.) скрываются."""
+    if module.startswith('_'):
+        return False
+    if module in getattr(sys, 'stdlib_module_names', ()):
+        return True
+    loaded = sys.modules.get(module)
+    return hasattr(loaded, '__file__') or hasattr(loaded, '__path__')
+
+
+def _package_order(package: str) -> Tuple[int, str]:
+    """Порядок в отчёте: сторонние пакеты, модули проекта, стандартная библиотека."""
+    if package in getattr(sys, 'stdlib_module_names', ()):
+        return 2, package
+    path = getattr(sys.modules.get(package), '__file__', None) or ''
+    if os.path.dirname(os.path.abspath(path)) == PROJECT_DIR:
+        return 1, package
+    return 0, package
+
+
+class StartupProfile:
+    """Время фаз запуска и пакеты, загруженные в каждой фазе."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, List[str]]] = []  # (фаза, секунды, новые пакеты)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Замер фазы запуска.
+
+        Args:
+            name: название фазы в отчёте
+        """
+        loaded = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            # Копия списка: фоновые потоки могут импортировать одновременно
+            packages = {
+                module.partition('.')[0] for module in list(sys.modules)
+                if module not in loaded and _shown(module)
+            }
+            self.phases.append((name, elapsed, sorted(packages, key=_package_order)))
+
+    def total(self) -> float:
+        """Время от создания профиля до текущего момента (секунды)."""
+        return time.perf_counter() - self.started
+
+    def report(self, target_ms: Optional[float] = None):
+        """
+        Вывод таблицы фаз запуска.
+
+        Args:
+            target_ms: целевое время старта в миллисекундах (None - без проверки)
+        """
+        total = self.total()
+        print("\n⏱️  Старт программы:")
+        for name, elapsed, packages in self.phases:
+            line = f"  {name:<24} {elapsed * 1e3:8.1f} мс {elapsed / total:5.0%}"
+            if packages:
+                shown = ', '.join(packages[:6])
+                if len(packages) > 6:
+                    shown += f" и ещё {len(packages) - 6}"
+                line += f"  [{shown}]"
+            print(line)
+        rest = total - sum(elapsed for _, elapsed, _ in self.phases)
+        print(f"  {'прочее':<24} {rest * 1e3:8.1f} мс")
+        print(f"  {'итого':<24} {total * 1e3:8.1f} мс (без запуска интерпретатора, "
+              f"см. python -X importtime)")
+        if target_ms is not None:
+            if total * 1e3 <= target_ms:
+                print(f"✓ Старт укладывается в цель {target_ms:.0f} мс")
+            else:
+                print(f"⚠️  Старт дольше цели {target_ms:.0f} мс на {total * 1e3 - target_ms:.1f} мс")
+        print()
@@ -3,7 +3,7 @@
 """
 
 import argparse
-from database import EvolutionDB
+from database import EvolutionDB, weights_format
 import sqlite3
 
 
@@ -29,8 +29,14 @@ def view_sessions(db_path):
     print("=" * 80)
 
 
-def view_session_details(db_path, session_id):
-    """Показать детали сессии."""
+def view_session_details(db_path, session_id, tail=20, start=None, end=None, buckets=None):
+    """
+    Показать детали сессии.
+    
+    История поколений читается по индексу: последние tail поколений,
+    диапазон start..end потоком или buckets интервалов с агрегатами,
+    поэтому вывод не зависит от длины сессии.
+    """
     db = EvolutionDB(db_path)
     
     # Информация о сессии
@@ -58,20 +64,73 @@ def view_session_details(db_path, session_id):
     print(f"  - Вероятность мутации: {session[5]}")
     print(f"  - Сила мутации: {session[6]}")
     print(f"  - Макс. шагов: {session[7]}")
-    print(f"Прогресс: {session[8] or 0} поколений")
-    print(f"Лучший fitness: {session[9] or 0:.1f}")
+    # Сводка ведётся при записи поколений: актуальна и для упавших сессий
+    stats = db.get_session_stats(session_id)
+    if stats:
+        best_fit, last_gen, _, total_steps, wall_time = stats
+        print(f"Прогресс: {last_gen} поколений")
+        print(f"Лучший fitness: {best_fit:.1f}")
+        print(f"Шагов сыграно: {total_steps:,}")
+        print(f"Время эволюции: {wall_time / 60:.1f} мин")
+    else:
+        print(f"Прогресс: {session[8] or 0} поколений")
+        print(f"Лучший fitness: {session[9] or 0:.1f}")
     print("=" * 80)
     
     # История поколений
-    history = db.get_generation_history(session_id)
-    
-    if history:
-        print("\nИстория поколений (последние 20):")
-        print(f"{'Gen':<6} {'Лучший':<10} {'Средний':<10}")
-        print("-" * 30)
+    if buckets:
+        view_history_buckets(db, session_id, buckets, start, end)
+    elif start is not None or end is not None:
+        view_history_range(db, session_id, start, end)
+    else:
+        history = db.get_generation_tail(session_id, tail)
         
-        for gen, best, avg in history[-20:]:
-            print(f"{gen:<6} {best:<10.1f} {avg:<10.1f}")
+        if history:
+            print(f"\nИстория поколений (последние {len(history)}):")
+            print(f"{'Gen':<6} {'Лучший':<10} {'Средний':<10}")
+            print("-" * 30)
+            
+            for gen, best, avg in history:
+                print(f"{gen:<6} {best:<10.1f} {avg:<10.1f}")
+
+
+def describe_range(start, end):
+    """Подпись диапазона поколений."""
+    if start is None and end is None:
+        return "вся сессия"
+    return f"поколения {start if start is not None else '...'}-{end if end is not None else '...'}"
+
+
+def view_history_range(db, session_id, start, end):
+    """Показать поколения из диапазона (строки читаются потоком)."""
+    print(f"\nИстория поколений ({describe_range(start, end)}):")
+    print(f"{'Gen':<6} {'Лучший':<10} {'Средний':<10}")
+    print("-" * 30)
+    
+    rows = 0
+    for gen, best, avg in db.iter_generation_history(session_id, start, end):
+        print(f"{gen:<6} {best:<10.1f} {avg:<10.1f}")
+        rows += 1
+    
+    if not rows:
+        print("Нет поколений в диапазоне.")
+
+
+def view_history_buckets(db, session_id, buckets, start, end):
+    """Показать историю, сжатую в интервалы с min/max/avg (агрегирует SQLite)."""
+    rows = db.get_generation_buckets(session_id, buckets, start, end)
+    
+    if not rows:
+        print("\nНет поколений в диапазоне.")
+        return
+    
+    print(f"\nИстория поколений по интервалам ({describe_range(start, end)}, интервалов: {len(rows)}):")
+    print(f"{'Gen':<16} {'Строк':<8} {'Лучший min':<12} {'max':<12} {'avg':<12} {'Средний':<10}")
+    print("-" * 74)
+    
+    for first, last, count, best_min, best_max, best_avg, avg_avg in rows:
+        gens = f"{first}-{last}"
+        print(f"{gens:<16} {count:<8} {best_min:<12.1f} {best_max:<12.1f} {best_avg:<12.1f} {avg_avg:<10.1f}")
 
 
 def view_best_snakes(db_path, session_id=None):
@@ -97,22 +156,43 @@ def view_best_snakes(db_path, session_id=None):
     
     for s_id, gen, fitness, weights in best_snakes:
         weight_size = len(weights) if weights else 0
-        print(f"{s_id:<8} {gen:<6} {fitness:<12.1f} {weight_size} байт")
+        print(f"{s_id:<8} {gen:<6} {fitness:<12.1f} {weight_size} байт ({describe_weights(weights)})")
     
     print("=" * 80)
 
 
+def describe_weights(weights):
+    """Тип, форма и сжатие весов змейки из БД."""
+    if not weights:
+        return "нет весов"
+    header = weights_format(weights)
+    if header is None:
+        return "float64, старый формат"
+    dtype, shape, compressed, _ = header
+    text = f"{dtype.name} {'x'.join(map(str, shape))}"
+    return text + ", zlib" if compressed else text
+
+
 def main():
     parser = argparse.ArgumentParser(description='Просмотр истории эволюции')
     parser.add_argument('--db', default='evolution.db', help='Путь к базе данных')
     parser.add_argument('--session', type=int, help='ID сессии для детального просмотра')
     parser.add_argument('--best', action='store_true', help='Показать лучшие змейки')
     parser.add_argument('--session-best', type=int, help='ID сессии для лучших змеек')
+    parser.add_argument('--tail', type=int, default=20, metavar='N',
+                       help='Последние N поколений в деталях сессии')
+    parser.add_argument('--from', type=int, dest='start', metavar='GEN',
+                       help='Поколения начиная с GEN (с --session)')
+    parser.add_argument('--to', type=int, dest='end', metavar='GEN',
+                       help='Поколения до GEN включительно (с --session)')
+    parser.add_argument('--buckets', type=int, metavar='K',
+                       help='Сжать историю (или диапазон) в K интервалов с min/max/avg')
     
     args = parser.parse_args()
     
     if args.session:
-        view_session_details(args.db, args.session)
+        view_session_details(args.db, args.session, tail=args.tail,
+                             start=args.start, end=args.end, buckets=args.buckets)
     elif args.best:
         view_best_snakes(args.db, session_id=args.session_best)
     else:
@@ -4,14 +4,65 @@
 
 import pygame
 import numpy as np
-from typing import Tuple
+from typing import Dict, Tuple
 from evolution import Evolution
+from environment import FreeCells
 import copy
+import random
+
+
+class SurfaceCache:
+    """
+    Кэш заранее отрисованных поверхностей эффектов.
+
+    Пульсирующие эффекты рисуются для дискретного набора фаз: значение
+    пульсации 0..1 округляется до одного из levels уровней, и каждый
+    уровень отрисовывается один раз, дальше поверхность только копируется.
+    """
+
+    def __init__(self, levels: int = 16):
+        """
+        Args:
+            levels: количество дискретных фаз пульсации
+        """
+        self.levels = levels
+        self.surfaces = {}
+
+    def level(self, value: float, levels: int = None) -> int:
+        """Номер дискретной фазы для значения пульсации 0..1."""
+        levels = levels or self.levels
+        return int(round(min(1.0, max(0.0, value)) * (levels - 1)))
+
+    def phase(self, level: int, levels: int = None) -> float:
+        """Значение пульсации 0..1 для номера фазы."""
+        levels = levels or self.levels
+        return level / (levels - 1)
+
+    def get(self, key, render):
+        """
+        Поверхность (или любой результат отрисовки) по ключу.
+
+        Args:
+            key: ключ эффекта (имя, цвета, фаза, размеры)
+            render: функция без аргументов, вызывается при промахе
+        """
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = render()
+        return surface
+
+    def clear(self):
+        """Сброс кэша (например, при смене размера клетки)."""
+        self.surfaces.clear()
 
 
 class Visualizer:
     """Визуализатор для pygame."""
     
+    BODY_LEVELS = 64  # Уровни градиента яркости тела змейки
+    AMBIENT_MS = 250  # Период фоновых анимаций и счётчиков при отрисовке грязных прямоугольников
+    MAX_DIRTY_RECTS = 32  # Больше областей за кадр - дешевле собрать поле целиком
+    
     # СТРИМ-ДИЗАЙН: Яркая неоновая палитра для максимальной видимости
     COLORS = {
         # Фон - глубокий черный с легким синим оттенком
@@ -73,11 +124,15 @@ class Visualizer:
         'particle': (255, 255, 255),        # Белые частицы
     }
     
-    def __init__(self, evolution: Evolution, cell_size: int = 20):
+    def __init__(self, evolution: Evolution, cell_size: int = 20, fast_forward: int = 10,
+                 dirty_rects: bool = True):
         """
         Args:
-            evolution: объект Evolution
+            evolution: объект Evolution или SnapshotView (эволюция в отдельном потоке)
             cell_size: размер одной клетки в пикселях
+            fast_forward: шагов демо на один кадр в режиме перемотки (клавиша F)
+            dirty_rects: обновлять на экране только изменившиеся области
+                         (False - перерисовка всего окна каждый кадр)
         """
         self.evolution = evolution
         self.cell_size = cell_size
@@ -85,6 +140,9 @@ class Visualizer:
         self.width = self.grid_size * cell_size + 400  # +400 для улучшенной статистики
         self.height = self.grid_size * cell_size + 120  # +120 для статус-бара
         
+        # Параметры микшера до pygame.init(): иначе init() открывает его с
+        # настройками по умолчанию (44100 Гц), и mixer.init() уже ничего не меняет
+        pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=512)
         pygame.init()
         pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
         self.screen = pygame.display.set_mode((self.width, self.height))
@@ -108,8 +166,13 @@ class Visualizer:
         self.demo_step = 0
         self.demo_max_steps = 10000  # Увеличен лимит для длинных игр
         self.demo_last_food_step = 0  # Шаг когда последний раз ела (для совместимости)
+        self.demo_free_cells = FreeCells(self.grid_size)  # Свободные клетки демо-поля
         self.death_timer = 0  # Таймер для задержки после смерти
         
+        # Перемотка: отрисовывается только каждый N-й шаг демо
+        self.fast_forward_steps = max(1, fast_forward)
+        self.fast_forward = False
+        
         # Таймер для авторежима
         self.auto_timer = 0
         self.auto_delay = 10000  # 10 секунд в миллисекундах
@@ -127,62 +190,142 @@ class Visualizer:
         # Анимационные параметры
         self.time_offset = 0
         
-        # Звуковые эффекты
+        # Заранее отрисованные свечения и слои сетки
+        self.surface_cache = SurfaceCache()
+        
+        # Отрисовка грязных прямоугольников: слой тела змейки обновляется
+        # по изменившимся клеткам, панели - при изменении их значений
+        self.dirty_rects = dirty_rects
+        self.body_layer = pygame.Surface((self.grid_size * cell_size, self.grid_size * cell_size),
+                                         pygame.SRCALPHA)
+        self.stats_layout = None  # Границы полос панели, известны после первой отрисовки
+        self.reset_dirty_state()
+        
+        # Звуковые эффекты: синтезируются один раз, каждый на своём канале
+        # микшера - новый звук того же вида прерывает старый, а не копится
         self.sound_enabled = True
         self.last_sound_gen = -1  # Для отслеживания смены поколения
         self.last_sound_eat = False  # Для еды
         self.last_sound_death = False  # Для смерти
         self.last_sound_stuck = False  # Для застревания
+        self.sounds = self._build_sound_bank()
+        pygame.mixer.set_reserved(len(self.sounds))
+        self.sound_channels = {name: pygame.mixer.Channel(i) for i, name in enumerate(self.sounds)}
+    
+    def _beep_samples(self, frequency: int, duration: int, volume: float = 0.3) -> np.ndarray:
+        """
+        Отсчёты синусоидального сигнала (int16, столбец на канал микшера).
+        
+        Args:
+            frequency: частота в Гц
+            duration: длительность в мс
+            volume: громкость 0..1
+        """
+        sample_rate, _, channels = pygame.mixer.get_init()
+        n_samples = int(duration * sample_rate / 1000)
+        wave = 4096 * np.sin(2 * np.pi * frequency * np.arange(n_samples) / sample_rate) * volume
+        # astype отбрасывает дробную часть, как int()
+        return np.repeat(wave.astype(np.int16)[:, None], channels, axis=1)
     
     def generate_beep(self, frequency: int, duration: int, volume: float = 0.3):
         """Генерация простого звукового сигнала."""
-        sample_rate = 22050
-        n_samples = int(duration * sample_rate / 1000)
-        arr = np.zeros((n_samples, 2), dtype=np.int16)
-        max_sample = 2**(16 - 1) - 1
-        
-        for i in range(n_samples):
-            wave = 4096 * np.sin(2 * np.pi * frequency * i / sample_rate) * volume
-            arr[i][0] = int(wave)
-            arr[i][1] = int(wave)
-        
-        return pygame.sndarray.make_sound(arr)
+        return pygame.sndarray.make_sound(self._beep_samples(frequency, duration, volume))
+    
+    def _build_sound_bank(self) -> Dict[str, pygame.mixer.Sound]:
+        """Все звуки визуализатора (синтез занимает доли миллисекунды)."""
+        # Восходящий звук смены поколения: тоны по 100 мс каждые 50 мс,
+        # заранее сведённые в один буфер вместо ожидания между ними
+        sample_rate = pygame.mixer.get_init()[0]
+        offset = int(50 * sample_rate / 1000)
+        tones = [self._beep_samples(freq, 100, 0.2) for freq in (400, 600, 800)]
+        chime = np.zeros((offset * (len(tones) - 1) + len(tones[-1]), tones[0].shape[1]), dtype=np.int32)
+        for i, tone in enumerate(tones):
+            chime[i * offset:i * offset + len(tone)] += tone
+        chime = np.clip(chime, -32768, 32767).astype(np.int16)
+        
+        return {
+            'food': self.generate_beep(800, 50, 0.2),
+            'death': self.generate_beep(200, 300, 0.5),
+            'stuck': self.generate_beep(400, 200, 0.3),
+            'generation': pygame.sndarray.make_sound(chime),
+        }
+    
+    def _play(self, name: str):
+        """Звук из банка на его канале (не ждёт окончания)."""
+        self.sound_channels[name].play(self.sounds[name])
     
     def play_sound_food(self):
         """Звук поедания еды."""
         if self.sound_enabled and not self.last_sound_eat:
-            sound = self.generate_beep(800, 50, 0.2)
-            sound.play()
+            self._play('food')
             self.last_sound_eat = True
     
     def play_sound_death(self):
         """Звук смерти."""
         if self.sound_enabled and not self.last_sound_death:
-            sound = self.generate_beep(200, 300, 0.5)
-            sound.play()
+            self._play('death')
             self.last_sound_death = True
     
     def play_sound_stuck(self):
         """Звук застревания."""
         if self.sound_enabled and not self.last_sound_stuck:
-            sound = self.generate_beep(400, 200, 0.3)
-            sound.play()
+            self._play('stuck')
             self.last_sound_stuck = True
     
     def play_sound_generation(self):
         """Звук смены поколения."""
         if self.sound_enabled and self.last_sound_gen != self.evolution.generation:
-            # Восходящий звук
-            for i, freq in enumerate([400, 600, 800]):
-                sound = self.generate_beep(freq, 100, 0.2)
-                sound.play()
-                pygame.time.wait(50)
+            self._play('generation')
             self.last_sound_gen = self.evolution.generation
     
+    def _render_grid_lines(self, pulse: float) -> pygame.Surface:
+        """Слой основных линий сетки (фон слоя прозрачен через colorkey)."""
+        grid_width = self.grid_size * self.cell_size
+        grid_height = self.grid_size * self.cell_size
+        layer = pygame.Surface((grid_width + 1, grid_height + 1))
+        layer.fill(self.COLORS['background'])
+        layer.set_colorkey(self.COLORS['background'])
+        
+        alpha = 0.3 * pulse
+        grid_color = tuple(int(c * alpha) for c in self.COLORS['grid'])
+        for x in range(0, self.grid_size + 1):
+            pygame.draw.line(layer, grid_color, (x * self.cell_size, 0), (x * self.cell_size, grid_height), 1)
+        for y in range(0, self.grid_size + 1):
+            pygame.draw.line(layer, grid_color, (0, y * self.cell_size), (grid_width, y * self.cell_size), 1)
+        return layer
+    
+    def _render_grid_accents(self, glow_pulse: float) -> pygame.Surface:
+        """Слой акцентных линий каждые 5 клеток с многослойным свечением."""
+        grid_width = self.grid_size * self.cell_size
+        grid_height = self.grid_size * self.cell_size
+        layer = pygame.Surface((grid_width + 1, grid_height + 1))
+        layer.fill(self.COLORS['background'])
+        layer.set_colorkey(self.COLORS['background'])
+        
+        highlight_color = tuple(int(c * glow_pulse * 0.8) for c in self.COLORS['grid_highlight'])
+        glow_colors = []
+        for glow_layer in range(3, 0, -1):
+            glow_alpha = 0.3 / glow_layer * glow_pulse
+            glow_colors.append(tuple(int(c * glow_alpha) for c in self.COLORS['grid_highlight']))
+        for x in range(5, self.grid_size, 5):
+            px = x * self.cell_size
+            pygame.draw.line(layer, highlight_color, (px, 0), (px, grid_height), 2)
+            for offset, glow_color in zip(range(3, 0, -1), glow_colors):
+                pygame.draw.line(layer, glow_color, (px - offset, 0), (px - offset, grid_height), 1)
+                pygame.draw.line(layer, glow_color, (px + offset, 0), (px + offset, grid_height), 1)
+        for y in range(5, self.grid_size, 5):
+            py = y * self.cell_size
+            pygame.draw.line(layer, highlight_color, (0, py), (grid_width, py), 2)
+            for offset, glow_color in zip(range(3, 0, -1), glow_colors):
+                pygame.draw.line(layer, glow_color, (0, py - offset), (grid_width, py - offset), 1)
+                pygame.draw.line(layer, glow_color, (0, py + offset), (grid_width, py + offset), 1)
+        return layer
+    
     def draw_grid(self):
         """СТРИМ-ДИЗАЙН: Яркая неоновая сетка с эффектом свечения."""
         grid_width = self.grid_size * self.cell_size
         grid_height = self.grid_size * self.cell_size
+        cache = self.surface_cache
         
         # Глубокий черный фон
         grid_rect = pygame.Rect(0, 0, grid_width, grid_height)
@@ -198,162 +341,168 @@ class Visualizer:
             dot_color = tuple(int(c * alpha) for c in (0, 100, 150))
             pygame.draw.circle(self.screen, dot_color, (x, y), 1)
         
-        # Яркие неоновые линии сетки
-        pulse = abs(np.sin(current_time / 1500.0)) * 0.3 + 0.7
+        # Яркие неоновые линии сетки - слой на каждую фазу пульсации,
+        # отрисовывается один раз для размера поля
+        level = cache.level(abs(np.sin(current_time / 1500.0)))
+        lines = cache.get(('grid_lines', self.grid_size, level),
+                          lambda: self._render_grid_lines(cache.phase(level) * 0.3 + 0.7))
+        self.screen.blit(lines, (0, 0))
         
-        # Основные линии - яркий циан с пульсацией
-        for x in range(0, self.grid_size + 1):
-            alpha = 0.3 * pulse
-            grid_color = tuple(int(c * alpha) for c in self.COLORS['grid'])
-            start_pos = (x * self.cell_size, 0)
-            end_pos = (x * self.cell_size, grid_height)
-            pygame.draw.line(self.screen, grid_color, start_pos, end_pos, 1)
+        # Яркие акцентные линии каждые 5 клеток - пурпурный неон
+        level = cache.level(abs(np.sin(current_time / 1000.0)))
+        accents = cache.get(('grid_accents', self.grid_size, level),
+                            lambda: self._render_grid_accents(cache.phase(level) * 0.5 + 0.5))
+        self.screen.blit(accents, (0, 0))
+    
+    def _render_snake_head(self, snake_color, glow_color, pulse_offset: int, pulse: float):
+        """
+        Спрайт головы: 8 слоёв свечения, голова и внутреннее ядро.
         
-        for y in range(0, self.grid_size + 1):
-            alpha = 0.3 * pulse
-            grid_color = tuple(int(c * alpha) for c in self.COLORS['grid'])
-            start_pos = (0, y * self.cell_size)
-            end_pos = (grid_width, y * self.cell_size)
-            pygame.draw.line(self.screen, grid_color, start_pos, end_pos, 1)
+        Args:
+            pulse_offset: расширение свечения в пикселях
+            pulse: фаза пульсации для яркости свечения
         
-        # Яркие акцентные линии каждые 5 клеток - пурпурный неон
-        glow_pulse = abs(np.sin(current_time / 1000.0)) * 0.5 + 0.5
-        for x in range(0, self.grid_size + 1, 5):
-            if x > 0 and x < self.grid_size:
-                # Основная линия
-                highlight_color = tuple(int(c * glow_pulse * 0.8) for c in self.COLORS['grid_highlight'])
-                start_pos = (x * self.cell_size, 0)
-                end_pos = (x * self.cell_size, grid_height)
-                pygame.draw.line(self.screen, highlight_color, start_pos, end_pos, 2)
-                # Многослойное свечение
-                for glow_layer in range(3, 0, -1):
-                    glow_alpha = 0.3 / glow_layer * glow_pulse
-                    glow_color = tuple(int(c * glow_alpha) for c in self.COLORS['grid_highlight'])
-                    offset = glow_layer
-                    pygame.draw.line(self.screen, glow_color, 
-                                   (x * self.cell_size - offset, 0), 
-                                   (x * self.cell_size - offset, grid_height), 1)
-                    pygame.draw.line(self.screen, glow_color, 
-                                   (x * self.cell_size + offset, 0), 
-                                   (x * self.cell_size + offset, grid_height), 1)
-        
-        for y in range(0, self.grid_size + 1, 5):
-            if y > 0 and y < self.grid_size:
-                highlight_color = tuple(int(c * glow_pulse * 0.8) for c in self.COLORS['grid_highlight'])
-                start_pos = (0, y * self.cell_size)
-                end_pos = (grid_width, y * self.cell_size)
-                pygame.draw.line(self.screen, highlight_color, start_pos, end_pos, 2)
-                for glow_layer in range(3, 0, -1):
-                    glow_alpha = 0.3 / glow_layer * glow_pulse
-                    glow_color = tuple(int(c * glow_alpha) for c in self.COLORS['grid_highlight'])
-                    offset = glow_layer
-                    pygame.draw.line(self.screen, glow_color, 
-                                   (0, y * self.cell_size - offset), 
-                                   (grid_width, y * self.cell_size - offset), 1)
-                    pygame.draw.line(self.screen, glow_color, 
-                                   (0, y * self.cell_size + offset), 
-                                   (grid_width, y * self.cell_size + offset), 1)
+        Returns:
+            (поверхность, отступ клетки внутри спрайта)
+        """
+        pad = (pulse_offset + 8 * 4) // 2 + 1
+        size = self.cell_size + pad * 2
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        px = py = pad
+        margin = 1
+        
+        # Многослойное пульсирующее свечение (8 слоев для эффекта)
+        for glow_layer in range(8, 0, -1):
+            glow_size = self.cell_size + pulse_offset + glow_layer * 4
+            glow_rect = pygame.Rect(
+                px - (glow_size - self.cell_size) // 2,
+                py - (glow_size - self.cell_size) // 2,
+                glow_size, glow_size
+            )
+            alpha = 1.0 / (glow_layer + 1) * 0.6 * (0.8 + pulse * 0.2)
+            glow_col = tuple(int(c * alpha) for c in glow_color)
+            pygame.draw.rect(sprite, glow_col, glow_rect, width=1, border_radius=8)
+        
+        # Голова - яркий неон
+        head_rect = pygame.Rect(px + margin, py + margin,
+                              self.cell_size - margin * 2, self.cell_size - margin * 2)
+        # Внешнее свечение
+        pygame.draw.rect(sprite, tuple(int(c * 0.8) for c in snake_color), 
+                       head_rect, border_radius=8)
+        # Основной цвет (максимальная яркость)
+        pygame.draw.rect(sprite, snake_color, head_rect, border_radius=8)
+        # Внутреннее ядро
+        inner_rect = pygame.Rect(px + margin + 3, py + margin + 3,
+                                self.cell_size - margin * 2 - 6, self.cell_size - margin * 2 - 6)
+        pygame.draw.rect(sprite, self.COLORS['snake_head_glow'], 
+                       inner_rect, border_radius=5)
+        return sprite, pad
+    
+    def _render_snake_segment(self, snake_color, body_progress: float):
+        """
+        Спрайт сегмента тела с заданной яркостью градиента.
+        
+        Returns:
+            (поверхность клетки, цвет линии связи с предыдущим сегментом)
+        """
+        sprite = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
+        margin = 1
+        body_alpha = 0.7 + body_progress * 0.3
+        body_color = tuple(int(c * body_alpha) for c in snake_color)
+        
+        body_rect = pygame.Rect(margin, margin,
+                               self.cell_size - margin * 2, self.cell_size - margin * 2)
+        
+        # Свечение тела
+        glow_alpha = 0.4 * body_alpha
+        pygame.draw.rect(sprite, tuple(int(c * glow_alpha) for c in snake_color), 
+                       body_rect, width=2, border_radius=5)
+        # Основной цвет
+        pygame.draw.rect(sprite, body_color, body_rect, border_radius=5)
+        
+        # Центральная точка энергии
+        center = (self.cell_size // 2, self.cell_size // 2)
+        center_brightness = int(200 + body_progress * 55)
+        center_color = tuple(min(255, int(c * (center_brightness / 255.0))) for c in snake_color)
+        pygame.draw.circle(sprite, center_color, center, 3)
+        
+        line_alpha = 0.7 * body_alpha
+        line_color = tuple(int(c * line_alpha) for c in snake_color)
+        return sprite, line_color
+    
+    @classmethod
+    def snake_colors(cls, generation: int) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        """Цвет змейки и свечения головы по поколению (яркие неоновые цвета)."""
+        if generation < 100:
+            return cls.COLORS['snake_gen1'], (0, 255, 200)  # Яркий неоновый зеленый
+        elif generation < 500:
+            return cls.COLORS['snake_gen2'], (100, 255, 255)  # Яркий циан
+        elif generation < 1000:
+            return cls.COLORS['snake_gen3'], (255, 100, 255)  # Яркий пурпурный
+        return cls.COLORS['snake_gen4'], (255, 255, 150)  # Яркий желтый (элита)
+    
+    def _snake_colors(self) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        """Цвета змейки для текущего поколения эволюции."""
+        gen = self.evolution.generation if hasattr(self.evolution, 'generation') else 0
+        return self.snake_colors(gen)
+    
+    def _snake_head_sprite(self, snake_color, glow_color, current_time: int):
+        """Спрайт головы для текущей фазы пульсации: (поверхность, отступ)."""
+        cache = self.surface_cache
+        pulse = abs(np.sin(current_time / 150.0))  # Быстрая пульсация
+        pulse_offset = int(pulse * 5)
+        level = cache.level(pulse)
+        return cache.get(
+            ('snake_head', snake_color, glow_color, pulse_offset, level),
+            lambda: self._render_snake_head(snake_color, glow_color, pulse_offset,
+                                            cache.phase(level)))
+    
+    def _draw_snake_eyes(self, px: int, py: int, glow_color, current_time: int):
+        """Яркие глаза-сенсоры головы в клетке (px, py)."""
+        eye_pulse = abs(np.sin(current_time / 200.0))
+        eye_brightness = int(255 * (0.8 + eye_pulse * 0.2))
+        eye_color = (eye_brightness, eye_brightness, eye_brightness)
+        pygame.draw.circle(self.screen, eye_color, (px + 7, py + 7), 4)
+        pygame.draw.circle(self.screen, eye_color, 
+                          (px + self.cell_size - 7, py + 7), 4)
+        pygame.draw.circle(self.screen, glow_color, (px + 7, py + 7), 3)
+        pygame.draw.circle(self.screen, glow_color, 
+                          (px + self.cell_size - 7, py + 7), 3)
     
     def draw_snake(self, snake):
         """СТРИМ-ДИЗАЙН: Яркая неоновая змейка с мощным свечением."""
-        # Определяем цвет на основе поколения (яркие неоновые цвета)
-        gen = self.evolution.generation if hasattr(self.evolution, 'generation') else 0
-        if gen < 100:
-            snake_color = self.COLORS['snake_gen1']  # Яркий неоновый зеленый
-            glow_color = (0, 255, 200)
-        elif gen < 500:
-            snake_color = self.COLORS['snake_gen2']  # Яркий циан
-            glow_color = (100, 255, 255)
-        elif gen < 1000:
-            snake_color = self.COLORS['snake_gen3']  # Яркий пурпурный
-            glow_color = (255, 100, 255)
-        else:
-            snake_color = self.COLORS['snake_gen4']  # Яркий желтый (элита)
-            glow_color = (255, 255, 150)
+        snake_color, glow_color = self._snake_colors()
         
         # Мощная пульсация энергии
         current_time = pygame.time.get_ticks()
-        pulse = abs(np.sin(current_time / 150.0))  # Быстрая пульсация
-        pulse_offset = int(pulse * 5)
-        
-        for i, (x, y) in enumerate(snake.body):
+        if snake.body:  # Голова - мощное свечение
+            x, y = snake.body[0]
+            px, py = x * self.cell_size, y * self.cell_size
+            sprite, pad = self._snake_head_sprite(snake_color, glow_color, current_time)
+            self.screen.blit(sprite, (px - pad, py - pad))
+            self._draw_snake_eyes(px, py, glow_color, current_time)
+        self._draw_snake_body(snake.body, snake_color)
+    
+    def _draw_snake_body(self, body, snake_color):
+        """Сегменты тела (без головы) с линиями связи прямо на экране."""
+        cache = self.surface_cache
+        half = self.cell_size // 2
+        last = max(1, len(body) - 1)
+        prev_center = None
+        for i, (x, y) in enumerate(body):
             px = x * self.cell_size
             py = y * self.cell_size
-            margin = 1
-            
-            # Градиент яркости по длине тела
-            body_progress = i / max(1, len(snake.body) - 1)
-            if i == 0:
-                body_progress = 1.0
-            
-            if i == 0:  # Голова - мощное свечение
-                # Многослойное пульсирующее свечение (8 слоев для эффекта)
-                for glow_layer in range(8, 0, -1):
-                    glow_size = self.cell_size + pulse_offset + glow_layer * 4
-                    glow_rect = pygame.Rect(
-                        px - (glow_size - self.cell_size) // 2,
-                        py - (glow_size - self.cell_size) // 2,
-                        glow_size, glow_size
-                    )
-                    alpha = 1.0 / (glow_layer + 1) * 0.6 * (0.8 + pulse * 0.2)
-                    glow_col = tuple(int(c * alpha) for c in glow_color)
-                    pygame.draw.rect(self.screen, glow_col, glow_rect, width=1, border_radius=8)
-                
-                # Голова - яркий неон
-                head_rect = pygame.Rect(px + margin, py + margin,
-                                      self.cell_size - margin * 2, self.cell_size - margin * 2)
-                # Внешнее свечение
-                pygame.draw.rect(self.screen, tuple(int(c * 0.8) for c in snake_color), 
-                               head_rect, border_radius=8)
-                # Основной цвет (максимальная яркость)
-                pygame.draw.rect(self.screen, snake_color, head_rect, border_radius=8)
-                # Внутреннее ядро
-                inner_rect = pygame.Rect(px + margin + 3, py + margin + 3,
-                                        self.cell_size - margin * 2 - 6, self.cell_size - margin * 2 - 6)
-                pygame.draw.rect(self.screen, self.COLORS['snake_head_glow'], 
-                               inner_rect, border_radius=5)
-                
-                # Яркие глаза-сенсоры
-                eye_pulse = abs(np.sin(current_time / 200.0))
-                eye_brightness = int(255 * (0.8 + eye_pulse * 0.2))
-                eye_color = (eye_brightness, eye_brightness, eye_brightness)
-                pygame.draw.circle(self.screen, eye_color, (px + 7, py + 7), 4)
-                pygame.draw.circle(self.screen, eye_color, 
-                                  (px + self.cell_size - 7, py + 7), 4)
-                pygame.draw.circle(self.screen, glow_color, (px + 7, py + 7), 3)
-                pygame.draw.circle(self.screen, glow_color, 
-                                  (px + self.cell_size - 7, py + 7), 3)
-            else:
-                # Тело - яркое с градиентом
-                body_alpha = 0.7 + body_progress * 0.3
-                body_color = tuple(int(c * body_alpha) for c in snake_color)
-                
-                body_rect = pygame.Rect(px + margin, py + margin,
-                                       self.cell_size - margin * 2, self.cell_size - margin * 2)
-                
-                # Свечение тела
-                glow_alpha = 0.4 * body_alpha
-                pygame.draw.rect(self.screen, tuple(int(c * glow_alpha) for c in snake_color), 
-                               body_rect, width=2, border_radius=5)
-                # Основной цвет
-                pygame.draw.rect(self.screen, body_color, body_rect, border_radius=5)
-                
-                # Центральная точка энергии
-                center = (px + self.cell_size // 2, py + self.cell_size // 2)
-                center_brightness = int(200 + body_progress * 55)
-                center_color = tuple(min(255, int(c * (center_brightness / 255.0))) for c in snake_color)
-                pygame.draw.circle(self.screen, center_color, center, 3)
+            if i > 0:
+                # Тело - яркое с градиентом (спрайт на уровень яркости)
+                level = cache.level(i / last, self.BODY_LEVELS)
+                sprite, line_color = cache.get(
+                    ('snake_segment', snake_color, level),
+                    lambda: self._render_snake_segment(snake_color, cache.phase(level, self.BODY_LEVELS)))
+                self.screen.blit(sprite, (px, py))
                 
                 # Яркая светящаяся линия связи
-                if i > 0:
-                    prev_pos = snake.body[i-1]
-                    prev_px = prev_pos[0] * self.cell_size + self.cell_size // 2
-                    prev_py = prev_pos[1] * self.cell_size + self.cell_size // 2
-                    curr_px = x * self.cell_size + self.cell_size // 2
-                    curr_py = y * self.cell_size + self.cell_size // 2
-                    line_alpha = 0.7 * body_alpha
-                    line_color = tuple(int(c * line_alpha) for c in snake_color)
-                    pygame.draw.line(self.screen, line_color, (prev_px, prev_py), (curr_px, curr_py), 3)
+                pygame.draw.line(self.screen, line_color, prev_center, (px + half, py + half), 3)
+            prev_center = (px + half, py + half)
     
     def draw_walls(self, walls):
         """Отрисовка статичных стен (препятствий)."""
@@ -514,6 +663,41 @@ class Visualizer:
             pygame.draw.circle(self.screen, self.COLORS['bonus_glow'], center, 6)
             self.screen.blit(bonus_text, bonus_rect)
     
+    def _render_food_glow(self, pulse_size: int, pulse1: float):
+        """
+        Спрайт еды без вращающихся частей: 10 колец свечения, круги и ядро.
+        
+        Returns:
+            (поверхность, радиус - расстояние от края спрайта до центра)
+        """
+        radius = self.cell_size // 2 + pulse_size + 10 * 3 + 1
+        sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+        center = (radius, radius)
+        
+        # Многослойное магнитное свечение (10 слоев для максимального эффекта)
+        for layer in range(10, 0, -1):
+            ring_radius = self.cell_size // 2 + pulse_size + layer * 3
+            alpha = 1.0 / (layer + 1) * 0.5 * (0.9 + pulse1 * 0.1)
+            glow_col = tuple(int(c * alpha) for c in self.COLORS['food_glow'])
+            pygame.draw.circle(sprite, glow_col, center, ring_radius, width=1)
+        
+        # Основной круг - яркий неон
+        outer_radius = self.cell_size // 2 + pulse_size
+        pygame.draw.circle(sprite, self.COLORS['food'], center, outer_radius, width=3)
+        
+        # Средний слой
+        mid_radius = self.cell_size // 2 + pulse_size // 2
+        mid_color = tuple(int(c * 0.9) for c in self.COLORS['food'])
+        pygame.draw.circle(sprite, mid_color, center, mid_radius, width=2)
+        
+        # Ядро - максимальная яркость
+        core_radius = self.cell_size // 2 - 1
+        pygame.draw.circle(sprite, self.COLORS['food'], center, core_radius)
+        
+        # Внутреннее белое ядро
+        pygame.draw.circle(sprite, self.COLORS['food_core'], center, core_radius - 3)
+        return sprite, radius
+    
     def draw_food(self, food_pos):
         """СТРИМ-ДИЗАЙН: Яркая неоновая еда с мощными эффектами."""
         x, y = food_pos
@@ -523,59 +707,44 @@ class Visualizer:
         
         current_time = pygame.time.get_ticks()
         import math
+        cache = self.surface_cache
         
         # Мощная пульсация (быстрая и заметная)
         pulse1 = abs(np.sin(current_time / 200.0))
         pulse2 = abs(np.sin(current_time / 350.0))
         pulse_size = int((pulse1 * 0.7 + pulse2 * 0.3) * 8)
         
-        # Многослойное магнитное свечение (10 слоев для максимального эффекта)
-        for layer in range(10, 0, -1):
-            radius = self.cell_size // 2 + pulse_size + layer * 3
-            alpha = 1.0 / (layer + 1) * 0.5 * (0.9 + pulse1 * 0.1)
-            glow_col = tuple(int(c * alpha) for c in self.COLORS['food_glow'])
-            pygame.draw.circle(self.screen, glow_col, center, radius, width=1)
+        # Кольца свечения, круги и ядро - готовый спрайт на фазу пульсации
+        level = cache.level(pulse1)
+        sprite, radius = cache.get(('food', pulse_size, level),
+                                   lambda: self._render_food_glow(pulse_size, cache.phase(level)))
+        self.screen.blit(sprite, (center[0] - radius, center[1] - radius))
         
-        # Вращающиеся частицы (больше частиц для эффекта)
+        # Вращающиеся частицы (больше частиц для эффекта; лежат между
+        # кольцами свечения и основным кругом, с кругами не пересекаются)
         particle_count = 8
         rotation = current_time / 600.0
+        particle_alpha = 0.8 + pulse1 * 0.2
+        particle_color = tuple(int(c * particle_alpha) for c in self.COLORS['food_particles'])
+        particle_dist = self.cell_size // 2 + pulse_size + 8
         for i in range(particle_count):
             angle = (i / particle_count) * 2 * math.pi + rotation
-            particle_dist = self.cell_size // 2 + pulse_size + 8
             particle_x = center[0] + int(math.cos(angle) * particle_dist)
             particle_y = center[1] + int(math.sin(angle) * particle_dist)
-            particle_alpha = 0.8 + pulse1 * 0.2
-            particle_color = tuple(int(c * particle_alpha) for c in self.COLORS['food_particles'])
             pygame.draw.circle(self.screen, particle_color, (particle_x, particle_y), 3)
         
-        # Основной круг - яркий неон
-        outer_radius = self.cell_size // 2 + pulse_size
-        pygame.draw.circle(self.screen, self.COLORS['food'], center, outer_radius, width=3)
-        
-        # Средний слой
-        mid_radius = self.cell_size // 2 + pulse_size // 2
-        mid_color = tuple(int(c * 0.9) for c in self.COLORS['food'])
-        pygame.draw.circle(self.screen, mid_color, center, mid_radius, width=2)
-        
-        # Ядро - максимальная яркость
-        core_radius = self.cell_size // 2 - 1
-        pygame.draw.circle(self.screen, self.COLORS['food'], center, core_radius)
-        
-        # Внутреннее белое ядро
-        inner_radius = core_radius - 3
-        pygame.draw.circle(self.screen, self.COLORS['food_core'], center, inner_radius)
-        
         # Вращающийся световой крест (быстрее)
+        inner_radius = self.cell_size // 2 - 4
         cross_rotation = current_time / 800.0
         cross_size = int(pulse_size + 6)
+        flash_alpha = 0.9 + pulse1 * 0.1
+        flash_color = tuple(int(c * flash_alpha) for c in self.COLORS['food_flash'])
         for i in range(4):
             angle = (i * math.pi / 2) + cross_rotation
             start_x = center[0] + int(math.cos(angle) * (inner_radius - 1))
             start_y = center[1] + int(math.sin(angle) * (inner_radius - 1))
             end_x = center[0] + int(math.cos(angle) * cross_size)
             end_y = center[1] + int(math.sin(angle) * cross_size)
-            flash_alpha = 0.9 + pulse1 * 0.1
-            flash_color = tuple(int(c * flash_alpha) for c in self.COLORS['food_flash'])
             pygame.draw.line(self.screen, flash_color, (start_x, start_y), (end_x, end_y), 3)
         
         # Яркая центральная точка
@@ -645,10 +814,7 @@ class Visualizer:
         hunger_bar_width = bar_width // 2 - padding
         hunger_bar_height = 30
         
-        # Макс голод = 8 секунд (по времени, не по шагам)
-        max_hunger_seconds = 8.0
-        hunger_percent = 1.0 - snake.get_hunger_percent(max_hunger_seconds)
-        hunger_percent = max(0.0, min(1.0, hunger_percent))  # Ограничиваем 0-1
+        hunger_percent = self._hunger_left(snake)
         
         # Фон прогресс-бара
         pygame.draw.rect(self.screen, self.COLORS['progress_bar_bg'], 
@@ -708,6 +874,13 @@ class Visualizer:
                    hunger_bar_y + hunger_bar_height // 2))
         self.screen.blit(hunger_level_text, hunger_level_rect)
     
+    def _hunger_left(self, snake) -> float:
+        """Оставшийся запас сытости змейки (0-1)."""
+        # Макс голод = 8 секунд (по времени, не по шагам)
+        max_hunger_seconds = 8.0
+        hunger_percent = 1.0 - snake.get_hunger_percent(max_hunger_seconds)
+        return max(0.0, min(1.0, hunger_percent))  # Ограничиваем 0-1
+    
     def draw_stats(self, generation: int, best_fitness: float, avg_fitness: float):
         """Отрисовка улучшенной статистики с современным дизайном."""
         x_offset = self.grid_size * self.cell_size
@@ -770,6 +943,7 @@ class Visualizer:
                            (cursor_x, y_offset + title.get_height()), 3)
         
         y_offset += 50
+        rows_top = y_offset - 2  # Верх подсветки первой строки
         
         # Данные в стиле терминала
         stats_items = [
@@ -814,8 +988,10 @@ class Visualizer:
                 '   следующего поколения'
             ]
         else:
+            fast_forward = f'x{self.fast_forward_steps}' if self.fast_forward else 'выкл.'
             instructions = [
                 '⏸️  PAUSE - пауза',
+                f'⏩  F - перемотка ({fast_forward})',
                 '⏹️  ESC - выход',
                 '',
                 f'🎮 Шагов: {self.demo_step}/{self.demo_max_steps}'
@@ -826,12 +1002,16 @@ class Visualizer:
                         (x_offset - 20, y_offset - 10), 
                         (self.grid_size * self.cell_size + panel_width - 30, y_offset - 10), 1)
         y_offset -= 10
+        help_top = y_offset
         
         for instr in instructions:
             text = self.tiny_font.render(instr, True, self.COLORS['text_dim'])
             self.screen.blit(text, (x_offset, y_offset))
             y_offset += 22
         
+        # Границы полос панели для перерисовки по частям (draw_panels)
+        self.stats_layout = (rows_top, help_top, y_offset)
+        
         # График прогресса
         if len(self.evolution.best_fitness_history) > 1:
             y_offset += 20
@@ -841,15 +1021,63 @@ class Visualizer:
             
             self.draw_mini_chart(x_offset, y_offset, 300, 80)
     
+    def _render_chart_frame(self, width: int, height: int) -> pygame.Surface:
+        """Фон графика с сеткой осциллографа."""
+        frame = pygame.Surface((width, height))
+        frame.fill(self.COLORS['chart_bg'])
+        # Сетка осциллографа - приглушенный неон
+        grid_alpha = 0.2
+        grid_color = tuple(int(c * grid_alpha) for c in self.COLORS['grid_dim'])
+        for grid_y in range(10, height - 10, 20):
+            pygame.draw.line(frame, grid_color, (5, grid_y), (width - 5, grid_y), 1)
+        return frame
+    
+    def _chart_line_colors(self, n_points: int) -> list:
+        """Цвета отрезков графика: яркость растёт к последнему поколению."""
+        colors = []
+        for i in range(n_points - 1):
+            line_progress = i / (n_points - 1)
+            line_alpha = 0.7 + line_progress * 0.3
+            colors.append(tuple(int(c * line_alpha) for c in self.COLORS['chart_line']))
+        return colors
+    
+    def _render_chart_end(self, pulse_size: int):
+        """
+        Спрайт конца графика: 5 слоёв свечения и яркая точка.
+        
+        Args:
+            pulse_size: расширение свечения в пикселях (0-4)
+        
+        Returns:
+            (поверхность, радиус - расстояние от края спрайта до центра)
+        """
+        radius = 4 + pulse_size + 5 * 3 + 1
+        sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+        center = (radius, radius)
+        # Многослойное свечение
+        for glow_layer in range(5, 0, -1):
+            end_glow = 4 + pulse_size + glow_layer * 3
+            glow_alpha = 1.0 / (glow_layer + 1) * 0.5
+            glow_color = tuple(int(c * glow_alpha) for c in self.COLORS['chart_glow'])
+            pygame.draw.circle(sprite, glow_color, center, end_glow)
+        # Основная точка - яркая
+        pygame.draw.circle(sprite, self.COLORS['chart_line'], center, 5)
+        pygame.draw.circle(sprite, self.COLORS['chart_glow'], center, 3)
+        pygame.draw.circle(sprite, (255, 255, 255), center, 2)
+        return sprite, radius
+    
     def draw_mini_chart(self, x, y, width, height):
         """СТРИМ-ДИЗАЙН: Яркий неоновый график."""
         if len(self.evolution.best_fitness_history) < 2:
             return
         
         current_time = pygame.time.get_ticks()
+        cache = self.surface_cache
         
-        # Темный фон графика
-        pygame.draw.rect(self.screen, self.COLORS['chart_bg'], (x, y, width, height))
+        # Темный фон графика с сеткой осциллографа (статичный слой)
+        frame = cache.get(('chart_frame', width, height),
+                          lambda: self._render_chart_frame(width, height))
+        self.screen.blit(frame, (x, y))
         # Яркая неоновая граница
         border_pulse = abs(np.sin(current_time / 1500.0)) * 0.4 + 0.6
         border_color = tuple(int(c * border_pulse) for c in self.COLORS['ui_border'])
@@ -858,12 +1086,6 @@ class Visualizer:
         glow_border = tuple(int(c * 0.3) for c in border_color)
         pygame.draw.rect(self.screen, glow_border, (x - 1, y - 1, width + 2, height + 2), 1)
         
-        # Сетка осциллографа - приглушенный неон
-        for grid_y in range(y + 10, y + height - 10, 20):
-            grid_alpha = 0.2
-            grid_color = tuple(int(c * grid_alpha) for c in self.COLORS['grid_dim'])
-            pygame.draw.line(self.screen, grid_color, (x + 5, grid_y), (x + width - 5, grid_y), 1)
-        
         # Данные
         history = self.evolution.best_fitness_history[-50:]  # Последние 50 поколений
         max_val = max(history) if history else 1
@@ -883,30 +1105,386 @@ class Visualizer:
                     shadow_color = tuple(int(c * shadow_alpha) for c in (0, 0, 0))
                     pygame.draw.lines(self.screen, shadow_color, False, shadow_points, 2)
                 
-                # Яркая неоновая линия графика
+                # Яркая неоновая линия графика (градиент яркости)
+                line_colors = cache.get(('chart_line_colors', len(points)),
+                                        lambda: self._chart_line_colors(len(points)))
                 for i in range(len(points) - 1):
-                    p1 = points[i]
-                    p2 = points[i + 1]
-                    # Градиент яркости
-                    line_progress = i / (len(points) - 1)
-                    line_alpha = 0.7 + line_progress * 0.3
-                    line_color = tuple(int(c * line_alpha) for c in self.COLORS['chart_line'])
-                    pygame.draw.line(self.screen, line_color, p1, p2, 4)
+                    pygame.draw.line(self.screen, line_colors[i], points[i], points[i + 1], 4)
                 
                 # Эффект "развёртки" - яркое свечение
-                pulse = abs(np.sin(current_time / 300.0))
                 if points:
                     last_px, last_py = points[-1]
-                    # Многослойное свечение
-                    for glow_layer in range(5, 0, -1):
-                        end_glow = int(4 + pulse * 4 + glow_layer * 3)
-                        glow_alpha = 1.0 / (glow_layer + 1) * 0.5
-                        glow_color = tuple(int(c * glow_alpha) for c in self.COLORS['chart_glow'])
-                        pygame.draw.circle(self.screen, glow_color, (last_px, last_py), end_glow)
-                    # Основная точка - яркая
-                    pygame.draw.circle(self.screen, self.COLORS['chart_line'], (last_px, last_py), 5)
-                    pygame.draw.circle(self.screen, self.COLORS['chart_glow'], (last_px, last_py), 3)
-                    pygame.draw.circle(self.screen, (255, 255, 255), (last_px, last_py), 2)
+                    # Свечение зависит от пульсации только через целый радиус
+                    pulse_size = int(abs(np.sin(current_time / 300.0)) * 4)
+                    sprite, radius = cache.get(('chart_end', pulse_size),
+                                               lambda: self._render_chart_end(pulse_size))
+                    self.screen.blit(sprite, (last_px - radius, last_py - radius))
+    
+    def reset_dirty_state(self):
+        """Следующий кадр с грязными прямоугольниками перерисует окно целиком."""
+        self.body_layer.fill((0, 0, 0, 0))
+        self.body_cells = {}       # Клетка -> что нарисовано в ней на слое тела
+        self.body_bounds = pygame.Rect(0, 0, 0, 0)  # Непустая часть слоя тела
+        self.field_overlays = []   # Области анимированных объектов прошлого кадра
+        self.grid_levels = None    # Фазы слоёв сетки на экране
+        self.region_keys = {}      # Регион -> значения, с которыми он нарисован
+    
+    def _cell_rect(self, cell: Tuple[int, int]) -> pygame.Rect:
+        return pygame.Rect(cell[0] * self.cell_size, cell[1] * self.cell_size,
+                           self.cell_size, self.cell_size)
+    
+    def _render_body_tile(self, color, level, prev, nxt, nxt_level) -> pygame.Surface:
+        """
+        Клетка слоя тела: сегмент и части линий связи, попадающие в клетку.
+        
+        Args:
+            color: цвет змейки
+            level: уровень яркости сегмента (None - голова, только линия к телу)
+            prev, nxt: смещения соседних сегментов в пикселях (None - нет соседа)
+            nxt_level: уровень яркости следующего сегмента
+        """
+        cache = self.surface_cache
+        tile = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
+        half = self.cell_size // 2
+        center = (half, half)
+        # Порядок как в draw_snake: сегмент, линия от предыдущего, линия к следующему
+        if level is not None:
+            sprite, line_color = cache.get(
+                ('snake_segment', color, level),
+                lambda: self._render_snake_segment(color, cache.phase(level, self.BODY_LEVELS)))
+            tile.blit(sprite, (0, 0))
+            pygame.draw.line(tile, line_color, (half + prev[0], half + prev[1]), center, 3)
+        if nxt is not None:
+            _, line_color = cache.get(
+                ('snake_segment', color, nxt_level),
+                lambda: self._render_snake_segment(color, cache.phase(nxt_level, self.BODY_LEVELS)))
+            pygame.draw.line(tile, line_color, center, (half + nxt[0], half + nxt[1]), 3)
+        return tile
+    
+    def _update_body_layer(self, snake, snake_color) -> list:
+        """
+        Перерисовка слоя тела змейки только в изменившихся клетках.
+        
+        Клетка сегмента зависит от его уровня яркости и соседей (линии связи),
+        поэтому за шаг меняются голова, хвост и клетки, где градиент перешёл
+        на другой уровень. Содержимое клетки берётся из кэша готовых клеток.
+        
+        Returns:
+            прямоугольники изменившихся клеток (None - слой не обновлялся,
+            изменилось слишком много клеток)
+        """
+        cache = self.surface_cache
+        size = self.cell_size
+        body = list(snake.body)
+        n = len(body)
+        # То же округление, что в SurfaceCache.level (к чётному), но одним вызовом
+        levels = np.rint(np.arange(n) / max(1, n - 1) * (self.BODY_LEVELS - 1)).astype(int).tolist()
+        
+        # Содержимое клетки: (цвет, уровень сегмента, смещение предыдущего,
+        # смещение следующего, уровень следующего сегмента); у головы на слое
+        # только линия к первому сегменту
+        cells = {}
+        for i, cell in enumerate(body):
+            if i + 1 < n:
+                nxt_cell = body[i + 1]
+                nxt = ((nxt_cell[0] - cell[0]) * size, (nxt_cell[1] - cell[1]) * size)
+                nxt_level = levels[i + 1]
+            else:
+                nxt = nxt_level = None
+            if i == 0:
+                cells[cell] = (snake_color, None, None, nxt, nxt_level)
+            else:
+                prev_cell = body[i - 1]
+                prev = ((prev_cell[0] - cell[0]) * size, (prev_cell[1] - cell[1]) * size)
+                cells[cell] = (snake_color, levels[i], prev, nxt, nxt_level)
+        
+        old = self.body_cells
+        changed = [cell for cell, key in cells.items() if old.get(cell) != key]
+        changed.extend(cell for cell in old if cell not in cells)
+        
+        layer = self.body_layer
+        if len(changed) > self.MAX_DIRTY_RECTS:
+            # Градиент привязан к номеру сегмента, и у змейки длиннее пары
+            # десятков клеток за шаг меняется почти каждая клетка - такой кадр
+            # дешевле собрать целиком, рисуя тело прямо на экране
+            if old:
+                layer.fill((0, 0, 0, 0))
+                self.body_cells = {}
+                self.body_bounds = pygame.Rect(0, 0, 0, 0)
+            return None
+        rects = []
+        for cell in changed:
+            rect = self._cell_rect(cell)
+            layer.fill((0, 0, 0, 0), rect)
+            key = cells.get(cell)
+            if key is not None:
+                tile = cache.get(('body_tile',) + key, lambda: self._render_body_tile(*key))
+                # Максимум с прозрачной клеткой - точная копия пикселей с альфой
+                layer.blit(tile, rect.topleft, special_flags=pygame.BLEND_RGBA_MAX)
+            rects.append(rect)
+        
+        self.body_cells = cells
+        if cells:
+            xs = [cell[0] for cell in cells]
+            ys = [cell[1] for cell in cells]
+            self.body_bounds = pygame.Rect(min(xs) * size, min(ys) * size,
+                                           (max(xs) - min(xs) + 1) * size, (max(ys) - min(ys) + 1) * size)
+        else:
+            self.body_bounds = pygame.Rect(0, 0, 0, 0)
+        return rects
+    
+    def _compose_field(self, rect: pygame.Rect, frame: dict):
+        """
+        Сборка области поля из слоёв в порядке полной отрисовки: фон, точки,
+        линии сетки, свечение головы и глаза, слой тела, еда.
+        """
+        screen = self.screen
+        screen.set_clip(rect)
+        screen.fill(self.COLORS['background'], rect)
+        for dot_rect, dot_center, dot_color in frame['dots']:
+            if dot_rect.colliderect(rect):
+                pygame.draw.circle(screen, dot_color, dot_center, 1)
+        screen.blit(frame['grid_lines'], rect.topleft, rect)
+        screen.blit(frame['grid_accents'], rect.topleft, rect)
+        
+        head = frame['head']
+        if head is not None and head['rect'].colliderect(rect):
+            screen.blit(head['sprite'], head['rect'].topleft)
+            self._draw_snake_eyes(head['x'], head['y'], head['glow_color'], frame['time'])
+        if frame['body'] is not None:
+            self._draw_snake_body(frame['body'], frame['snake_color'])
+        elif self.body_bounds.colliderect(rect):
+            screen.blit(self.body_layer, rect.topleft, rect)
+        
+        for food_rect, food_pos in frame['foods']:
+            if food_rect.colliderect(rect):
+                self.draw_food(food_pos)
+        screen.set_clip(None)
+    
+    def render_field(self, snake, food_positions) -> list:
+        """
+        Поле с грязными прямоугольниками.
+        
+        Сетка (пульсирует целиком) и тело змейки лежат в готовых слоях;
+        каждый кадр собираются только клетки, где изменилось тело, и области
+        анимированных объектов (голова, еда, точки фона) - на старом и новом
+        месте. Фон (пульсация сетки и точки) меняется раз в AMBIENT_MS; когда
+        сетка переходит на другую фазу, новые слои сетки копируются поверх
+        поля, а заново собираются только клетки под объектами над сеткой.
+        
+        Returns:
+            прямоугольники экрана, которые нужно обновить
+        """
+        import math
+        cache = self.surface_cache
+        current_time = pygame.time.get_ticks()
+        ambient_time = current_time // self.AMBIENT_MS * self.AMBIENT_MS
+        grid_px = self.grid_size * self.cell_size
+        # Правые 3 столбца и нижнюю строку поля целиком закрывают рамки панелей
+        field = pygame.Rect(0, 0, grid_px - 3, grid_px - 1)
+        
+        # Слои сетки текущих фаз (те же, что в draw_grid)
+        line_level = cache.level(abs(np.sin(ambient_time / 1500.0)))
+        accent_level = cache.level(abs(np.sin(ambient_time / 1000.0)))
+        frame = {
+            'time': current_time,
+            'grid_lines': cache.get(('grid_lines', self.grid_size, line_level),
+                                    lambda: self._render_grid_lines(cache.phase(line_level) * 0.3 + 0.7)),
+            'grid_accents': cache.get(('grid_accents', self.grid_size, accent_level),
+                                      lambda: self._render_grid_accents(cache.phase(accent_level) * 0.5 + 0.5)),
+            'dots': [],
+            'head': None,
+            'body': None,     # Тело, рисуемое прямо на экране, а не из слоя
+            'snake_color': None,
+            'foods': [],
+        }
+        
+        # Движущиеся точки фона
+        for i in range(20):
+            x = int((ambient_time / 50 + i * 37) % grid_px)
+            y = int((ambient_time / 70 + i * 23) % grid_px)
+            alpha = abs(math.sin(ambient_time / 1000.0 + i)) * 0.1
+            dot_color = tuple(int(c * alpha) for c in (0, 100, 150))
+            frame['dots'].append((pygame.Rect(x - 1, y - 1, 3, 3), (x, y), dot_color))
+        
+        snake_color, glow_color = self._snake_colors()
+        rects = self._update_body_layer(snake, snake_color) if snake else []
+        if rects is None:
+            frame['body'] = snake.body
+            frame['snake_color'] = snake_color
+            rects = []
+        if snake and snake.body:
+            x, y = snake.body[0]
+            px, py = x * self.cell_size, y * self.cell_size
+            sprite, pad = self._snake_head_sprite(snake_color, glow_color, current_time)
+            frame['head'] = {'sprite': sprite, 'x': px, 'y': py, 'glow_color': glow_color,
+                             'rect': pygame.Rect(px - pad, py - pad, sprite.get_width(), sprite.get_height())}
+        
+        # Еда анимирована всегда; размер области - с запасом на максимальную пульсацию
+        half = self.cell_size // 2
+        radius = half + 8 + 10 * 3 + 1
+        for food_pos in food_positions:
+            center = (food_pos[0] * self.cell_size + half, food_pos[1] * self.cell_size + half)
+            frame['foods'].append((pygame.Rect(center[0] - radius, center[1] - radius,
+                                               radius * 2 + 1, radius * 2 + 1), food_pos))
+        
+        overlays = [dot_rect for dot_rect, _, _ in frame['dots']]
+        overlays.extend(food_rect for food_rect, _ in frame['foods'])
+        if frame['head'] is not None:
+            overlays.append(frame['head']['rect'])
+        
+        # Старое и новое место объекта обычно пересекаются - одна область на объект
+        for old_rect, new_rect in zip(self.field_overlays, overlays):
+            if old_rect.colliderect(new_rect):
+                rects.append(old_rect.union(new_rect))
+            else:
+                rects.extend((old_rect, new_rect))
+        rects.extend(self.field_overlays[len(overlays):])
+        rects.extend(overlays[len(self.field_overlays):])
+        self.field_overlays = overlays
+        
+        grid_levels = (line_level, accent_level)
+        redraw_grid = self.grid_levels is not None and grid_levels != self.grid_levels
+        if redraw_grid:
+            # Новые слои сетки той же геометрии целиком закрывают старые линии;
+            # заново собираются только клетки под телом
+            rects.extend(self._cell_rect(cell) for cell in self.body_cells)
+        
+        # Клетки и точки внутри крупных областей (еда, голова) не нужны
+        rects = [rect.clip(field) for rect in rects]
+        cell_area = self.cell_size * self.cell_size
+        large = [rect for rect in rects if rect.width * rect.height > cell_area]
+        rects = large + [rect for rect in rects
+                         if 0 < rect.width * rect.height <= cell_area
+                         and not any(big.contains(rect) for big in large)]
+        
+        if self.grid_levels is None or frame['body'] is not None or len(rects) > self.MAX_DIRTY_RECTS:
+            # Первый кадр или слишком много областей (у каждой свои копирования
+            # слоёв и еда, например у длинной змейки с бегущим градиентом) -
+            # одна сборка всего поля быстрее
+            rects = [field]
+        elif redraw_grid:
+            self.screen.blit(frame['grid_lines'], (0, 0), field)
+            self.screen.blit(frame['grid_accents'], (0, 0), field)
+        self.grid_levels = grid_levels
+        
+        for rect in rects:
+            self._compose_field(rect, frame)
+        return [field] if redraw_grid else rects
+    
+    def draw_panels(self, snake, rects: list = None):
+        """
+        Статус-бар и панель статистики.
+        
+        Args:
+            snake: змейка, чьи счёт и голод показываются
+            rects: грязные прямоугольники кадра (None - отрисовать всё); в rects
+                   добавляются только перерисованные полосы панелей
+        
+        Панели разбиты на полосы (заголовок, счётчики, подсказки, график,
+        сканирующая линия, счёт, голод), у каждой свои значения. Съеденная еда
+        и переключения режимов перерисовываются сразу, остальное - не чаще
+        раза в AMBIENT_MS: поток эволюции проходит десятки поколений в
+        секунду, и перерисовка на каждое из них съела бы всю экономию.
+        """
+        gen, best_fit, avg_fit = self.evolution.get_stats()
+        if rects is None:
+            if snake:
+                self.draw_game_status_bar(snake)
+            self.draw_stats(gen, best_fit, avg_fit)
+            return
+        
+        grid_px = self.grid_size * self.cell_size
+        if snake:
+            # Правые 3 столбца статус-бара закрыты рамкой панели статистики,
+            # которая рисуется поверх - их не трогаем
+            x_mid = grid_px // 2
+            top, height = grid_px - 1, self.height - grid_px + 1
+            status = []
+            if self._region_changed('score', (int(snake.get_fitness()),)):
+                status.append(pygame.Rect(0, top, x_mid, height))
+            hunger = int(self._hunger_left(snake) * 100)
+            if self._region_changed('hunger', (), (hunger,)):
+                status.append(pygame.Rect(x_mid, top, grid_px - 3 - x_mid, height))
+            self._draw_clipped(status, lambda: self.draw_game_status_bar(snake))
+            rects.extend(status)
+        
+        panel_x, panel_width = grid_px - 3, self.width - grid_px + 3
+        scan_y = pygame.time.get_ticks() // 40 % self.height
+        first = self.stats_layout is None
+        if first:
+            # Границы полос известны только после отрисовки - первый раз
+            # панель рисуется целиком, а полосы лишь запоминают свои значения
+            self.draw_stats(gen, best_fit, avg_fit)
+        
+        rows_top, help_top, chart_top = self.stats_layout
+        history = self.evolution.best_fitness_history
+        rows = f'{best_fit:.1f}', f'{avg_fit:.1f}'
+        # Сканирующая линия подсвечивает строки счётчиков, проходя рядом с ними
+        near_rows = scan_y if rows_top - 35 < scan_y < help_top + 35 else None
+        bands = (
+            ('title', 0, rows_top, (gen, pygame.time.get_ticks() // 500 % 2)),  # С курсором
+            ('rows', rows_top, help_top, (gen,) + rows + (near_rows,)),
+            ('chart', chart_top, self.height, (gen, len(history), history[-1] if history else None)),
+        )
+        stats = [pygame.Rect(panel_x, y0, panel_width, y1 - y0)
+                 for name, y0, y1, values in bands if self._region_changed(name, (), values)]
+        if self._region_changed('help', (self.demo_snake is None, self.fast_forward),
+                                (self.demo_step,)):
+            stats.append(pygame.Rect(panel_x, help_top, panel_width, chart_top - help_top))
+        
+        # Линия: полоски на старом и новом месте
+        old_scan = self.region_keys.get('scan')
+        if self._region_changed('scan', (), (scan_y,)):
+            for y in {scan_y, old_scan[1][0] if old_scan else scan_y}:
+                stats.append(pygame.Rect(panel_x, y - 2, panel_width, 5).clip(
+                    pygame.Rect(panel_x, 0, panel_width, self.height)))
+        
+        if first:
+            rects.append(pygame.Rect(panel_x, 0, panel_width, self.height))
+            return
+        self._draw_clipped(stats, lambda: self.draw_stats(gen, best_fit, avg_fit))
+        rects.extend(stats)
+    
+    def _draw_clipped(self, rects: list, draw):
+        """
+        Отрисовка, ограниченная прямоугольниками rects.
+        
+        Соприкасающиеся прямоугольники объединяются, и draw вызывается по
+        разу на каждую группу: одна обрезка по общему охвату далёких полос
+        (заголовок и линия внизу) рисовала бы всю панель между ними.
+        """
+        groups = []
+        for rect in sorted(rects, key=lambda r: r.y):
+            if groups and groups[-1].inflate(0, 2).colliderect(rect):
+                groups[-1].union_ip(rect)
+            else:
+                groups.append(pygame.Rect(rect))
+        for group in groups:
+            self.screen.set_clip(group)
+            draw()
+        self.screen.set_clip(None)
+    
+    def _region_changed(self, name: str, urgent: tuple, values: tuple = ()) -> bool:
+        """
+        Нужно ли перерисовать регион.
+        
+        Args:
+            name: имя региона
+            urgent: значения, при изменении которых регион перерисовывается сразу
+            values: значения, которые обновляются не чаще раза в AMBIENT_MS
+        
+        Returns:
+            True, если регион нужно перерисовать (значения запоминаются)
+        """
+        now = pygame.time.get_ticks()
+        drawn = self.region_keys.get(name)
+        if drawn is not None:
+            drawn_urgent, drawn_values, drawn_at = drawn
+            if drawn_urgent == urgent and (drawn_values == values or now - drawn_at < self.AMBIENT_MS):
+                return False
+        self.region_keys[name] = (urgent, values, now)
+        return True
     
     def animate_best_snake(self):
         """Анимация лучшей змейки, показывающая как она играет."""
@@ -929,13 +1507,14 @@ class Visualizer:
         
         # Один шаг игры
         if self.demo_step < self.demo_max_steps and self.demo_snake.alive:
+            self.demo_snake.advance_clock()
             # Получение входных данных для мозга (для совместимости берём первую еду)
             food_pos = self.demo_food_positions[0] if self.demo_food_positions else (5, 5)
             # Препятствия удалены - пустой список стен
             inputs = self.demo_snake.get_view(food_pos, walls=[])
             
             # Мозг принимает решение
-            action = self.demo_snake.brain.think(inputs)
+            action = self.demo_snake.brain.think(inputs, rng=self.evolution.environment.np_random)
             
             # Движение (без препятствий)
             move_success = self.demo_snake.move(action, walls=[])
@@ -943,6 +1522,7 @@ class Visualizer:
             if move_success:
                 # Проверка поедания еды (несколько еды одновременно)
                 head_pos = self.demo_snake.get_head()
+                self.demo_free_cells.occupy(head_pos)
                 food_eaten = False
                 for i, food_pos in enumerate(self.demo_food_positions):
                     if head_pos == food_pos:
@@ -953,16 +1533,16 @@ class Visualizer:
                         food_eaten = True
                         # Добавляем новую еду, если осталось мало
                         if len(self.demo_food_positions) < 2:
-                            free_positions = self.evolution.environment.get_free_positions(self.demo_snake.body)
-                            if free_positions:
-                                import random
-                                self.demo_food_positions.append(random.choice(free_positions))
+                            self.demo_food_positions.extend(
+                                self.demo_free_cells.sample(1, self.evolution.environment.random))
                         break
                 
                 # Яды и бонусы удалены
                 
                 if not food_eaten:
-                    self.demo_snake.remove_tail()
+                    tail = self.demo_snake.remove_tail()
+                    if tail is not None:
+                        self.demo_free_cells.release(tail)
                 
                 self.demo_snake.update_fitness()
             else:
@@ -994,8 +1574,12 @@ class Visualizer:
                 from snake import Snake
                 from brain import Brain
                 # Создаём копию лучшей змейки
-                self.demo_snake = Snake(brain=best_snake.brain.clone(), grid_size=self.grid_size)
+                environment = self.evolution.environment
+                self.demo_snake = Snake(brain=best_snake.brain.clone(), grid_size=self.grid_size,
+                                        clock=environment.clock,
+                                        ticks_per_second=environment.ticks_per_second)
                 self.demo_snake.reset()
+                self.demo_free_cells.reset(self.grid_size, self.demo_snake.body)
                 
                 # Устанавливаем начальную еду
                 self.evolution.environment.reset_food(occupied=self.demo_snake.body)
@@ -1010,6 +1594,8 @@ class Visualizer:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         return False  # Выход при закрытии окна
+                    elif event.type == pygame.VIDEOEXPOSE:
+                        self.reset_dirty_state()  # Окно перекрывали - перерисовать целиком
                     elif event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_SPACE:
                             # Следующее поколение - сброс демо
@@ -1020,6 +1606,8 @@ class Visualizer:
                             return False
                         elif event.key == pygame.K_p:
                             paused = not paused
+                        elif event.key == pygame.K_f:
+                            self.fast_forward = not self.fast_forward
             except:
                 pass  # Игнорируем ошибки событий
             
@@ -1071,41 +1659,46 @@ class Visualizer:
                         self.last_sound_stuck = False
                         return True
             
-            # Очистка экрана
-            self.screen.fill(self.COLORS['background'])
-            
-            # Отрисовка сетки
-            self.draw_grid()
+            # Змейка и еда кадра: демо-змейка или статичная лучшая
+            if self.demo_snake:
+                snake = self.demo_snake
+                food_positions = list(self.demo_food_positions)
+            else:
+                snake = self.evolution.get_best_snake()
+                food_positions = list(self.evolution.environment.food_positions)
             
-            # Препятствия удалены - стены, яды и бонусы не отрисовываются
+            # Грязные прямоугольники, пока нет эффектов на весь экран
+            # (пауза, вспышка поколения) - тогда окно перерисовывается целиком
+            dirty = (self.dirty_rects and not paused and self.generation_flash == 0
+                     and self.food_flash_alpha == 0)
             
-            # Отрисовка демо-змейки или статичной лучшей
-            if self.demo_snake:
-                self.draw_snake(self.demo_snake)
-                # Отрисовка множественной еды
-                for food_pos in self.demo_food_positions:
-                    self.draw_food(food_pos)
+            if dirty:
+                rects = self.render_field(snake, food_positions)
+            else:
+                # Очистка экрана
+                self.screen.fill(self.COLORS['background'])
                 
-                # Анимация если не на паузе
-                if not paused:
-                    self.animate_best_snake()
+                # Отрисовка сетки
+                self.draw_grid()
                 
-                # Статус-бар внизу игрового поля
-                self.draw_game_status_bar(self.demo_snake)
-            else:
-                # Статичная отрисовка
-                best_snake = self.evolution.get_best_snake()
-                if best_snake:
-                    self.draw_snake(best_snake)
-                # Множественная еда
-                for food_pos in self.evolution.environment.food_positions:
+                # Препятствия удалены - стены, яды и бонусы не отрисовываются
+                
+                if snake:
+                    self.draw_snake(snake)
+                # Отрисовка множественной еды
+                for food_pos in food_positions:
                     self.draw_food(food_pos)
-                if best_snake:
-                    self.draw_game_status_bar(best_snake)
             
-            # Статистика
-            gen, best_fit, avg_fit = self.evolution.get_stats()
-            self.draw_stats(gen, best_fit, avg_fit)
+            # Анимация если не на паузе (при перемотке - N шагов на кадр)
+            if self.demo_snake and not paused:
+                steps = self.fast_forward_steps if self.fast_forward else 1
+                for _ in range(steps):
+                    if not self.demo_snake.alive:
+                        break
+                    self.animate_best_snake()
+            
+            # Статус-бар внизу игрового поля и статистика
+            self.draw_panels(snake, rects if dirty else None)
             
             # Индикатор паузы - яркий неоновый
             if paused:
@@ -1150,7 +1743,11 @@ class Visualizer:
                 
                 self.generation_flash = max(0, self.generation_flash - 12)
             
-            pygame.display.flip()
+            if dirty:
+                pygame.display.update(rects)
+            else:
+                pygame.display.flip()
+                self.reset_dirty_state()
             self.clock.tick(10 if auto_mode else 15)  # Скорость анимации
         
         return False